@@ -1,24 +1,41 @@
 import sys
 import os
-import io
-from PySide6.QtCore import Qt, QSize
-from PySide6.QtGui import QPixmap, QColor, QImageReader, QGuiApplication
+from PySide6.QtCore import Qt, QSize, QTimer
+from PySide6.QtGui import QColor, QImageReader, QGuiApplication
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QHBoxLayout, QVBoxLayout,
     QPushButton, QLabel, QTextEdit, QComboBox, QCheckBox, QSpinBox,
     QColorDialog, QFileDialog, QSizePolicy, QFrame, QStatusBar, QMessageBox,
-    QLineEdit, QSlider 
+    QSlider 
 )
 
-# Importaciones específicas de qrcode
-import qrcode
-from qrcode.image.styledpil import StyledPilImage
-from qrcode.image.styles.moduledrawers import (
-    SquareModuleDrawer, RoundedModuleDrawer, CircleModuleDrawer
+# Opciones y parámetros del motor de renderizado (independiente de Qt). El
+# motor en sí (NumPy, qrcode, PIL) no se importa aquí: lo carga el hilo de
+# render con la primera vista previa, y la exportación al guardar
+from qrstudio.params import (
+    ERROR_CORRECTION, FILL_MODES, GRADIENT_MODES, RENDER_ENGINES, STYLE_NAMES, RenderParams
 )
-from qrcode.image.styles.colormasks import SolidFillColorMask
+from qrstudio.preview import PreviewRenderer
+from qrstudio.qt_image import pil_to_qimage, pil_to_qpixmap
+from qrstudio.trace import TRACER, format_timings
+
+
+def create_renderer():
+    """
+    StagedRenderer de la vista previa, con caché de disco (compartida con el
+    modo por lotes) para las imágenes a tamaño completo de guardar y copiar:
+    al reabrir con el mismo diseño no hay que volver a renderizarlas. La
+    vista previa solo usa la memoria. Se llama en el hilo de render con el
+    primer render.
+    """
+    from qrstudio.diskcache import DiskCache
+    from qrstudio.render import StagedRenderer
+    try:
+        disk_cache = DiskCache()
+    except OSError:
+        disk_cache = None
+    return StagedRenderer(disk_cache=disk_cache)
 
-from PIL import Image, ImageDraw, ImageFont
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -28,31 +45,36 @@ class MainWindow(QMainWindow):
 
         # --- Variables de estado ---
         self.fill_color = (0, 0, 0)
+        self.fill_color2 = (0, 0, 255)
         self.back_color = (255, 255, 255)
+        self.fill_image_path = None
         self.logo_path = None
-        self.current_qr_image = None
+        self.current_qr_image = None  # Imagen de la vista previa (resolución reducida)
+        self.current_params = None  # Parámetros a tamaño completo de esa imagen
         self.current_pixmap = None
+        self.full_image = None  # Imagen a tamaño completo, solo al guardar/copiar
+        self.full_image_params = None
+        self.requested_preview_px = None
         self.initial_qr_generated = False
+        self.image_filter = None  # Filtro de formatos de imagen (se calcula una vez)
 
-        # --- Diccionarios (sin cambios) ---
-        self.module_drawers = {
-            "Cuadrado": SquareModuleDrawer(),
-            "Redondeado": RoundedModuleDrawer(radius_ratio=1.0),
-            "Círculo": CircleModuleDrawer(),
-        }
-        self.error_correction = {
-            "Baja (L)": qrcode.constants.ERROR_CORRECT_L,
-            "Media (M)": qrcode.constants.ERROR_CORRECT_M,
-            "Cuartil (Q)": qrcode.constants.ERROR_CORRECT_Q,
-            "Alta (H)": qrcode.constants.ERROR_CORRECT_H
-        }
+        # --- Diccionarios (definidos en qrstudio.params) ---
+        self.style_names = STYLE_NAMES
+        self.error_correction = ERROR_CORRECTION
+        self.render_engines = RENDER_ENGINES
+        self.fill_modes = FILL_MODES
+
+        # --- Render de la vista previa en segundo plano ---
+        self.preview_renderer = PreviewRenderer(self, renderer_factory=create_renderer)
+        self.preview_renderer.rendered.connect(self.on_preview_rendered)
+        self.preview_renderer.failed.connect(self.on_preview_failed)
 
         # --- Configurar la UI ---
         self.init_ui()
         
         # --- 1. Poner textos por defecto ANTES de conectar ---
         self.text_input.setText("https://www.google.com/")
-        self.description_input.setText("QR-Studio")
+        self.description_input.setPlainText("QR-Studio")
 
         # --- 2. Conectar todas las señales ---
         self.connect_signals()
@@ -76,6 +98,17 @@ class MainWindow(QMainWindow):
         self.setStatusBar(QStatusBar(self))
         self.statusBar().showMessage("Listo.")
 
+        # Desglose de tiempos del último render (ver qrstudio.trace)
+        self.timing_label = QLabel()
+        self.timing_label.setVisible(TRACER.enabled)
+        self.timing_check = QCheckBox("Medir tiempos")
+        self.timing_check.setChecked(TRACER.enabled)
+        self.save_trace_button = QPushButton("Guardar traza...")
+        self.save_trace_button.setVisible(TRACER.enabled)
+        self.statusBar().addPermanentWidget(self.timing_label)
+        self.statusBar().addPermanentWidget(self.timing_check)
+        self.statusBar().addPermanentWidget(self.save_trace_button)
+
     # --- Creación de Paneles ---
 
     def create_options_panel(self):
@@ -90,12 +123,31 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.fill_color_button)
         layout.addWidget(self.back_color_button)
 
+        # Relleno de los módulos: sólido, degradados o imagen
+        layout.addWidget(QLabel("Relleno de Módulos:"))
+        self.fill_mode_combo = QComboBox()
+        self.fill_mode_combo.addItems(self.fill_modes.keys())
+        layout.addWidget(self.fill_mode_combo)
+        self.fill_color2_button = QPushButton("Color Final del Degradado (Azul)")
+        self.fill_image_button = QPushButton("Imagen de Relleno...")
+        layout.addWidget(self.fill_color2_button)
+        layout.addWidget(self.fill_image_button)
+
+        # Solo se habilitan con el relleno correspondiente
+        self.fill_color2_button.setEnabled(False)
+        self.fill_image_button.setEnabled(False)
+
         # --- Estilo de Módulos ---
         layout.addWidget(QLabel("<b>Estilo de Módulos</b>"))
         self.style_combo = QComboBox()
-        self.style_combo.addItems(self.module_drawers.keys())
+        self.style_combo.addItems(self.style_names)
         layout.addWidget(self.style_combo)
 
+        layout.addWidget(QLabel("Motor de dibujo:"))
+        self.engine_combo = QComboBox()
+        self.engine_combo.addItems(self.render_engines.keys())
+        layout.addWidget(self.engine_combo)
+
         # --- Logo (¡ORDEN CORREGIDO!) ---
         layout.addWidget(QLabel("<b>Logo</b>"))
         self.logo_check = QCheckBox("Añadir Logo")
@@ -136,6 +188,7 @@ class MainWindow(QMainWindow):
         self.box_spin = QSpinBox()
         self.box_spin.setValue(10)
         self.box_spin.setMinimum(1)
+        self.box_spin.setMaximum(500) # Formatos grandes: se exportan por franjas
         layout.addWidget(self.box_spin)
 
         layout.addWidget(QLabel("Tamaño del Borde:"))
@@ -186,8 +239,11 @@ class MainWindow(QMainWindow):
         layout.addWidget(self.text_input, 1)
 
         layout.addWidget(QLabel("<b>Descripción (opcional)</b>"))
-        self.description_input = QLineEdit()
+        # Varias líneas: cada una se centra bajo el QR
+        self.description_input = QTextEdit()
+        self.description_input.setAcceptRichText(False)
         self.description_input.setPlaceholderText("Ej: Carta de Telepizza")
+        self.description_input.setFixedHeight(60)
         layout.addWidget(self.description_input)
         
         layout.addWidget(QLabel("<b>Acciones</b>"))
@@ -210,6 +266,7 @@ class MainWindow(QMainWindow):
         # Widgets que regeneran el QR
         self.text_input.textChanged.connect(self.generate_qr_preview)
         self.style_combo.currentTextChanged.connect(self.generate_qr_preview)
+        self.engine_combo.currentTextChanged.connect(self.generate_qr_preview)
         self.error_combo.currentTextChanged.connect(self.generate_qr_preview)
         self.box_spin.valueChanged.connect(self.generate_qr_preview)
         self.border_spin.valueChanged.connect(self.generate_qr_preview)
@@ -218,6 +275,11 @@ class MainWindow(QMainWindow):
         # Botones de color
         self.fill_color_button.clicked.connect(self.open_fill_color_dialog)
         self.back_color_button.clicked.connect(self.open_back_color_dialog)
+        self.fill_color2_button.clicked.connect(self.open_fill_color2_dialog)
+
+        # Relleno de módulos
+        self.fill_mode_combo.currentTextChanged.connect(self.on_fill_mode_change)
+        self.fill_image_button.clicked.connect(self.open_fill_image_file)
         
         # Conexiones de Logo
         self.logo_check.toggled.connect(self.on_logo_toggled)
@@ -232,145 +294,144 @@ class MainWindow(QMainWindow):
         self.copy_button.clicked.connect(self.copy_qr)
         self.reset_button.clicked.connect(self.reset_options)
 
+        # Medición de tiempos
+        self.timing_check.toggled.connect(self.on_timing_toggled)
+        self.save_trace_button.clicked.connect(self.save_trace)
+
     # --- Función Central de Generación ---
 
+    def current_render_params(self):
+        """Reúne el estado de los widgets en un RenderParams."""
+        use_logo = self.logo_check.isChecked() and self.logo_path
+        fill_mode = self.fill_modes[self.fill_mode_combo.currentText()]
+        if fill_mode == "image" and not self.fill_image_path:
+            fill_mode = "solid"  # Aún no se ha elegido la imagen
+        return RenderParams(
+            data=self.text_input.toPlainText(),
+            description=self.description_input.toPlainText(),
+            error_correction=self.error_correction[self.error_combo.currentText()],
+            style=self.style_combo.currentText(),
+            box_size=self.box_spin.value(),
+            border=self.border_spin.value(),
+            fill_color=self.fill_color,
+            back_color=self.back_color,
+            logo_path=self.logo_path if use_logo else None,
+            logo_ratio=self.logo_size_slider.value() / 100.0,
+            border_radius=self.border_radius_slider.value(),
+            engine=self.render_engines[self.engine_combo.currentText()],
+            fill_mode=fill_mode,
+            fill_color2=self.fill_color2,
+            fill_image_path=self.fill_image_path,
+        )
+
     def generate_qr_preview(self):
+        """
+        Programa un render de la vista previa en segundo plano.
+
+        Las peticiones seguidas (teclas, sliders) se agrupan y el resultado
+        llega a on_preview_rendered().
+        """
         data = self.text_input.toPlainText()
-        description_text = self.description_input.text()
 
         if not data:
+            self.preview_renderer.cancel()
             self.qr_preview_label.clear()
             self.current_qr_image = None
+            self.current_params = None
             self.current_pixmap = None
             return
 
-        try:
-            # 1. Generar la imagen QR base
-            qr = qrcode.QRCode(
-                version=1,
-                error_correction=self.error_correction[self.error_combo.currentText()],
-                box_size=self.box_spin.value(),
-                border=self.border_spin.value(),
+        # Renderizar solo los píxeles que caben en la etiqueta; el tamaño
+        # completo se genera al guardar o copiar
+        self.requested_preview_px = self.preview_max_px()
+        self.preview_renderer.request(self.current_render_params(), self.requested_preview_px)
+
+    def preview_max_px(self):
+        """Lado en píxeles físicos del área de la vista previa."""
+        size = self.qr_preview_label.size()
+        return round(min(size.width(), size.height()) * self.devicePixelRatioF())
+
+    def on_preview_rendered(self, final_image, qimage, params):
+        # 1. Almacenar la imagen PIL de la vista previa y sus parámetros
+        self.current_qr_image = final_image
+        self.current_params = params
+        render_timings = TRACER.last_frame
+
+        with TRACER.frame("interfaz"):
+            # 2. Convertir a QPixmap (sin pasar por PNG) y ALMACENAR
+            with TRACER.stage("pixmap"):
+                self.current_pixmap = pil_to_qpixmap(qimage)
+
+            # 3. Llamar a la función separada para MOSTRAR
+            with TRACER.stage("mostrar"):
+                self.update_preview_display()
+
+        if TRACER.enabled:
+            self.timing_label.setText(
+                f"Render: {format_timings(render_timings)}"
+                f"  |  Interfaz: {format_timings(TRACER.last_frame)}"
             )
-            qr.add_data(data)
-            qr.make(fit=True)
-
-            selected_drawer = self.module_drawers[self.style_combo.currentText()]
-            color_mask = SolidFillColorMask(front_color=self.fill_color, back_color=self.back_color)
-
-            qr_image = qr.make_image(
-                image_factory=StyledPilImage,
-                module_drawer=selected_drawer,
-                color_mask=color_mask
-            ).convert("RGBA")
-
-            # 2. Añadir el logo (si está activado)
-            if self.logo_check.isChecked() and self.logo_path:
-                qr_image = self.embed_logo(qr_image)
 
-            # 3. Crear lienzo final y añadir descripción
-            final_image = self.add_description_to_image(qr_image, description_text)
-
-            # 4. Aplicar radio de borde ---
-            border_radius_val = self.border_radius_slider.value()
-            if border_radius_val > 0:
-                final_image = self.apply_border_radius(final_image, border_radius_val)
-
-            # 5. Almacenar la imagen PIL final
-            self.current_qr_image = final_image
-
-            # 6. Convertir a QPixmap y ALMACENAR
-            buffer = io.BytesIO()
-            final_image.save(buffer, "PNG")
-            self.current_pixmap = QPixmap()
-            self.current_pixmap.loadFromData(buffer.getvalue())
+        self.statusBar().showMessage("Vista previa actualizada.", 2000)
+        self.statusBar().setToolTip(self.cache_stats_text())
+
+    def cache_stats_text(self):
+        """Resumen de aciertos/fallos de la caché por etapas."""
+        names = {"matrices": "Matrices", "layers": "Capas", "rasters": "Módulos", "outputs": "Salidas", "disk": "Disco"}
+        lines = ["Caché de render (aciertos / fallos):"]
+        for stage, stats in self.preview_renderer.renderer.stats().items():
+            lines.append(f"{names[stage]}: {stats['hits']} / {stats['misses']}"
+                         f" ({stats['bytes'] / 1e6:.1f} MB)")
+        return "\n".join(lines)
+
+    def on_timing_toggled(self, checked):
+        TRACER.enabled = checked
+        self.timing_label.setVisible(checked)
+        self.timing_label.clear()
+        self.save_trace_button.setVisible(checked)
+        if checked:
+            # Medir ya el render actual (con la caché solo corren las etapas que cambian)
+            self.generate_qr_preview()
 
-            # 7. Llamar a la función separada para MOSTRAR
-            self.update_preview_display()
-            
-            self.statusBar().showMessage("Vista previa actualizada.", 2000)
+    def save_trace(self):
+        path, _ = QFileDialog.getSaveFileName(
+            self, "Guardar Traza de Tiempos", "traza_qr.json", "Chrome trace (*.json)"
+        )
+        if path:
+            try:
+                TRACER.dump(path)
+                self.statusBar().showMessage(f"Traza guardada en {path}", 5000)
+            except OSError as e:
+                QMessageBox.critical(self, "Error al Guardar", f"No se pudo guardar la traza:\n{e}")
+
+    def on_preview_failed(self, error):
+        # El hilo de render ya ha importado el motor
+        from qrstudio.render import LogoError
+        if isinstance(error, LogoError):
+            # Desactivar el logo y volver a generar sin él
+            self.statusBar().showMessage(f"Error al cargar el logo: {error}", 3000)
+            self.logo_check.setChecked(False)
+            return
 
-        except Exception as e:
-            self.statusBar().showMessage(f"Error al generar QR: {e}")
-            self.current_pixmap = None
-            self.update_preview_display()
+        self.statusBar().showMessage(f"Error al generar QR: {error}")
+        self.current_pixmap = None
+        self.update_preview_display()
 
-    # --- Función para aplicar radio de borde ---
-    def apply_border_radius(self, image, radius):
+    def full_resolution_image(self):
         """
-        Aplica un radio de borde a la imagen final usando una máscara.
-        """
-        try:
-            # Crear una máscara alfa (L = 8-bit pixels, black and white)
-            mask = Image.new("L", image.size, 0)
-            draw = ImageDraw.Draw(mask)
-            draw.rounded_rectangle((0, 0) + image.size, radius=radius, fill=255)
-            
-            # Crear la imagen de salida transparente
-            rounded_img = Image.new("RGBA", image.size, (0, 0, 0, 0))
-            # Pegar la imagen original usando la máscara
-            rounded_img.paste(image, (0, 0), mask=mask)
-            
-            return rounded_img
-        except Exception as e:
-            self.statusBar().showMessage(f"Error al redondear bordes: {e}", 2000)
-            return image
-
-    def add_description_to_image(self, qr_image, text):
-        
-        if not text or text.isspace():
-            return qr_image 
-
-        font_size = max(15, qr_image.width // 20)
-        try:
-            font = ImageFont.truetype("arial.ttf", font_size)
-        except IOError:
-            self.statusBar().showMessage("Fuente Arial no encontrada, usando fuente por defecto.", 1000)
-            font = ImageFont.load_default()
-
-        text_bbox = font.getbbox(text)
-        text_width = text_bbox[2] - text_bbox[0]
-        text_height = text_bbox[3] - text_bbox[1]
-        
-        padding_top = 10    # Espacio entre QR y texto
-        padding_bottom = 20 # Espacio entre texto y borde inferior
+        Imagen a tamaño completo de lo que muestra la vista previa.
 
-        new_width = qr_image.width
-        new_height = qr_image.height + text_height + padding_top + padding_bottom
-        
-        final_image = Image.new("RGBA", (new_width, new_height), self.back_color)
-        final_image.paste(qr_image, (0, 0))
-
-        draw = ImageDraw.Draw(final_image)
-        text_x = (new_width - text_width) // 2
-        text_y = qr_image.height + padding_top
-        
-        draw.text((text_x, text_y), text, font=font, fill=self.fill_color)
-        
-        return final_image
-
-    def embed_logo(self, qr_image):
-        
-        try:
-            logo = Image.open(self.logo_path).convert("RGBA")
-
-            qr_width, qr_height = qr_image.size
-            
-            logo_ratio = self.logo_size_slider.value() / 100.0
-            logo_max_size = int(qr_height * logo_ratio)
-            logo.thumbnail((logo_max_size, logo_max_size), Image.Resampling.LANCZOS)
-
-            box_x = (qr_width - logo.width) // 2
-            box_y = (qr_height - logo.height) // 2
-            pos = (box_x, box_y)
-
-            qr_image.paste(logo, pos, mask=logo)
-            return qr_image
-            
-        except Exception as e:
-            self.statusBar().showMessage(f"Error al cargar el logo: {e}", 3000)
-            self.logo_check.setChecked(False)
-            return qr_image
+        Se renderiza al guardar o copiar y se reutiliza hasta que cambien
+        los parámetros.
+        """
+        if self.full_image_params != self.current_params:
+            QApplication.setOverrideCursor(Qt.WaitCursor)
+            try:
+                self.full_image = self.preview_renderer.renderer.render(self.current_params)
+            finally:
+                QApplication.restoreOverrideCursor()
+            self.full_image_params = self.current_params
+        return self.full_image
 
     # --- Funciones de los Widgets ---
 
@@ -388,6 +449,32 @@ class MainWindow(QMainWindow):
             self.back_color_button.setText(f"Color de Fondo ({color.name()})")
             self.generate_qr_preview()
 
+    def open_fill_color2_dialog(self):
+        color = QColorDialog.getColor(QColor(*self.fill_color2))
+        if color.isValid():
+            self.fill_color2 = color.getRgb()[:3]
+            self.fill_color2_button.setText(f"Color Final del Degradado ({color.name()})")
+            self.generate_qr_preview()
+
+    def on_fill_mode_change(self, text):
+        fill_mode = self.fill_modes[text]
+        self.fill_color2_button.setEnabled(fill_mode in GRADIENT_MODES)
+        self.fill_image_button.setEnabled(fill_mode == "image")
+
+        if fill_mode == "image" and not self.fill_image_path:
+            self.open_fill_image_file()
+        else:
+            self.generate_qr_preview()
+
+    def open_fill_image_file(self):
+        path, _ = QFileDialog.getOpenFileName(
+            self, "Seleccionar Imagen de Relleno", "", f"Imágenes ({self.image_file_filter()});;Todos los archivos (*)"
+        )
+        if path:
+            self.fill_image_path = path
+            self.fill_image_button.setText(f"Imagen: {os.path.basename(path)}")
+            self.generate_qr_preview()
+
     def on_logo_toggled(self, checked):
         # (Función simplificada, sin cambios)
         self.logo_button.setEnabled(checked)
@@ -412,10 +499,16 @@ class MainWindow(QMainWindow):
         self.border_radius_label.setText(f" {value} px")
         self.generate_qr_preview()
 
+    def image_file_filter(self):
+        # Los formatos de Qt no cambian durante la sesión: se consultan una vez
+        if self.image_filter is None:
+            formats = {bytes(fmt.data()).decode().lower() for fmt in QImageReader.supportedImageFormats()}
+            self.image_filter = " ".join(f"*.{fmt}" for fmt in sorted(formats))
+        return self.image_filter
+
     def open_logo_file(self):
-        supported_formats = " ".join([f"*.{fmt.data().decode()}" for fmt in QImageReader.supportedImageFormats()])
         path, _ = QFileDialog.getOpenFileName(
-            self, "Seleccionar Logo", "", f"Imágenes ({supported_formats});;Todos los archivos (*)"
+            self, "Seleccionar Logo", "", f"Imágenes ({self.image_file_filter()});;Todos los archivos (*)"
         )
         if path:
             self.logo_path = path
@@ -428,42 +521,106 @@ class MainWindow(QMainWindow):
             QMessageBox.warning(self, "Nada que guardar", "Primero genera un código QR.")
             return
 
+        # Los formatos vectoriales solo admiten relleno sólido
+        vector_allowed = self.current_params.fill_mode == "solid"
+        file_filter = "PNG (*.png);;JPEG (*.jpg);;TIFF (*.tif *.tiff)"
+        if vector_allowed:
+            file_filter += ";;SVG (*.svg);;PDF (*.pdf);;EPS (*.eps)"
         path, _ = QFileDialog.getSaveFileName(
-            self, "Guardar Código QR", "mi_codigo_qr.png", "PNG (*.png);;JPEG (*.jpg)"
+            self, "Guardar Código QR", "mi_codigo_qr.png", file_filter
         )
         
         if path:
+            # Se importan al guardar: no hacen falta para arrancar
+            from PIL import Image
+            from qrstudio.stream import export_streamed
+            from qrstudio.vector import export_vector, vector_format
             try:
+                if vector_format(path):
+                    if not vector_allowed:
+                        # Extensión escrita a mano con un degradado o imagen
+                        QMessageBox.warning(
+                            self, "Formato no disponible",
+                            "SVG, PDF y EPS solo admiten relleno sólido.\n"
+                            "Guarda en PNG, JPG o TIFF, o cambia el relleno a \"Sólido\"."
+                        )
+                        return
+                    # Vectorial: se genera desde la matriz, sin raster
+                    export_vector(self.current_params, path)
+                    self.statusBar().showMessage(f"¡QR guardado en {path}!", 5000)
+                    return
+
+                if self.should_stream(path):
+                    # Tamaño de póster: renderizar y escribir por franjas
+                    # sin montar la imagen completa en memoria
+                    QApplication.setOverrideCursor(Qt.WaitCursor)
+                    try:
+                        export_streamed(self.current_params, path)
+                    finally:
+                        QApplication.restoreOverrideCursor()
+                    self.statusBar().showMessage(f"¡QR guardado en {path}!", 5000)
+                    return
+
+                full_image = self.full_resolution_image()
                 if path.lower().endswith(('.jpg', '.jpeg')):
-                    img_to_save = Image.new("RGB", self.current_qr_image.size, "WHITE")
-                    img_to_save.paste(self.current_qr_image, (0, 0), self.current_qr_image)
+                    img_to_save = Image.new("RGB", full_image.size, "WHITE")
+                    img_to_save.paste(full_image, (0, 0), full_image)
                 else:
                     # Si es PNG, guarda con transparencia
-                    img_to_save = self.current_qr_image
+                    img_to_save = full_image
                     
                 img_to_save.save(path)
                 self.statusBar().showMessage(f"¡QR guardado en {path}!", 5000)
             except Exception as e:
                 QMessageBox.critical(self, "Error al Guardar", f"No se pudo guardar el archivo:\n{e}")
 
+    def should_stream(self, path):
+        """
+        True si la imagen a tamaño completo es lo bastante grande como para
+        exportarla por franjas (y el formato lo permite).
+        """
+        from qrstudio.stream import STREAM_THRESHOLD, stream_format
+        if stream_format(path) is None or self.full_image_params == self.current_params:
+            return False
+        params = self.current_params
+        # Con el lock del render (el hilo de la vista previa puede estar
+        # codificando) y sin disco: la matriz está en memoria
+        modules = self.preview_renderer.renderer.modules_count(params.data, params.error_correction)
+        side = (modules + 2 * params.border) * params.box_size
+        return side * side > STREAM_THRESHOLD
+
     def copy_qr(self):
-        if not self.current_pixmap:
+        if not self.current_qr_image:
             QMessageBox.warning(self, "Nada que copiar", "Primero genera un código QR.")
             return
             
+        try:
+            full_image = self.full_resolution_image()
+        except Exception as e:
+            QMessageBox.critical(self, "Error al Copiar", f"No se pudo generar el QR:\n{e}")
+            return
+
         clipboard = QGuiApplication.clipboard()
-        clipboard.setPixmap(self.current_pixmap)
+        # El portapapeles guarda su propia copia: la QImage envuelta
+        # comparte el buffer de PIL, que se libera al salir de aquí
+        clipboard.setImage(pil_to_qimage(full_image).copy())
         self.statusBar().showMessage("¡QR copiado al portapapeles!", 3000)
 
     def reset_options(self):
         self.fill_color = (0, 0, 0)
+        self.fill_color2 = (0, 0, 255)
         self.back_color = (255, 255, 255)
+        self.fill_image_path = None
         self.logo_path = None
         
         self.fill_color_button.setText("Color de Módulos (Negro)")
         self.back_color_button.setText("Color de Fondo (Blanco)")
+        self.fill_color2_button.setText("Color Final del Degradado (Azul)")
+        self.fill_image_button.setText("Imagen de Relleno...")
+        self.fill_mode_combo.setCurrentIndex(0)
         
         self.style_combo.setCurrentIndex(0)
+        self.engine_combo.setCurrentIndex(0)
         self.error_combo.setCurrentText("Alta (H)")
         
         self.logo_check.setChecked(False)
@@ -478,7 +635,7 @@ class MainWindow(QMainWindow):
         self.border_radius_slider.setValue(0)
         
         self.text_input.setText("https://www.google.com/")
-        self.description_input.setText("QR-Studio")
+        self.description_input.setPlainText("QR-Studio")
         
         self.statusBar().showMessage("Opciones restablecidas.", 3000)
         self.generate_qr_preview()
@@ -499,12 +656,26 @@ class MainWindow(QMainWindow):
     def showEvent(self, event):
         super().showEvent(event)
         if not self.initial_qr_generated:
-            self.generate_qr_preview()
+            # Al volver al bucle de eventos: la ventana se pinta antes de
+            # pedir el primer render (que importa el motor en segundo plano)
+            QTimer.singleShot(0, self.generate_qr_preview)
             self.initial_qr_generated = True
 
     def resizeEvent(self, event):
         super().resizeEvent(event)
         self.update_preview_display()
+        # La vista previa se renderiza al tamaño de la etiqueta: volver a
+        # pedirla si ese tamaño ha cambiado
+        if self.initial_qr_generated and self.preview_max_px() != self.requested_preview_px:
+            self.generate_qr_preview()
+
+    def closeEvent(self, event):
+        self.preview_renderer.shutdown()
+        # QRSTUDIO_TRACE=ruta.json vuelca la traza de la sesión al salir
+        trace_path = os.environ.get("QRSTUDIO_TRACE", "")
+        if trace_path.lower().endswith(".json"):
+            TRACER.dump(trace_path)
+        super().closeEvent(event)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,83 @@
+"""
+Tiempo de las máscaras de color vectorizadas sobre un QR de ~2000 px.
+
+Uso:
+    python benchmarks/bench_color_masks.py [--size 2000] [--repeat 5] [--qrcode]
+
+Con --qrcode también mide las máscaras originales de qrcode (tardan
+segundos por render) y comprueba que el resultado es idéntico.
+"""
+import argparse
+import copy
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles import colormasks
+
+from qrstudio.render import MODULE_DRAWERS, draw_modules, encode_qr
+
+BACK = (255, 255, 255)
+COLOR1 = (200, 0, 60)
+COLOR2 = (0, 60, 200)
+
+QRCODE_MASKS = {
+    "radial": colormasks.RadialGradiantColorMask,
+    "square": colormasks.SquareGradiantColorMask,
+    "horizontal": colormasks.HorizontalGradiantColorMask,
+    "vertical": colormasks.VerticalGradiantColorMask,
+}
+
+
+def qrcode_reference(qr, style, box_size, mode):
+    qr = copy.copy(qr)
+    qr.box_size = box_size
+    qr.border = 4
+    return qr.make_image(
+        image_factory=StyledPilImage, module_drawer=MODULE_DRAWERS[style](),
+        color_mask=QRCODE_MASKS[mode](BACK, COLOR1, COLOR2)
+    ).convert("RGBA")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--size", type=int, default=2000, help="Lado aproximado en píxeles")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--style", default="Redondeado")
+    parser.add_argument("--qrcode", action="store_true", help="Medir también las máscaras de qrcode")
+    args = parser.parse_args(argv)
+
+    qr = encode_qr("https://example.com/" + "x" * 200, 2)
+    box_size = max(1, args.size // (qr.modules_count + 8))
+
+    print(f"{'máscara':<11} {'1er render (ms)':>16} {'siguientes (ms)':>16} {'qrcode (ms)':>12}")
+    for mode in QRCODE_MASKS:
+        def run():
+            return draw_modules(qr, args.style, box_size, 4, COLOR1, BACK, "numpy", mode, COLOR2)
+
+        start = time.perf_counter()
+        image = run()
+        cold = (time.perf_counter() - start) * 1000
+
+        best = float("inf")
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            run()
+            best = min(best, time.perf_counter() - start)
+
+        reference = ""
+        if args.qrcode:
+            start = time.perf_counter()
+            expected = qrcode_reference(qr, args.style, box_size, mode)
+            reference = f"{(time.perf_counter() - start) * 1000:.0f}"
+            assert expected.tobytes() == image.tobytes(), f"{mode}: resultado distinto de qrcode"
+
+        print(f"{mode:<11} {cold:>16.1f} {best * 1000:>16.1f} {reference:>12}")
+    print(f"Lienzo: {image.width}x{image.height} px, estilo {args.style}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+"""
+Memoria y tiempo de la post-producción (logo, descripción y radio) de un
+QR grande: la cadena anterior de copias frente a compose_image().
+
+Uso:
+    python benchmarks/bench_compose.py [--box-size 60] [--repeat 5]
+
+La cadena anterior copiaba los módulos para pegar el logo, creaba otro
+lienzo para la descripción y, para el radio, una máscara "L" y un lienzo
+más del tamaño completo. compose_image() reserva un único lienzo y solo
+toca las cuatro esquinas.
+
+Cada variante se ejecuta en un proceso aparte que carga los módulos ya
+dibujados (.npy), así que el pico de memoria residente (ru_maxrss, solo
+Unix) que se da es lo que añade la post-producción. Al final se comprueba
+que las dos salidas son idénticas.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def params_for(box_size, logo_path):
+    from qrstudio.render import RenderParams
+    return RenderParams(
+        data="https://example.com/" + "cartel" * 20, description="QR-Studio",
+        box_size=box_size, border_radius=box_size * 4, engine="numpy",
+        logo_path=logo_path, fill_color=(200, 0, 60), back_color=(250, 245, 230),
+    )
+
+
+def legacy_compose(qr_image, params):
+    """La post-producción tal como se hacía antes del lienzo único."""
+    from PIL import Image, ImageDraw
+    from qrstudio.logo import LOGO_CACHE
+    from qrstudio.render import description_layout, logo_max_size, paste_logo
+
+    # El raster podía venir de la caché: copia para pegar el logo
+    image = qr_image.copy()
+    thumb = LOGO_CACHE.thumbnail(params.logo_path, logo_max_size(image, params.logo_ratio))
+    paste_logo(image, thumb)
+    # Otro lienzo con el QR y el texto debajo
+    text, text_y, height = description_layout(image.width, image.height, params.description)
+    described = Image.new("RGBA", (image.width, height), params.back_color)
+    described.paste(image, (0, 0))
+    text.paste(described, text_y, params.fill_color)
+    image = described
+    mask = Image.new("L", image.size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0) + image.size,
+                                           radius=params.border_radius, fill=255)
+    rounded = Image.new("RGBA", image.size, (0, 0, 0, 0))
+    rounded.paste(image, (0, 0), mask=mask)
+    return rounded
+
+
+def compose(mode, box_size, tmp, repeat):
+    """Se ejecuta en el proceso hijo: compone y escribe tiempo y picos."""
+    import numpy as np
+    from PIL import Image
+    from qrstudio.render import compose_image
+
+    params = params_for(box_size, os.path.join(tmp, "logo.png"))
+    qr_image = Image.fromarray(np.load(os.path.join(tmp, "modulos.npy")), "RGBA")
+    func = legacy_compose if mode == "anterior" else compose_image
+
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    func(qr_image, params)  # calentamiento: miniatura del logo y texto en caché
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = func(qr_image, params)
+        best = min(best, time.perf_counter() - start)
+        del image
+    # ru_maxrss va en KB en Linux
+    extra_mb = (resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - before) / 1024
+    np.save(os.path.join(tmp, f"{mode}.npy"), np.asarray(func(qr_image, params)))
+    print(f"{best * 1000:.1f} {extra_mb:.1f}")
+
+
+def run_child(mode, args, tmp):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--box-size", str(args.box_size),
+         "--repeat", str(args.repeat), tmp],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), float(output[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--box-size", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("tmp", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        compose(args.child, args.box_size, args.tmp, args.repeat)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # Módulos y logo preparados en un proceso aparte: el pico de memoria
+        # del padre se hereda en los hijos y falsearía la medida
+        subprocess.run([sys.executable, "-c", (
+            "import sys, numpy as np; sys.path.insert(0, sys.argv[1]);"
+            "from PIL import Image;"
+            "from qrstudio.render import draw_modules, encode_qr, RenderParams;"
+            "p = RenderParams(data=sys.argv[2]);"
+            "qr = encode_qr(p.data, p.error_correction);"
+            "np.save(sys.argv[3] + '/modulos.npy', np.asarray(draw_modules("
+            "qr, p.style, int(sys.argv[4]), p.border, (200, 0, 60), (250, 245, 230), 'numpy')));"
+            "Image.radial_gradient('L').convert('RGBA').save(sys.argv[3] + '/logo.png')"
+        ), ROOT, params_for(1, None).data, tmp, str(args.box_size)], check=True)
+
+        print(f"{'variante':<9} {'tiempo (ms)':>12} {'pico añadido (MB)':>18}")
+        for mode in ("anterior", "lienzo"):
+            elapsed, extra = run_child(mode, args, tmp)
+            print(f"{mode:<9} {elapsed:>12.1f} {extra:>18.0f}")
+
+        import numpy as np
+        a = np.load(os.path.join(tmp, "anterior.npy"))
+        b = np.load(os.path.join(tmp, "lienzo.npy"))
+        assert a.shape == b.shape and (a == b).all(), "píxeles distintos"
+    print(f"Imagen: {a.shape[1]}x{a.shape[0]} px, píxeles idénticos")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""
+Coste de elegir la versión del QR, de 1 a 2900 bytes de datos.
+
+Uso:
+    python benchmarks/bench_encode.py [--sizes 1,100,500,1000,2900] [--repeat 20] [--ecc L]
+
+Para cada tamaño se mide (mejor tiempo de --repeat):
+
+* qrcode: QRCode.add_data() + best_fit(), la búsqueda de qrcode.
+* tablas: la segmentación de qrcode + fit_version() (qrstudio.encoder).
+* tecla: QREncoder con el texto anterior ya visto, al añadir un carácter
+  (lo que cuesta cada pulsación en la vista previa).
+* make: codificación completa con qrcode (make(fit=True)) frente a
+  render.encode_qr(), que incluye las máscaras y Reed-Solomon.
+
+Se comprueba además que la versión y la matriz coinciden con las de qrcode.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import qrcode
+from qrcode import util
+
+from qrstudio.encoder import OPTIMIZE, QREncoder, fit_version
+from qrstudio.render import ERROR_CORRECTION_LETTERS, encode_qr
+
+DEFAULT_SIZES = "1,10,50,100,250,500,1000,1500,2000,2500,2900"
+
+# Texto con tramos de byte, alfanuméricos y numéricos, como una URL real
+PATTERN = ("https://example.com/pedido?id=20240000123456789012&ref=QR-STUDIO-PROMO-2024-OTONO"
+           "&nombre=Daniel Muñoz&nota=entrega urgente antes de las 10:30 ")
+
+
+def payload(size):
+    """Texto de exactamente size bytes en UTF-8."""
+    data = (PATTERN * (size // len(PATTERN) + 2)).encode("utf-8")[:size]
+    # No cortar un carácter multibyte por la mitad
+    return data.decode("utf-8", errors="ignore").ljust(size, "x")
+
+
+def best_time(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def qrcode_fit(data, ecc):
+    qr = qrcode.QRCode(version=1, error_correction=ecc)
+    qr.add_data(data)
+    return qr.best_fit()
+
+
+def table_fit(data, ecc):
+    segments = list(util.optimal_data_chunks(util.to_bytestring(data), minimum=OPTIMIZE))
+    return fit_version(segments, ecc)
+
+
+def keystroke(data, ecc):
+    """Función que mide una pulsación: el codificador ya ha visto data[:-1]."""
+    encoder = QREncoder()
+    previous = data[:-1]
+
+    def run():
+        encoder.segments(previous)
+        start = time.perf_counter()
+        fit_version(encoder.segments(data), ecc, encoder._versions.get(ecc))
+        return time.perf_counter() - start
+
+    return run
+
+
+def qrcode_make(data, ecc):
+    qr = qrcode.QRCode(version=1, error_correction=ecc)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default=DEFAULT_SIZES, help="Tamaños en bytes, separados por comas")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--ecc", default="L", help="Corrección de error: L, M, Q o H")
+    parser.add_argument("--no-make", action="store_true", help="No medir la codificación completa (lenta)")
+    args = parser.parse_args(argv)
+    ecc = ERROR_CORRECTION_LETTERS[args.ecc.upper()]
+
+    print(f"{'bytes':>6} {'ver':>4} {'qrcode (ms)':>12} {'tablas (ms)':>12} {'tecla (ms)':>11}"
+          f" {'make qrcode':>12} {'encode_qr':>10}")
+    for size in (int(s) for s in args.sizes.split(",")):
+        data = payload(size)
+        try:
+            reference = qrcode_make(data, ecc)
+        except (qrcode.exceptions.DataOverflowError, ValueError):
+            print(f"{size:>6}  no cabe con corrección {args.ecc}")
+            continue
+        fast = encode_qr(data, ecc)
+        assert fast.version == reference.version and fast.modules == reference.modules, size
+
+        t_qrcode = best_time(lambda: qrcode_fit(data, ecc), args.repeat)
+        t_table = best_time(lambda: table_fit(data, ecc), args.repeat)
+        run = keystroke(data, ecc)
+        t_key = min(run() for _ in range(args.repeat)) * 1000
+        if args.no_make:
+            make = ""
+        else:
+            repeat = max(1, args.repeat // 10)
+            t_make = best_time(lambda: qrcode_make(data, ecc), repeat)
+            t_encode = best_time(lambda: encode_qr(data, ecc), repeat)
+            make = f" {t_make:>12.1f} {t_encode:>10.1f}"
+        print(f"{size:>6} {reference.version:>4} {t_qrcode:>12.3f} {t_table:>12.3f}"
+              f" {t_key:>11.3f}{make}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,327 @@
+"""
+Benchmark del pipeline completo de render, por etapas y sin interfaz.
+
+Uso:
+    python benchmarks/bench_pipeline.py [--repeat 5] [--output resultados.json]
+    python benchmarks/bench_pipeline.py --versions 1-40 --full
+    python benchmarks/bench_pipeline.py --compare base.json --threshold 10
+
+Por defecto se varía un parámetro cada vez sobre una configuración base
+(versión, corrección de error, estilo, motor, tamaño de módulo, logo,
+descripción y radio); con --full se prueban todas las combinaciones.
+
+Para cada configuración se mide cada etapa (las de qrstudio.trace:
+codificar, módulos, lienzo, logo, descripción, esquinas) y el total: percentiles
+de latencia, renders por segundo y pico de memoria. El pico se mide con
+tracemalloc en una pasada aparte, así que cuenta lo que reservan Python y
+NumPy pero no los buffers internos de PIL; por eso se da también el tamaño
+de la imagen que produce cada etapa.
+
+Los resultados se guardan en JSON. Con --compare se comparan con otra
+ejecución y el programa termina con código 1 si el p50 de alguna
+configuración empeora más que --threshold por ciento.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import numpy as np
+import PIL
+import qrcode
+from PIL import Image
+from qrcode.util import BIT_LIMIT_TABLE
+
+from qrstudio.render import (
+    ERROR_CORRECTION, MODULE_DRAWERS, RENDER_ENGINES, RenderParams,
+    compose_image, draw_modules, encode_qr, render_qr,
+)
+from qrstudio.trace import TRACER
+
+STAGES = ("codificar", "módulos", "lienzo", "logo", "descripción", "esquinas")
+
+# Configuración base; cada eje se varía sobre ella
+BASE = {
+    "version": 5,
+    "ecc": "Alta (H)",
+    "style": "Cuadrado",
+    "engine": "pil",
+    "box_size": 10,
+    "logo_ratio": 0.0,
+    "description": False,
+    "border_radius": 0,
+}
+AXES = {
+    "version": (1, 10, 20, 30, 40),
+    "ecc": tuple(ERROR_CORRECTION),
+    "style": tuple(MODULE_DRAWERS),
+    "engine": tuple(RENDER_ENGINES.values()),
+    "box_size": (5, 10, 20, 40),
+    "logo_ratio": (0.0, 0.1, 0.25, 0.5),
+    "description": (False, True),
+    "border_radius": (0, 40),
+}
+
+
+def parse_range(text):
+    """ "1-40" o "1,5,10" -> tupla de enteros."""
+    values = []
+    for part in text.split(","):
+        if "-" in part:
+            first, last = part.split("-")
+            values.extend(range(int(first), int(last) + 1))
+        else:
+            values.append(int(part))
+    return tuple(values)
+
+
+def payload_for_version(version, error_correction):
+    """
+    Texto en modo byte que llena la capacidad de `version` con esa
+    corrección de error (4 bits de modo más 8 o 16 de longitud).
+    """
+    length_bits = 8 if version < 10 else 16
+    capacity = (BIT_LIMIT_TABLE[error_correction][version] - 4 - length_bits) // 8
+    prefix = "https://example.com/"
+    body = "".join(chr(ord("a") + i % 26) for i in range(max(0, capacity - len(prefix))))
+    return (prefix + body)[:capacity]
+
+
+def make_logo(directory):
+    """Logo de prueba: un degradado RGBA de 512x512 en PNG."""
+    ramp = np.linspace(0, 255, 512, dtype=np.uint8)
+    pixels = np.zeros((512, 512, 4), dtype=np.uint8)
+    pixels[..., 0] = ramp[np.newaxis, :]
+    pixels[..., 2] = ramp[:, np.newaxis]
+    pixels[..., 3] = 255
+    path = os.path.join(directory, "logo.png")
+    Image.fromarray(pixels, "RGBA").save(path)
+    return path
+
+
+def build_params(config, logo_path):
+    ecc = ERROR_CORRECTION[config["ecc"]]
+    return RenderParams(
+        data=payload_for_version(config["version"], ecc),
+        description="QR-Studio benchmark" if config["description"] else "",
+        error_correction=ecc,
+        style=config["style"],
+        box_size=config["box_size"],
+        logo_path=logo_path if config["logo_ratio"] else None,
+        logo_ratio=config["logo_ratio"],
+        border_radius=config["border_radius"],
+        engine=config["engine"],
+    )
+
+
+def config_key(config):
+    return " ".join(f"{name}={config[name]}" for name in BASE)
+
+
+def configurations(axes, full):
+    if full:
+        for values in itertools.product(*axes.values()):
+            yield dict(zip(axes, values))
+        return
+    seen = set()
+    for name, values in axes.items():
+        for value in values:
+            config = dict(BASE, **{name: value})
+            key = config_key(config)
+            if key not in seen:
+                seen.add(key)
+                yield config
+
+
+def percentile(values, q):
+    """Percentil q (0..100) con interpolación lineal."""
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+def summarize(samples):
+    mean = statistics.fmean(samples)
+    return {
+        "p50_ms": percentile(samples, 50),
+        "p90_ms": percentile(samples, 90),
+        "p99_ms": percentile(samples, 99),
+        "mean_ms": mean,
+        "per_s": 1000 / mean if mean else None,
+    }
+
+
+def time_stages(params, repeat):
+    """Tiempos (ms) de cada etapa y del total en `repeat` renders."""
+    samples = {}
+    TRACER.enabled = True
+    try:
+        render_qr(params)  # calentamiento: logo decodificado, sellos, fuentes
+        for _ in range(repeat):
+            with TRACER.frame():
+                render_qr(params)
+            for name, ms in TRACER.last_frame.items():
+                samples.setdefault(name, []).append(ms)
+    finally:
+        TRACER.enabled = False
+        TRACER.clear()
+    return samples
+
+
+def memory_stages(params):
+    """
+    Pico de memoria (tracemalloc) y tamaño de la imagen resultante de cada
+    etapa, repitiendo el pipeline de render_qr() paso a paso.
+
+    La post-producción (compose_image) se mide entera como "lienzo": el
+    logo, la descripción y las esquinas se pintan sobre ese mismo lienzo.
+    """
+    memory = {}
+
+    def measure(name, func, *args):
+        tracemalloc.reset_peak()
+        before = tracemalloc.get_traced_memory()[0]
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1] - before
+        output = result.width * result.height * len(result.getbands()) \
+            if isinstance(result, Image.Image) else 0
+        memory[name] = {"peak_kb": peak / 1024, "output_kb": output / 1024}
+        return result
+
+    tracemalloc.start()
+    try:
+        qr = measure("codificar", encode_qr, params.data, params.error_correction)
+        image = measure(
+            "módulos", draw_modules, qr, params.style, params.box_size, params.border,
+            params.fill_color, params.back_color, params.engine
+        )
+        measure("lienzo", compose_image, image, params)
+    finally:
+        tracemalloc.stop()
+    return memory
+
+
+def run_config(config, logo_path, repeat):
+    params = build_params(config, logo_path)
+    samples = time_stages(params, repeat)
+    memory = memory_stages(params)
+    stages = {}
+    for name in STAGES:
+        if name in samples:
+            stages[name] = dict(summarize(samples[name]), **memory.get(name, {}))
+    return {
+        "key": config_key(config),
+        "config": config,
+        "qr_version": encode_qr(params.data, params.error_correction).version,
+        "total": summarize(samples["total"]),
+        "stages": stages,
+    }
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)), check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "commit": commit,
+        "date": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "numpy": np.__version__,
+        "pillow": PIL.__version__,
+        "qrcode": getattr(qrcode, "__version__", None),
+    }
+
+
+def compare(results, baseline_path, threshold):
+    """Imprime las diferencias de p50 y devuelve las configuraciones que empeoran."""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = {r["key"]: r for r in json.load(f)["results"]}
+    regressions = []
+    print(f"\nComparación con {baseline_path} (umbral {threshold:g} %):")
+    for result in results:
+        old = baseline.get(result["key"])
+        if old is None:
+            continue
+        before, after = old["total"]["p50_ms"], result["total"]["p50_ms"]
+        change = (after - before) / before * 100 if before else 0.0
+        mark = ""
+        if change > threshold:
+            mark = "  <-- REGRESIÓN"
+            regressions.append(result["key"])
+        print(f"  {result['key']}: {before:.1f} -> {after:.1f} ms ({change:+.1f} %){mark}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="Renders medidos por configuración")
+    parser.add_argument("--versions", type=parse_range, default=AXES["version"],
+                        help='Versiones de QR a probar, p. ej. "1-40" o "1,10,40"')
+    parser.add_argument("--box-sizes", type=parse_range, default=AXES["box_size"])
+    parser.add_argument("--engines", default=",".join(AXES["engine"]),
+                        help="Motores separados por comas (pil, numpy)")
+    parser.add_argument("--full", action="store_true",
+                        help="Todas las combinaciones en lugar de un eje cada vez")
+    parser.add_argument("--output", "-o", help="Guardar los resultados en este JSON")
+    parser.add_argument("--compare", help="JSON de una ejecución anterior para comparar")
+    parser.add_argument("--threshold", type=float, default=10.0,
+                        help="Empeoramiento máximo del p50 en %% (con --compare)")
+    args = parser.parse_args(argv)
+
+    axes = dict(AXES, version=args.versions, box_size=args.box_sizes,
+                engine=tuple(args.engines.split(",")))
+    configs = list(configurations(axes, args.full))
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        logo_path = make_logo(tmp)
+        print(f"{len(configs)} configuraciones, {args.repeat} renders cada una\n")
+        print(f"{'configuración':<92} {'ver':>3} {'p50 (ms)':>9} {'p90 (ms)':>9} {'QR/s':>7}")
+        for config in configs:
+            result = run_config(config, logo_path, args.repeat)
+            results.append(result)
+            total = result["total"]
+            print(f"{result['key']:<92} {result['qr_version']:>3} {total['p50_ms']:>9.1f}"
+                  f" {total['p90_ms']:>9.1f} {total['per_s']:>7.1f}")
+
+    # Media por etapa sobre todas las configuraciones en que aparece
+    print(f"\n{'etapa':<12} {'p50 medio (ms)':>15} {'pico medio (KB)':>16}")
+    for name in STAGES:
+        stages = [r["stages"][name] for r in results if name in r["stages"]]
+        if stages:
+            p50 = statistics.fmean(s["p50_ms"] for s in stages)
+            peak = statistics.fmean(s.get("peak_kb", 0.0) for s in stages)
+            print(f"{name:<12} {p50:>15.2f} {peak:>16.0f}")
+
+    if args.output:
+        report = {"environment": environment(), "repeat": args.repeat, "results": results}
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"\nResultados guardados en {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} configuraciones empeoran más de un {args.threshold:g} %.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,70 @@
+"""
+Compara el paso de PIL a QPixmap: viaje por PNG frente a conversión directa.
+
+Uso:
+    python benchmarks/bench_qt_handoff.py [--repeat 20]
+
+Se ejecuta sin ventana (plataforma Qt "offscreen").
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PySide6.QtGui import QGuiApplication, QPixmap
+
+from qrstudio.qt_image import pil_to_qimage, pil_to_qpixmap
+from qrstudio.render import RenderParams, render_qr
+
+BOX_SIZES = (10, 30, 60)
+
+
+def png_roundtrip(image):
+    """El camino anterior: PNG en un BytesIO y QPixmap.loadFromData."""
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG")
+    pixmap = QPixmap()
+    pixmap.loadFromData(buffer.getvalue())
+    return pixmap
+
+
+def best_time(func, image, repeat):
+    """Mejor tiempo de `repeat` ejecuciones, en milisegundos."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(image)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    # QPixmap necesita una aplicación Qt viva
+    app = QGuiApplication.instance() or QGuiApplication([])  # noqa: F841
+
+    print(f"{'box':>4} {'tamaño':>11} {'PNG (ms)':>9} {'directo (ms)':>13} {'ahorro (ms)':>12}")
+    for box_size in BOX_SIZES:
+        params = RenderParams(data="https://www.google.com/", description="QR-Studio",
+                              box_size=box_size)
+        image = render_qr(params)
+
+        # Comprobar que los dos caminos dan los mismos píxeles
+        direct = pil_to_qimage(image)
+        assert png_roundtrip(image).toImage().convertToFormat(direct.format()) == direct
+
+        png_ms = best_time(png_roundtrip, image, args.repeat)
+        direct_ms = best_time(pil_to_qpixmap, image, args.repeat)
+        size = f"{image.width}x{image.height}"
+        print(f"{box_size:>4} {size:>11} {png_ms:>9.2f} {direct_ms:>13.2f} {png_ms - direct_ms:>12.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""
+Memoria y velocidad de las hojas de etiquetas según el número de etiquetas.
+
+Uso:
+    python benchmarks/bench_sheet.py [--labels 500,5000] [-j 4] [--raster]
+
+Cada tamaño se compone en un proceso aparte para medir el pico de memoria
+residente del proceso que escribe el PDF (ru_maxrss, solo Unix): como las
+páginas se escriben a medida que llegan, debe ser casi el mismo con 500
+etiquetas que con 50.000.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def compose(labels, jobs, raster, path):
+    """Se ejecuta en el proceso hijo: compone el PDF y escribe tiempo, páginas y pico."""
+    from qrstudio.render import RenderParams
+    from qrstudio.sheet import SheetLayout, run_sheets
+
+    style = RenderParams(data="", style="Redondeado", border_radius=40,
+                         fill_mode="radial" if raster else "solid",
+                         fill_color=(0, 0, 120), fill_color2=(0, 120, 200))
+    rows = ((f"https://example.com/etiqueta/{i:06d}", f"Etiqueta {i}", None)
+            for i in range(labels))
+    start = time.perf_counter()
+    with open(path, "wb") as f:
+        for pages, _, errors in run_sheets(rows, f, style, SheetLayout(bleed=2), jobs):
+            assert not errors, errors
+    elapsed = time.perf_counter() - start
+    # ru_maxrss va en KB en Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {pages} {peak_mb:.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--labels", default="500,5000")
+    parser.add_argument("-j", "--jobs", type=int, default=None)
+    parser.add_argument("--raster", action="store_true",
+                        help="Relleno degradado (etiquetas como imagen)")
+    parser.add_argument("--child", type=int, help=argparse.SUPPRESS)
+    parser.add_argument("path", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        compose(args.child, args.jobs, args.raster, args.path)
+        return
+
+    print(f"{'etiquetas':>10} {'páginas':>8} {'tiempo (s)':>11} {'etiquetas/s':>12} "
+          f"{'PDF (MB)':>9} {'pico RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for labels in (int(n) for n in args.labels.split(",")):
+            path = os.path.join(tmp, f"{labels}.pdf")
+            command = [sys.executable, __file__, "--child", str(labels), path]
+            if args.jobs:
+                command += ["-j", str(args.jobs)]
+            if args.raster:
+                command.append("--raster")
+            output = subprocess.run(command, capture_output=True, text=True,
+                                    check=True).stdout.split()
+            elapsed, pages, peak = float(output[0]), int(output[1]), float(output[2])
+            size_mb = os.path.getsize(path) / (1024 * 1024)
+            print(f"{labels:>10} {pages:>8} {elapsed:>11.2f} {labels / elapsed:>12.0f} "
+                  f"{size_mb:>9.1f} {peak:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Tiempo de arranque de la interfaz hasta que se muestra la ventana.
+
+Uso:
+    python benchmarks/bench_startup.py [--repeat 5] [--max-ms 1500] [--offscreen]
+
+Cada arranque es un proceso nuevo lanzado con -X importtime: crea la
+QApplication y la ventana, la muestra y, en cuanto el bucle de eventos la
+atiende, anota el tiempo y qué módulos pesados estaban ya importados. Se
+informa de la mediana del tiempo hasta la ventana (desde que se lanza el
+proceso), del tiempo de importación y de los módulos que más tardan.
+
+Sale con código 1 si la mediana supera --max-ms, o si antes de la ventana
+se ha importado alguno de los módulos de --deferred (por defecto los del
+motor de render, que deben cargarse en segundo plano).
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+APP = os.path.join(ROOT, "QR_Studio_(v2.1).py")
+MARKER = "VENTANA"
+
+# Proceso hijo: abre la ventana y avisa cuando el bucle de eventos la atiende
+CHILD = f"""
+import importlib.util, sys
+sys.path.insert(0, {ROOT!r})
+from PySide6.QtCore import QTimer
+from PySide6.QtWidgets import QApplication
+spec = importlib.util.spec_from_file_location("qr_studio", {APP!r})
+app_module = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(app_module)
+app = QApplication(sys.argv)
+window = app_module.MainWindow()
+window.show()
+
+def report():
+    loaded = ",".join(sorted(name for name in sys.argv[1].split(",") if name in sys.modules))
+    print({MARKER!r}, loaded, file=sys.stderr, flush=True)
+    window.close()
+    app.quit()
+
+QTimer.singleShot(0, report)
+app.exec()
+"""
+
+
+def parse_importtime(lines):
+    """{módulo: (propio_us, acumulado_us)} de las líneas de -X importtime."""
+    modules = {}
+    for line in lines:
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules[name.strip()] = (int(self_us), int(cumulative_us), len(name) - len(name.lstrip()))
+    return modules
+
+
+def launch(deferred):
+    """Un arranque: (ms hasta la ventana, módulos importados, pesados ya cargados)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-X", "importtime", "-c", CHILD, ",".join(deferred)],
+        stderr=subprocess.PIPE, text=True, encoding="utf-8", errors="replace"
+    )
+    before = []
+    elapsed = None
+    loaded = []
+    for line in process.stderr:
+        if line.startswith(MARKER):
+            elapsed = (time.perf_counter() - start) * 1000
+            loaded = [name for name in line[len(MARKER):].strip().split(",") if name]
+            break
+        before.append(line)
+    process.stderr.read()
+    if process.wait() != 0 or elapsed is None:
+        raise RuntimeError("La aplicación no llegó a mostrar la ventana:\n" + "".join(before[-20:]))
+    return elapsed, parse_importtime(before), loaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--max-ms", type=float, default=1500,
+                        help="Objetivo: mediana máxima hasta la ventana (ms)")
+    parser.add_argument("--deferred", default="numpy,qrcode,PIL.Image,qrstudio.render",
+                        help="Módulos que no deben importarse antes de la ventana")
+    parser.add_argument("--top", type=int, default=10, help="Módulos más lentos que se listan")
+    parser.add_argument("--offscreen", action="store_true",
+                        help="Sin pantalla (QT_QPA_PLATFORM=offscreen)")
+    args = parser.parse_args(argv)
+    if args.offscreen:
+        os.environ["QT_QPA_PLATFORM"] = "offscreen"
+    deferred = [name for name in args.deferred.split(",") if name]
+
+    times = []
+    imports = []
+    for _ in range(args.repeat):
+        elapsed, modules, loaded = launch(deferred)
+        times.append(elapsed)
+        imports.append(modules)
+
+    # Tiempo de importación: suma de los módulos de primer nivel
+    totals = [sum(c for _, c, depth in m.values() if depth == 1) / 1000 for m in imports]
+    print(f"hasta la ventana: mediana {statistics.median(times):.0f} ms"
+          f"  (mín {min(times):.0f}, máx {max(times):.0f}, {args.repeat} arranques)")
+    print(f"importaciones antes de la ventana: mediana {statistics.median(totals):.0f} ms")
+
+    last = imports[-1]
+    print(f"\n{'módulo de primer nivel':<40} {'acumulado (ms)':>15}")
+    top = sorted(((c, name) for name, (_, c, depth) in last.items() if depth == 1), reverse=True)
+    for cumulative, name in top[:args.top]:
+        print(f"{name:<40} {cumulative / 1000:>15.1f}")
+
+    failed = False
+    if loaded:
+        print(f"\nImportados antes de la ventana (deberían diferirse): {', '.join(loaded)}")
+        failed = True
+    if statistics.median(times) > args.max_ms:
+        print(f"\nLa mediana supera el objetivo de {args.max_ms:g} ms.")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
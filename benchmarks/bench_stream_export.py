@@ -0,0 +1,89 @@
+"""
+Memoria y tiempo de exportar un QR grande: en memoria frente a por franjas.
+
+Uso:
+    python benchmarks/bench_stream_export.py [--box-size 100] [--formats png,tif]
+
+Cada exportación se ejecuta en un proceso aparte para medir su pico de
+memoria residente (ru_maxrss, solo Unix). Al final se comprueba que los
+píxeles de los dos ficheros son idénticos.
+"""
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, ROOT)
+
+
+def params_for(box_size):
+    from qrstudio.render import RenderParams
+    return RenderParams(
+        data="https://example.com/" + "poster" * 20, description="QR-Studio",
+        box_size=box_size, border_radius=box_size * 4, engine="numpy",
+        fill_mode="radial", fill_color=(200, 0, 60), fill_color2=(0, 60, 200),
+    )
+
+
+def export(mode, box_size, path):
+    """Se ejecuta en el proceso hijo: exporta y escribe tiempo y pico."""
+    start = time.perf_counter()
+    if mode == "memoria":
+        from qrstudio.render import render_qr
+        render_qr(params_for(box_size)).save(path)
+    else:
+        from qrstudio.stream import export_streamed
+        export_streamed(params_for(box_size), path)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss va en KB en Linux
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{elapsed:.3f} {peak_mb:.1f}")
+
+
+def run_child(mode, box_size, path):
+    output = subprocess.run(
+        [sys.executable, __file__, "--child", mode, "--box-size", str(box_size), path],
+        capture_output=True, text=True, check=True
+    ).stdout.split()
+    return float(output[0]), float(output[1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--box-size", type=int, default=100)
+    parser.add_argument("--formats", default="png,tif")
+    parser.add_argument("--child", help=argparse.SUPPRESS)
+    parser.add_argument("path", nargs="?", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        export(args.child, args.box_size, args.path)
+        return
+
+    from PIL import Image
+    Image.MAX_IMAGE_PIXELS = None
+
+    print(f"{'formato':<8} {'modo':<9} {'tiempo (s)':>11} {'pico RSS (MB)':>14}")
+    with tempfile.TemporaryDirectory() as tmp:
+        formats = args.formats.split(",")
+        for fmt in formats:
+            for mode in ("memoria", "franjas"):
+                elapsed, peak = run_child(mode, args.box_size, os.path.join(tmp, f"{mode}.{fmt}"))
+                print(f"{fmt:<8} {mode:<9} {elapsed:>11.2f} {peak:>14.0f}")
+
+        # Comparar al final: el pico de memoria del padre se hereda en los
+        # hijos lanzados después y falsearía la medida
+        for fmt in formats:
+            with Image.open(os.path.join(tmp, f"memoria.{fmt}")) as a, \
+                    Image.open(os.path.join(tmp, f"franjas.{fmt}")) as b:
+                assert a.size == b.size and a.tobytes() == b.tobytes(), f"{fmt}: píxeles distintos"
+                size = a.size
+    print(f"Imagen: {size[0]}x{size[1]} px, píxeles idénticos")
+
+
+if __name__ == "__main__":
+    main()
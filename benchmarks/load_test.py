@@ -0,0 +1,129 @@
+"""
+Prueba de carga del servidor de render (qrstudio.server).
+
+Uso:
+    python -m qrstudio.server --port 8080 &
+    python benchmarks/load_test.py [--url http://127.0.0.1:8080/render]
+        [--requests 500] [--concurrency 16] [--unique 0.2] [--etag]
+
+Lanza --requests peticiones GET con --concurrency conexiones keep-alive.
+Una fracción --unique lleva datos distintos (fuerzan un render); el resto
+repite un conjunto pequeño de códigos y sale de la caché. Con --etag el
+cliente recuerda los ETag y envía If-None-Match, así que las repeticiones
+son 304. Informa de peticiones por segundo, latencias (p50, p90, p99,
+máximo) y recuento por código de estado.
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import time
+from collections import Counter
+from urllib.parse import urlencode, urlsplit
+
+# Códigos que se repiten: los primeros renders los dejan en la caché
+HOT_SET = 8
+
+
+def percentile(values, q):
+    """Percentil q (0..100) con interpolación lineal."""
+    values = sorted(values)
+    pos = (len(values) - 1) * q / 100
+    low = int(pos)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (pos - low)
+
+
+async def read_response(reader):
+    """Lee una respuesta HTTP/1.1 con Content-Length: (estado, cabeceras)."""
+    status_line = await reader.readline()
+    if not status_line:
+        raise ConnectionError("Conexión cerrada por el servidor")
+    status = int(status_line.split()[1])
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    await reader.readexactly(int(headers.get("content-length", 0)))
+    return status, headers
+
+
+async def worker(url, queries, args, etags, latencies, statuses):
+    reader, writer = await asyncio.open_connection(url.hostname, url.port or 80)
+    try:
+        while queries:
+            query = queries.pop()
+            head = f"GET {url.path}?{query} HTTP/1.1\r\nHost: {url.netloc}\r\n"
+            if args.etag and query in etags:
+                head += f"If-None-Match: {etags[query]}\r\n"
+            start = time.perf_counter()
+            writer.write((head + "\r\n").encode("latin-1"))
+            await writer.drain()
+            status, headers = await read_response(reader)
+            latencies.append((time.perf_counter() - start) * 1000)
+            statuses[status] += 1
+            if "etag" in headers:
+                etags[query] = headers["etag"]
+    finally:
+        writer.close()
+
+
+def build_queries(args):
+    rng = random.Random(args.seed)
+    queries = []
+    for i in range(args.requests):
+        if rng.random() < args.unique:
+            data = f"https://example.com/unico/{i}"
+        else:
+            data = f"https://example.com/repetido/{rng.randrange(HOT_SET)}"
+        queries.append(urlencode({
+            "data": data, "style": args.style, "box_size": args.box_size,
+            "format": args.format,
+        }))
+    queries.reverse()  # los workers sacan del final
+    return queries
+
+
+async def run(args):
+    url = urlsplit(args.url)
+    queries = build_queries(args)
+    latencies = []
+    statuses = Counter()
+    etags = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        worker(url, queries, args, etags, latencies, statuses)
+        for _ in range(args.concurrency)
+    ))
+    elapsed = time.perf_counter() - start
+
+    print(f"{len(latencies)} peticiones en {elapsed:.2f} s: {len(latencies) / elapsed:.1f} pet/s")
+    print(f"latencia (ms): p50 {percentile(latencies, 50):.1f}  p90 {percentile(latencies, 90):.1f}"
+          f"  p99 {percentile(latencies, 99):.1f}  máx {max(latencies):.1f}"
+          f"  media {statistics.fmean(latencies):.1f}")
+    print("estados: " + ", ".join(f"{code}: {n}" for code, n in sorted(statuses.items())))
+    return 0 if all(200 <= code < 400 for code in statuses) else 1
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://127.0.0.1:8080/render")
+    parser.add_argument("--requests", "-n", type=int, default=500)
+    parser.add_argument("--concurrency", "-c", type=int, default=16)
+    parser.add_argument("--unique", type=float, default=0.2,
+                        help="Fracción de peticiones con datos nuevos (0-1)")
+    parser.add_argument("--etag", action="store_true", help="Enviar If-None-Match en las repeticiones")
+    parser.add_argument("--style", default="Cuadrado")
+    parser.add_argument("--box-size", type=int, default=10)
+    parser.add_argument("--format", default="png", choices=("png", "svg", "pdf"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
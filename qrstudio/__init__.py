@@ -0,0 +1,18 @@
+"""
+QR-Studio: motor de renderizado y herramientas de apoyo.
+
+render, batch y server no dependen de Qt; preview contiene las piezas de la
+interfaz que ejecutan el render en segundo plano.
+
+Los nombres de __all__ se importan al usarlos por primera vez: importar
+qrstudio.params o qrstudio.preview (lo que hace la interfaz al arrancar) no
+carga el motor ni NumPy.
+"""
+__all__ = ["RenderParams", "StagedRenderer", "render_qr"]
+
+
+def __getattr__(name):
+    if name in __all__:
+        from qrstudio import render
+        return getattr(render, name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,361 @@
+"""
+Generación masiva de códigos QR desde la línea de comandos.
+
+Lee un manifiesto CSV o JSONL (una fila por código, con las columnas
+"data" y, opcionalmente, "description" y "filename") y renderiza cada
+fila con el mismo estilo en un pool de procesos.
+
+El manifiesto se lee en streaming y nunca hay más de unos pocos lotes en
+vuelo, así que la memoria se mantiene plana aunque tenga millones de filas.
+
+Los ficheros se guardan como PNG, o como SVG/PDF/EPS vectorial
+(qrstudio.vector) con --output-format o si la columna "filename" lleva
+esa extensión.
+
+Los ficheros generados se guardan también en la caché de disco
+(qrstudio.diskcache), compartida con la interfaz: al relanzar un lote,
+las filas que no han cambiado se copian de la caché sin renderizar.
+
+Ejemplo:
+    python -m qrstudio.batch campaña.csv -o salida --style rounded --logo logo.png -j 16
+"""
+import argparse
+import csv
+import dataclasses
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from itertools import islice
+
+from PIL import Image
+
+from qrstudio.diskcache import DEFAULT_MAX_BYTES, DiskCache, default_cache_dir, params_key
+from qrstudio.masks import FILL_MODES
+from qrstudio.render import (
+    RenderParams, encode_qr, load_logo, render_qr, resolve_error_correction, resolve_style
+)
+from qrstudio.vector import WRITERS, VectorLayout, vector_format
+
+OUTPUT_FORMATS = ("png", "svg", "pdf", "eps")
+
+# Formatos de imagen sin canal alfa: se aplanan sobre blanco, como al
+# guardar JPG desde la interfaz
+OPAQUE_IMAGE_FORMATS = ("JPEG", "MPO", "PCX")
+
+# Estilo común y caché de disco de cada proceso trabajador (se rellenan
+# en _init_worker)
+_worker_style = None
+_worker_cache = None
+
+
+def read_manifest(path, fmt=None):
+    """
+    Itera las filas del manifiesto como tuplas (data, description, filename).
+
+    fmt es "csv" o "jsonl"; si es None se deduce de la extensión. Las filas
+    no se validan aquí (ver check_row), para que una fila mala no corte el
+    lote: una línea JSONL mal formada se devuelve como un ValueError en
+    lugar de la tupla.
+    """
+    if fmt is None:
+        fmt = "jsonl" if path.lower().endswith((".jsonl", ".ndjson")) else "csv"
+
+    with open(path, newline="", encoding="utf-8") as f:
+        if fmt == "csv":
+            for row in csv.DictReader(f):
+                yield row.get("data"), row.get("description") or "", row.get("filename") or None
+            return
+        for number, line in enumerate(f, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                yield ValueError(f"Línea {number}: JSON no válido ({e})")
+                continue
+            if not isinstance(row, dict):
+                yield ValueError(f"Línea {number}: la fila debe ser un objeto JSON")
+                continue
+            yield row.get("data"), row.get("description") or "", row.get("filename") or None
+
+
+def check_row(row):
+    """
+    Valida una fila de read_manifest y devuelve (data, description,
+    filename); lanza ValueError si no se puede renderizar.
+    """
+    if isinstance(row, Exception):
+        raise row
+    data, description, filename = row
+    if data is None or data == "":
+        raise ValueError("Fila sin columna 'data'")
+    if not isinstance(data, (str, int, float)) or not isinstance(description, (str, int, float)):
+        raise ValueError("data y description tienen que ser texto")
+    if filename is not None and not isinstance(filename, str):
+        raise ValueError("filename tiene que ser texto")
+    return str(data), str(description), filename
+
+
+def chunked(iterable, size):
+    """Agrupa iterable en listas de size elementos (la última, las que queden)."""
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _init_worker(style, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+    """
+    Inicializa el proceso: el logo se decodifica una sola vez y queda en la
+    caché de logos del proceso, que también guarda su miniatura.
+    """
+    global _worker_style, _worker_cache
+    _worker_style = style
+    _worker_cache = DiskCache(cache_dir, cache_bytes) if cache_dir else None
+    if style.logo_path:
+        load_logo(style.logo_path)
+
+
+def _image_format(path):
+    """Formato de Pillow con el que se guarda path, o None si no lo sabe escribir."""
+    image_format = Image.registered_extensions().get(os.path.splitext(path)[1].lower())
+    return image_format if image_format in Image.SAVE else None
+
+
+def _output_path(out_dir, index, filename, extension="png"):
+    """
+    Ruta del fichero de una fila. El nombre del manifiesto tiene que ser
+    relativo y no salir de out_dir, y su extensión, un formato conocido.
+    """
+    if filename is None:
+        return os.path.join(out_dir, f"qr_{index:06d}.{extension}")
+    if (os.path.isabs(filename) or os.path.splitdrive(filename)[0]
+            or ".." in re.split(r"[\\/]", filename)):
+        raise ValueError(f"filename tiene que ser una ruta dentro de la carpeta de salida: {filename}")
+    if not vector_format(filename) and _image_format(filename) is None:
+        raise ValueError(f"Formato de imagen desconocido: {filename}")
+    return os.path.join(out_dir, filename)
+
+
+def _render_bytes(params, path):
+    """Contenido del fichero path (el formato sale de la extensión)."""
+    if _worker_cache is not None:
+        qr = _worker_cache.encode_qr(params.data, params.error_correction)
+    else:
+        qr = encode_qr(params.data, params.error_correction)
+    buffer = io.BytesIO()
+    fmt = vector_format(path)
+    if fmt:
+        WRITERS[fmt](VectorLayout(params, qr), buffer)
+    else:
+        image_format = _image_format(path)
+        if image_format is None:
+            raise ValueError(f"Formato de imagen desconocido: {path}")
+        image = render_qr(params, qr=qr)
+        if image_format in OPAQUE_IMAGE_FORMATS:
+            flat = Image.new("RGB", image.size, "WHITE")
+            flat.paste(image, (0, 0), image)
+            image = flat
+        image.save(buffer, image_format)
+    return buffer.getvalue()
+
+
+def _render_file(params, path):
+    """Escribe el fichero, sacándolo de la caché de disco si ya está."""
+    key = data = None
+    if _worker_cache is not None:
+        key = params_key(params, os.path.splitext(path)[1].lower())
+        data = _worker_cache.get(key)
+    if data is None:
+        data = _render_bytes(params, path)
+        if key is not None:
+            _worker_cache.put(key, data)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _render_chunk(chunk, out_dir, extension="png"):
+    """
+    Renderiza y guarda un lote de filas; devuelve (índice, ruta, error). Si
+    la fila no es válida, la ruta es None.
+    """
+    results = []
+    for index, row in chunk:
+        path = None
+        try:
+            data, description, filename = check_row(row)
+            path = _output_path(out_dir, index, filename, extension)
+            params = dataclasses.replace(_worker_style, data=data, description=description)
+            _render_file(params, path)
+            results.append((index, path, None))
+        except Exception as e:
+            results.append((index, path, str(e)))
+    return results
+
+
+def run_batch(rows, out_dir, style, jobs=None, chunk_size=16, extension="png",
+              cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+    """
+    Renderiza todas las filas y va devolviendo (índice, ruta, error).
+
+    Con jobs=1 se renderiza en el proceso actual, sin pool. Los resultados
+    llegan en orden de finalización, no de entrada. extension es el
+    formato de los ficheros sin nombre propio en el manifiesto. Con
+    cache_dir se usa la caché de disco de esa carpeta.
+    """
+    indexed = enumerate(rows)
+    jobs = jobs or os.cpu_count() or 1
+    worker_args = (style, cache_dir, cache_bytes)
+
+    if jobs == 1:
+        _init_worker(*worker_args)
+        for chunk in chunked(indexed, chunk_size):
+            yield from _render_chunk(chunk, out_dir, extension)
+        return
+
+    # Como mucho 2 lotes por proceso en vuelo: así el manifiesto se consume
+    # al ritmo al que se renderiza y no se acumula en memoria.
+    max_pending = jobs * 2
+    with ProcessPoolExecutor(
+        max_workers=jobs, initializer=_init_worker, initargs=worker_args
+    ) as pool:
+        pending = set()
+        for chunk in chunked(indexed, chunk_size):
+            if len(pending) >= max_pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield from future.result()
+            pending.add(pool.submit(_render_chunk, chunk, out_dir, extension))
+
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m qrstudio.batch",
+        description="Genera códigos QR en lote a partir de un CSV o JSONL."
+    )
+    parser.add_argument("manifest", help="Fichero CSV o JSONL con las columnas data, description y filename")
+    parser.add_argument("-o", "--output", default="qr_output", help="Carpeta de salida")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Formato del manifiesto (por defecto, según la extensión)")
+    parser.add_argument("--output-format", choices=OUTPUT_FORMATS, default="png", help="Formato de los ficheros generados")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Número de procesos (por defecto, uno por CPU)")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Filas por tarea enviada a cada proceso")
+    parser.add_argument("--report", help="Escribe un informe JSONL con el resultado de cada fila")
+    parser.add_argument("--cache-dir", default=default_cache_dir(), help="Carpeta de la caché de disco (compartida con la interfaz)")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Tamaño máximo de la caché de disco (MB)")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni guardar en la caché de disco")
+    add_style_arguments(parser)
+    return parser
+
+
+def add_style_arguments(parser):
+    """Opciones de estilo comunes a todas las filas (ver style_from_args)."""
+    style = parser.add_argument_group("estilo (común a todas las filas)")
+    style.add_argument("--style", default="Cuadrado", help="Cuadrado/Redondeado/Círculo (o square/rounded/circle)")
+    style.add_argument("--engine", choices=("pil", "numpy"), default="pil", help="Motor de dibujo de módulos")
+    style.add_argument("--error-correction", default="H", help="L, M, Q o H")
+    style.add_argument("--box-size", type=int, default=10, help="Tamaño de módulo (px)")
+    style.add_argument("--border", type=int, default=4, help="Tamaño del borde (módulos)")
+    style.add_argument("--fill-color", default="#000000", help="Color de los módulos")
+    style.add_argument("--back-color", default="#ffffff", help="Color de fondo")
+    style.add_argument("--fill", choices=tuple(FILL_MODES.values()), default="solid", help="Relleno de los módulos")
+    style.add_argument("--fill-color2", default="#0000ff", help="Color final de los degradados")
+    style.add_argument("--fill-image", help="Imagen de relleno (con --fill image)")
+    style.add_argument("--logo", help="Imagen a incrustar en el centro")
+    style.add_argument("--logo-size", type=int, default=25, help="Tamaño del logo (%% de la altura, 10-50)")
+    style.add_argument("--border-radius", type=int, default=0, help="Radio de borde (px)")
+
+
+def parse_color(value):
+    """Convierte '#rrggbb' en una tupla RGB."""
+    value = value.lstrip("#")
+    if len(value) != 6:
+        raise argparse.ArgumentTypeError(f"Color no válido: #{value}")
+    return tuple(int(value[i:i + 2], 16) for i in (0, 2, 4))
+
+
+def style_from_args(args):
+    """Construye la plantilla RenderParams común a partir de los argumentos."""
+    return RenderParams(
+        data="",
+        error_correction=resolve_error_correction(args.error_correction),
+        style=resolve_style(args.style),
+        box_size=args.box_size,
+        border=args.border,
+        fill_color=parse_color(args.fill_color),
+        back_color=parse_color(args.back_color),
+        logo_path=args.logo,
+        logo_ratio=args.logo_size / 100.0,
+        border_radius=args.border_radius,
+        engine=args.engine,
+        fill_mode=args.fill,
+        fill_color2=parse_color(args.fill_color2),
+        fill_image_path=args.fill_image,
+    )
+
+
+def check_style(style):
+    """
+    Valida el logo y la imagen de relleno antes de lanzar el pool: un
+    fallo en los procesos lo rompería.
+    """
+    if style.logo_path:
+        load_logo(style.logo_path)
+    if style.fill_mode == "image":
+        if not style.fill_image_path:
+            raise ValueError("--fill image necesita --fill-image")
+        load_logo(style.fill_image_path)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        style = style_from_args(args)
+        check_style(style)
+    except (OSError, ValueError, argparse.ArgumentTypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    if cache_dir:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Aviso: sin caché de disco ({e})", file=sys.stderr)
+            cache_dir = None
+
+    os.makedirs(args.output, exist_ok=True)
+    report = open(args.report, "w", encoding="utf-8") if args.report else None
+
+    start = time.perf_counter()
+    done = failed = 0
+    try:
+        rows = read_manifest(args.manifest, args.format)
+        for index, path, error in run_batch(rows, args.output, style, args.jobs,
+                                            args.chunk_size, args.output_format,
+                                            cache_dir, args.cache_mb * 1024 * 1024):
+            done += 1
+            if error:
+                failed += 1
+                print(f"Fila {index}: {error}", file=sys.stderr)
+            if report:
+                report.write(json.dumps({"index": index, "path": path, "error": error}) + "\n")
+    finally:
+        if report:
+            report.close()
+
+    elapsed = time.perf_counter() - start
+    rate = done / elapsed if elapsed > 0 else 0.0
+    print(f"{done - failed}/{done} códigos generados en {elapsed:.1f} s ({rate:.0f} QR/s).")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
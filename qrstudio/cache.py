@@ -0,0 +1,77 @@
+"""
+Cachés en memoria con expulsión LRU y límite de memoria.
+"""
+import threading
+from collections import OrderedDict
+
+
+def image_nbytes(image):
+    """Memoria aproximada que ocupa una imagen PIL."""
+    return image.width * image.height * len(image.getbands())
+
+
+class LRUCache:
+    """
+    Caché LRU limitada por memoria (en bytes) y segura entre hilos.
+
+    sizeof(valor) estima lo que ocupa cada entrada; al superar max_bytes se
+    expulsan las entradas menos usadas. Una entrada más grande que todo el
+    presupuesto no se guarda. Cuenta aciertos, fallos y expulsiones.
+    """
+
+    def __init__(self, max_bytes, sizeof):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # clave -> (valor, bytes)
+        self._nbytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self._nbytes -= old[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._nbytes += size
+            while self._nbytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._nbytes -= evicted
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._nbytes = 0
+
+    @property
+    def nbytes(self):
+        return self._nbytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Contadores de la caché como diccionario."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries),
+            "bytes": self._nbytes,
+        }
@@ -0,0 +1,315 @@
+"""
+Caché persistente en disco, direccionada por contenido.
+
+Guarda las matrices codificadas y las salidas ya renderizadas entre
+ejecuciones: al volver a abrir la aplicación con el mismo diseño, o al
+relanzar un lote en el que solo cambia una fila, lo que no ha cambiado
+se lee del disco en lugar de renderizarse.
+
+* La clave es un hash SHA-256 de todos los parámetros de render (los de
+  RenderParams) y del contenido del logo, de la imagen de relleno y de la
+  fuente de la descripción: mover o tocar el fichero no invalida nada,
+  cambiar su contenido sí.
+* Cada entrada es un fichero <dir>/<ab>/<hash>. Se escribe en un temporal
+  y se renombra (os.replace), así que ningún lector ve un fichero a medias,
+  aunque escriban varios procesos a la vez (la interfaz y un lote, o los
+  procesos de un mismo lote).
+* El tamaño total está limitado: al superarlo se borran las entradas menos
+  usadas. Cada acierto actualiza la fecha de modificación del fichero, que
+  hace de marca de uso compartida entre procesos.
+
+Los fallos de disco (sin espacio, carpeta de solo lectura...) nunca rompen
+un render: la entrada simplemente no se guarda.
+"""
+import dataclasses
+import hashlib
+import io
+import json
+import os
+import struct
+import tempfile
+import threading
+import time
+
+import numpy as np
+import qrcode
+from PIL import Image
+
+from qrstudio.cache import LRUCache, image_nbytes
+from qrstudio.logo import file_key
+from qrstudio.render import encode_qr
+from qrstudio.text import font_path
+
+# Cambiarlo invalida todas las entradas (p. ej. si cambia el pipeline)
+CACHE_VERSION = 2
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+# Al recortar se deja la caché en este porcentaje del límite
+TRIM_TARGET = 0.9
+# Escrituras entre recuentos completos del tamaño (lo que escriben otros
+# procesos no se ve hasta el siguiente recuento)
+RESCAN_INTERVAL = 256
+# Temporales más antiguos que esto son de procesos que murieron (s)
+STALE_TEMP_AGE = 3600
+
+_HEADER = struct.Struct("<BBH")  # versión, corrección de error, lado
+
+# Hash del contenido de cada fichero, por versión del fichero
+_file_hashes = LRUCache(4096, lambda digest: 1)
+
+
+def default_cache_dir():
+    """
+    Carpeta de la caché: QRSTUDIO_CACHE_DIR o la carpeta de cachés del
+    usuario (%LOCALAPPDATA% en Windows, $XDG_CACHE_HOME o ~/.cache).
+    """
+    path = os.environ.get("QRSTUDIO_CACHE_DIR")
+    if path:
+        return path
+    if os.name == "nt":
+        base = os.environ.get("LOCALAPPDATA") or os.path.expanduser("~")
+        return os.path.join(base, "QR-Studio", "cache")
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, "qrstudio")
+
+
+def file_hash(path):
+    """SHA-256 del contenido de un fichero (se recalcula solo si cambia)."""
+    version = file_key(path)
+    digest = _file_hashes.get(version)
+    if digest is None:
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha.update(block)
+        digest = sha.hexdigest()
+        _file_hashes.put(version, digest)
+    return digest
+
+
+def params_key(params, kind):
+    """
+    Clave de una salida: hash de los parámetros canónicos, del tipo de
+    salida (kind: "png", "svg"...) y del contenido de los ficheros que usa
+    (con descripción, también la fuente: QRSTUDIO_FONT u otra instalada).
+    """
+    canonical = dataclasses.asdict(params)
+    for field in ("logo_path", "fill_image_path"):
+        if canonical[field]:
+            canonical[field] = file_hash(canonical[field])
+    if params.description:
+        path = font_path()
+        canonical["font"] = file_hash(path) if path else None
+    canonical["kind"] = kind
+    canonical["cache_version"] = CACHE_VERSION
+    text = json.dumps(canonical, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def matrix_key(data, error_correction):
+    text = json.dumps(["matrix", CACHE_VERSION, data, error_correction], ensure_ascii=False)
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def pack_matrix(qr):
+    """Matriz de módulos a bytes: cabecera y un bit por módulo."""
+    modules = np.array(qr.modules, dtype=bool)
+    return _HEADER.pack(qr.version, qr.error_correction, qr.modules_count) \
+        + np.packbits(modules).tobytes()
+
+
+def unpack_matrix(blob):
+    """Reconstruye el QRCode guardado con pack_matrix()."""
+    version, error_correction, count = _HEADER.unpack_from(blob)
+    bits = np.unpackbits(np.frombuffer(blob, dtype=np.uint8, offset=_HEADER.size),
+                         count=count * count)
+    qr = qrcode.QRCode(version=version, error_correction=error_correction)
+    qr.modules_count = count
+    qr.modules = bits.reshape(count, count).astype(bool).tolist()
+    # make_image() solo mira si ya está codificado; los datos no hacen falta
+    qr.data_cache = []
+    return qr
+
+
+def encode_image(image):
+    """Imagen PIL a PNG (compresión rápida: prima el tiempo sobre el tamaño)."""
+    buffer = io.BytesIO()
+    image.save(buffer, "PNG", compress_level=1)
+    return buffer.getvalue()
+
+
+def decode_image(blob):
+    image = Image.open(io.BytesIO(blob))
+    image.load()
+    return image
+
+
+class DiskCache:
+    """
+    Almacén de bytes en disco con límite de tamaño y expulsión LRU,
+    seguro entre hilos y entre procesos.
+
+    get(clave) devuelve los bytes o None; put(clave, bytes) los guarda.
+    Las claves son hashes hexadecimales (params_key, matrix_key).
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory or default_cache_dir()
+        self.max_bytes = max_bytes
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._nbytes = None  # estimación; None hasta el primer recuento
+        self._writes = 0
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key[:2], key)
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            # No existe, o la ha borrado otro proceso al recortar
+            with self._lock:
+                self.misses += 1
+            return None
+        try:
+            os.utime(path)  # marca de uso para la expulsión LRU
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, key, data):
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, temp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    f.write(data)
+                os.replace(temp, path)
+            except BaseException:
+                os.remove(temp)
+                raise
+        except OSError:
+            # Disco lleno, sin permisos, o (en Windows) otro proceso está
+            # leyendo la misma entrada: el contenido es el mismo, no pasa nada
+            return
+
+        with self._lock:
+            self._writes += 1
+            if self._nbytes is not None:
+                self._nbytes += len(data)
+            rescan = (self._nbytes is None or self._nbytes > self.max_bytes
+                      or self._writes % RESCAN_INTERVAL == 0)
+        if rescan:
+            self.trim()
+
+    def _entries(self):
+        """(mtime, tamaño, ruta) de cada entrada; borra temporales huérfanos."""
+        entries = []
+        try:
+            folders = [e.path for e in os.scandir(self.directory) if e.is_dir()]
+        except OSError:
+            return entries
+        for folder in folders:
+            try:
+                files = list(os.scandir(folder))
+            except OSError:
+                continue
+            for entry in files:
+                try:
+                    stat = entry.stat()
+                    if entry.name.endswith(".tmp"):
+                        if stat.st_mtime < time.time() - STALE_TEMP_AGE:
+                            os.remove(entry.path)
+                        continue
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        return entries
+
+    def trim(self):
+        """Recuenta el tamaño y borra las entradas menos usadas si sobra."""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        if total > self.max_bytes:
+            entries.sort()
+            target = self.max_bytes * TRIM_TARGET
+            for _, size, path in entries:
+                if total <= target:
+                    break
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass  # ya la ha borrado otro proceso
+                except OSError:
+                    continue  # abierta en otro proceso (Windows)
+                total -= size
+                evicted += 1
+        with self._lock:
+            self._nbytes = total
+            self.evictions += evicted
+
+    def clear(self):
+        for _, _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+        with self._lock:
+            self._nbytes = 0
+
+    # --- Matrices e imágenes ---
+
+    def encode_qr(self, data, error_correction, encode=encode_qr):
+        """
+        Como render.encode_qr(), leyendo y guardando la matriz en disco.
+        encode es la función que codifica si no está.
+        """
+        key = matrix_key(data, error_correction)
+        blob = self.get(key)
+        if blob is not None:
+            return unpack_matrix(blob)
+        qr = encode(data, error_correction)
+        self.put(key, pack_matrix(qr))
+        return qr
+
+    def get_output(self, params):
+        """Imagen final de render_qr(params) guardada, o None."""
+        try:
+            key = params_key(params, "png")
+        except OSError:
+            return None  # el logo o el relleno no se pueden leer: que falle el render
+        blob = self.get(key)
+        return None if blob is None else decode_image(blob)
+
+    def put_output(self, params, image):
+        if image_nbytes(image) > self.max_bytes:
+            return
+        try:
+            key = params_key(params, "png")
+        except OSError:
+            return
+        self.put(key, encode_image(image))
+
+    @property
+    def nbytes(self):
+        return self._nbytes or 0
+
+    def stats(self):
+        """Contadores de la caché como diccionario (como LRUCache.stats())."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "bytes": self.nbytes,
+        }
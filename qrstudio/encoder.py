@@ -0,0 +1,205 @@
+"""
+Selección de versión y segmentación rápidas para codificar QR.
+
+QRCode.make(fit=True) trocea los datos en segmentos (numérico,
+alfanumérico, byte) y busca la versión mínima escribiendo los segmentos
+bit a bit en un buffer, una o varias veces. Aquí:
+
+* La versión sale de las tablas de capacidad de qrcode: los bits que
+  ocupa cada segmento se calculan con aritmética (modo y longitud), sin
+  escribir nada, para cada uno de los tres rangos de versión en que cambia
+  el tamaño del campo de longitud.
+* QREncoder recuerda la segmentación y la versión de la última llamada.
+  Al escribir, el texto nuevo comparte casi todo con el anterior: solo se
+  vuelven a trocear las piezas a partir del primer cambio, y la versión
+  anterior se comprueba primero.
+
+La segmentación es la misma que la de QRCode.add_data() (optimize=20) y
+la versión la misma que la de best_fit(): la matriz resultante es idéntica
+a la de qrcode.
+"""
+import re
+import threading
+from bisect import bisect_left
+
+import qrcode
+from qrcode import exceptions, util
+from qrcode.util import MODE_8BIT_BYTE, MODE_ALPHA_NUM, MODE_NUMBER, QRData
+
+from qrstudio.params import ERROR_CORRECTION_LETTERS
+
+# Longitud mínima de un tramo numérico/alfanumérico (la de QRCode.add_data)
+OPTIMIZE = 20
+
+_NUMBER_RUN = re.compile(rb"\d{%d,}" % OPTIMIZE)
+_ALPHA_RUN = re.compile(b"[" + re.escape(util.ALPHA_NUM) + b"]{%d,}" % OPTIMIZE)
+
+# Rangos de versiones con el mismo tamaño de campo de longitud
+VERSION_RANGES = ((1, 9), (10, 26), (27, 40))
+
+
+def segment_bits(mode, length, version):
+    """Bits que ocupa un segmento: modo, longitud y datos."""
+    if mode == MODE_NUMBER:
+        data = 10 * (length // 3) + (0, 4, 7)[length % 3]
+    elif mode == MODE_ALPHA_NUM:
+        data = 11 * (length // 2) + 6 * (length % 2)
+    else:
+        data = 8 * length
+    return 4 + util.length_in_bits(mode, version) + data
+
+
+def data_bits(segments, version):
+    return sum(segment_bits(s.mode, len(s), version) for s in segments)
+
+
+def fits(segments, error_correction, version):
+    return data_bits(segments, version) <= util.BIT_LIMIT_TABLE[error_correction][version]
+
+
+class DataOverflowError(exceptions.DataOverflowError, ValueError):
+    """
+    Los datos no caben en ninguna versión. Es también un ValueError, que
+    es lo que lanzaba qrcode (versión 41 no válida) en ese caso: lo
+    capturan tanto los except ValueError como los de DataOverflowError.
+    """
+
+
+def fit_version(segments, error_correction, hint=None):
+    """
+    Versión mínima en la que caben los segmentos, como QRCode.best_fit().
+
+    hint es una versión candidata (la de la edición anterior): si es la
+    mínima se devuelve sin más cálculo.
+    """
+    if hint and fits(segments, error_correction, hint) \
+            and (hint == 1 or not fits(segments, error_correction, hint - 1)):
+        return hint
+    limits = util.BIT_LIMIT_TABLE[error_correction]
+    for first, last in VERSION_RANGES:
+        version = bisect_left(limits, data_bits(segments, first), first, last + 1)
+        if version <= last:
+            return version
+    letter = next((name for name, value in ERROR_CORRECTION_LETTERS.items()
+                   if value == error_correction), error_correction)
+    raise DataOverflowError(
+        f"Los datos no caben en un QR (versión 40, corrección {letter})"
+    )
+
+
+def _number_pieces(data, pos):
+    """
+    Piezas (es_numérica, inicio, fin) de data a partir de pos: tramos de
+    OPTIMIZE o más dígitos y lo que queda entre ellos.
+    """
+    pieces = []
+    while pos < len(data):
+        match = _NUMBER_RUN.search(data, pos)
+        if not match:
+            pieces.append((False, pos, len(data)))
+            break
+        if match.start() > pos:
+            pieces.append((False, pos, match.start()))
+        pieces.append((True, match.start(), match.end()))
+        pos = match.end()
+    return pieces
+
+
+def _piece_segments(data, is_number, start, end):
+    """Segmentos de una pieza, como los genera util.optimal_data_chunks()."""
+    chunk = data[start:end]
+    if is_number:
+        return [QRData(chunk, mode=MODE_NUMBER, check_data=False)]
+    segments = []
+    pos = 0
+    while pos < len(chunk):
+        match = _ALPHA_RUN.search(chunk, pos)
+        if not match:
+            break
+        if match.start() > pos:
+            segments.append(QRData(chunk[pos:match.start()], mode=MODE_8BIT_BYTE, check_data=False))
+        segments.append(QRData(chunk[match.start():match.end()], mode=MODE_ALPHA_NUM, check_data=False))
+        pos = match.end()
+    if pos < len(chunk):
+        segments.append(QRData(chunk[pos:], mode=MODE_8BIT_BYTE, check_data=False))
+    return segments
+
+
+def _common_prefix(a, b):
+    n = min(len(a), len(b))
+    i = 0
+    # Comparar por bloques y afinar en el último
+    step = 64
+    while i + step <= n and a[i:i + step] == b[i:i + step]:
+        i += step
+    while i < n and a[i] == b[i]:
+        i += 1
+    return i
+
+
+def build_qr(segments, version, error_correction):
+    """QRCode ya construido (make) con esos segmentos y versión."""
+    qr = qrcode.QRCode(version=version, error_correction=error_correction)
+    for segment in segments:
+        qr.add_data(segment)
+    qr.make(fit=False)
+    return qr
+
+
+class QREncoder:
+    """
+    Codificador con memoria entre llamadas, pensado para la vista previa:
+    cada pulsación solo trocea lo que ha cambiado y prueba primero la
+    versión anterior. Seguro entre hilos.
+    """
+
+    def __init__(self):
+        self._data = b""
+        self._pieces = []  # (es_numérica, inicio, fin, segmentos)
+        self._versions = {}  # corrección de error -> última versión
+        self._lock = threading.Lock()
+
+    def segments(self, data):
+        """Segmentos de data, reutilizando las piezas de la llamada anterior."""
+        data = util.to_bytestring(data)
+        with self._lock:
+            if len(data) <= OPTIMIZE:
+                # Con pocos datos qrcode usa otros patrones (todo o nada)
+                self._data = data
+                self._pieces = []
+                return list(util.optimal_data_chunks(data, minimum=OPTIMIZE))
+
+            # Se conservan las piezas hasta el último tramo numérico que
+            # termina antes del primer cambio; el texto que lo sigue puede
+            # partirse distinto (un tramo numérico nuevo depende de los
+            # dígitos que vienen detrás), así que se vuelve a trocear
+            prefix = _common_prefix(self._data, data)
+            keep = 0
+            for i, (is_number, _, end, _) in enumerate(self._pieces):
+                if end >= prefix:
+                    break
+                if is_number:
+                    keep = i + 1
+            pieces = self._pieces[:keep]
+            pos = pieces[-1][2] if pieces else 0
+            for is_number, start, end in _number_pieces(data, pos):
+                pieces.append((is_number, start, end,
+                               _piece_segments(data, is_number, start, end)))
+
+            self._data = data
+            self._pieces = pieces
+            return [segment for piece in pieces for segment in piece[3]]
+
+    def encode(self, data, error_correction):
+        """Como render.encode_qr(): un QRCode ya construido."""
+        segments = self.segments(data)
+        hint = self._versions.get(error_correction)
+        version = fit_version(segments, error_correction, hint)
+        self._versions[error_correction] = version
+        return build_qr(segments, version, error_correction)
+
+
+def encode(data, error_correction):
+    """Codificación sin memoria: segmentación de qrcode y versión por tablas."""
+    segments = list(util.optimal_data_chunks(util.to_bytestring(data), minimum=OPTIMIZE))
+    return build_qr(segments, fit_version(segments, error_correction), error_correction)
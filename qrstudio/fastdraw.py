@@ -0,0 +1,207 @@
+"""
+Motor de dibujo vectorizado con NumPy.
+
+StyledPilImage dibuja los módulos de uno en uno desde Python, y
+SolidFillColorMask recorre después todos los píxeles para colorearlos.
+Aquí cada forma de módulo se rasteriza una sola vez como "sello"
+(box_size x box_size) y la imagen completa se monta indexando el array de
+sellos con la matriz del QR:
+
+* Cuadrado / Círculo: un sello por forma.
+* Redondeado: 16 sellos, uno por combinación de vecinos N/E/S/O activos,
+  igual que RoundedModuleDrawer.
+* Los ojos (patrones de posición) usan siempre el sello cuadrado, como el
+  eye_drawer por defecto de StyledPilImage.
+
+Los sellos se dibujan con los propios drawers de qrcode y el color sólido
+se aplica con la misma aritmética que SolidFillColorMask (qrstudio.masks),
+pero sobre los sellos en lugar de sobre cada píxel. El resultado es
+idéntico píxel a píxel al de draw_modules() con el motor PIL (solo colores
+RGB, sin alfa).
+
+Los índices de sello solo dependen de la geometría y los sellos hacen de
+paleta: StampLayer guarda los índices y, al cambiar de color, solo vuelve
+a colorear los sellos antes de montar la imagen.
+"""
+import numpy as np
+from PIL import ImageDraw
+
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.colormasks import SolidFillColorMask
+from qrcode.image.styles.moduledrawers import SquareModuleDrawer
+from qrcode.main import ActiveWithNeighbors
+
+from qrstudio.cache import LRUCache
+from qrstudio.masks import solid_colorize
+
+# Índices en el array de sellos
+STAMP_EMPTY = 0
+STAMP_SQUARE = 1
+STAMP_SHAPES = 2  # primer sello de la forma del estilo
+
+
+def _draw_stamps(drawer, box_size, back_color):
+    """
+    Rasteriza los sellos con los drawers de qrcode, sin colorear.
+
+    Devuelve un array uint8 (K, box_size, box_size, 3): vacío, cuadrado y
+    las variantes de la forma del estilo (1 o 16 según necesite vecinos).
+    """
+    # Un StyledPilImage de un solo módulo para que los drawers se
+    # inicialicen exactamente igual que al dibujar el QR completo
+    img = StyledPilImage(
+        0, 1, box_size, qrcode_modules=[[True]], module_drawer=drawer,
+        color_mask=SolidFillColorMask(back_color=back_color)
+    )
+    canvas = img._img
+    clear = ImageDraw.Draw(canvas)
+    box = ((0, 0), (box_size - 1, box_size - 1))
+
+    def stamp(draw, is_active):
+        clear.rectangle((0, 0, box_size - 1, box_size - 1), fill=back_color)
+        draw.drawrect(box, is_active)
+        return np.asarray(canvas)
+
+    square = SquareModuleDrawer()
+    square.initialize(img=img)
+
+    stamps = [stamp(square, False), stamp(square, True)]
+    if drawer.needs_neighbors:
+        # Bits: N=8, E=4, S=2, W=1
+        for bits in range(16):
+            n, e, s, w = (bool(bits & b) for b in (8, 4, 2, 1))
+            stamps.append(stamp(drawer, ActiveWithNeighbors(
+                False, n, False, w, True, e, False, s, False
+            )))
+    else:
+        stamps.append(stamp(drawer, True))
+    return np.stack(stamps)
+
+
+def module_stamp_indices(modules, needs_neighbors):
+    """
+    Índice de sello para cada módulo de la matriz (array int n x n).
+    """
+    active = np.asarray(modules, dtype=bool)
+    n = active.shape[0]
+
+    if needs_neighbors:
+        padded = np.pad(active, 1)
+        north = padded[:-2, 1:-1]
+        east = padded[1:-1, 2:]
+        south = padded[2:, 1:-1]
+        west = padded[1:-1, :-2]
+        bits = north * 8 + east * 4 + south * 2 + west * 1
+        indices = np.where(active, STAMP_SHAPES + bits, STAMP_EMPTY)
+    else:
+        indices = np.where(active, STAMP_SHAPES, STAMP_EMPTY)
+
+    # Ojos: siempre cuadrados (mismo criterio que BaseImage.is_eye)
+    eye = np.zeros((n, n), dtype=bool)
+    eye[:7, :7] = eye[:7, n - 7:] = eye[n - 7:, :7] = True
+    indices[eye] = np.where(active[eye], STAMP_SQUARE, STAMP_EMPTY)
+    return indices
+
+
+def packed_stamps(drawer, box_size, fill_color, back_color):
+    """
+    Sellos coloreados como píxeles RGBA empaquetados en uint32, array
+    (K, box_size, box_size). Con fill_color=None quedan en negro.
+    """
+    stamps = _draw_stamps(drawer, box_size, back_color)
+    if fill_color is not None:
+        stamps = solid_colorize(stamps, back_color, fill_color)
+
+    # Trabajar con píxeles RGBA empaquetados en uint32: rellenar y copiar
+    # un entero por píxel es mucho más rápido que canal a canal
+    rgba = np.empty(stamps.shape[:3] + (4,), dtype=np.uint8)
+    rgba[..., :3] = stamps
+    rgba[..., 3] = 255
+    return rgba.view(np.uint32)[..., 0]
+
+
+def draw_module_rows(indices, stamps32, box_size, border, back32, y0, y1):
+    """
+    Filas y0..y1 del lienzo de módulos (uint32, (y1 - y0) x lado), sin
+    montar el lienzo entero. indices es el de module_stamp_indices().
+    """
+    n = indices.shape[0]
+    size = (n + 2 * border) * box_size
+    offset = border * box_size
+    rows = np.full((y1 - y0, size), back32, dtype=np.uint32)
+
+    y = np.arange(y0, y1) - offset
+    inside = (y >= 0) & (y < n * box_size)
+    if inside.any():
+        y = y[inside]
+        # (filas, n, box) -> (filas, n*box)
+        tiles = stamps32[indices[y // box_size], (y % box_size)[:, np.newaxis]]
+        rows[inside, offset:offset + n * box_size] = tiles.reshape(len(y), -1)
+    return rows
+
+
+def _assemble(indices, stamps32, box_size, border, back32):
+    """Lienzo RGBA (h x w x 4) con los sellos colocados según indices."""
+    n = indices.shape[0]
+    size = (n + 2 * border) * box_size
+    offset = border * box_size
+    inner = n * box_size
+
+    canvas = np.full((size, size), back32, dtype=np.uint32)
+    # (n, n, box, box) -> (n*box, n*box)
+    tiles = stamps32[indices].transpose(0, 2, 1, 3).reshape(inner, inner)
+    canvas[offset:offset + inner, offset:offset + inner] = tiles
+
+    return canvas.view(np.uint8).reshape(size, size, 4)
+
+
+def draw_modules_numpy(modules, drawer, box_size, border, fill_color, back_color):
+    """
+    Dibuja la matriz de módulos y devuelve un array RGBA (h x w x 4).
+
+    Equivale a draw_modules() del motor PIL con el mismo drawer. Con
+    fill_color=None los módulos quedan en negro sin colorear, listos para
+    aplicarles una máscara de qrstudio.masks.
+    """
+    stamps32 = packed_stamps(drawer, box_size, fill_color, back_color)
+    back32 = np.array([(*back_color, 255)], dtype=np.uint8).view(np.uint32)[0]
+    indices = module_stamp_indices(modules, drawer.needs_neighbors)
+    return _assemble(indices, stamps32, box_size, border, back32)
+
+
+class StampLayer:
+    """
+    Módulos de un QR independientes del color, para el motor NumPy.
+
+    Guarda el índice de sello de cada módulo; colorize() colorea los sellos
+    (la paleta, unos pocos box_size x box_size píxeles, que se guardan por
+    colores) y monta el lienzo. El resultado es el de draw_modules_numpy().
+    """
+
+    def __init__(self, modules, drawer_factory, box_size, border):
+        self.drawer_factory = drawer_factory
+        self.box_size = box_size
+        self.border = border
+        self.indices = module_stamp_indices(modules, drawer_factory().needs_neighbors)
+        self._palettes = LRUCache(16 * 1024 * 1024, lambda stamps: stamps.nbytes)
+
+    @property
+    def nbytes(self):
+        return self.indices.nbytes
+
+    def stamps(self, fill_color, back_color):
+        key = (fill_color, back_color)
+        stamps32 = self._palettes.get(key)
+        if stamps32 is None:
+            stamps32 = packed_stamps(self.drawer_factory(), self.box_size, fill_color, back_color)
+            self._palettes.put(key, stamps32)
+        return stamps32
+
+    def colorize(self, fill_color, back_color):
+        """
+        Array RGBA (h x w x 4) nuevo con esos colores. Con fill_color=None
+        los módulos quedan en negro, como en draw_modules_numpy().
+        """
+        back32 = np.array([(*back_color, 255)], dtype=np.uint8).view(np.uint32)[0]
+        return _assemble(self.indices, self.stamps(fill_color, back_color),
+                         self.box_size, self.border, back32)
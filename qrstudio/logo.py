@@ -0,0 +1,110 @@
+"""
+Caché de logos decodificados y de sus miniaturas.
+
+Decodificar un PNG de 4000x4000 y reescalarlo con LANCZOS es lo más caro
+de cada frame mientras se arrastra el slider del logo. LogoCache guarda:
+
+* El logo decodificado (RGBA), por ruta + mtime + tamaño del fichero, así
+  que si el fichero cambia en disco se vuelve a leer.
+* Las miniaturas ya reescaladas, por fichero y tamaño en píxeles.
+
+Las dos cachés son LRU con límite de memoria. Cuando el formato lo permite
+(JPEG), las miniaturas se decodifican siempre en modo borrador a tamaño
+reducido, sin leer la imagen completa: el resultado depende solo del
+fichero y del tamaño, nunca de lo que ya haya en caché.
+"""
+import os
+
+from PIL import Image
+
+from qrstudio.cache import LRUCache, image_nbytes
+
+DEFAULT_DECODED_BUDGET = 128 * 1024 * 1024
+DEFAULT_THUMBNAIL_BUDGET = 32 * 1024 * 1024
+
+
+def file_key(path):
+    """Identifica una versión concreta del fichero: (ruta, mtime, tamaño)."""
+    stat = os.stat(path)
+    return (os.path.abspath(path), stat.st_mtime_ns, stat.st_size)
+
+
+def decode_logo(path):
+    """Abre y decodifica el logo completo en RGBA."""
+    with Image.open(path) as logo:
+        return logo.convert("RGBA")
+
+
+def _draft_thumbnail(path, max_size):
+    """
+    Miniatura decodificando a tamaño reducido, o None si el formato no
+    admite modo borrador (entonces hay que decodificar la imagen entera).
+    """
+    with Image.open(path) as logo:
+        # draft() elige una escala de decodificación >= al tamaño pedido
+        if not logo.draft("RGB", (max_size, max_size)):
+            return None
+        thumb = logo.convert("RGBA")
+    thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    return thumb
+
+
+class LogoCache:
+    """Logos decodificados y miniaturas, con invalidación por mtime/tamaño."""
+
+    def __init__(self, decoded_budget=DEFAULT_DECODED_BUDGET,
+                 thumbnail_budget=DEFAULT_THUMBNAIL_BUDGET):
+        self.decoded = LRUCache(decoded_budget, image_nbytes)
+        self.thumbnails = LRUCache(thumbnail_budget, image_nbytes)
+
+    def load(self, path):
+        """Devuelve el logo decodificado (compartido: no modificar)."""
+        key = file_key(path)
+        logo = self.decoded.get(key)
+        if logo is None:
+            logo = decode_logo(path)
+            self.decoded.put(key, logo)
+        return logo
+
+    def thumbnail(self, path, max_size):
+        """
+        Devuelve el logo reducido para caber en max_size x max_size.
+
+        Equivale a logo.thumbnail((max_size, max_size), LANCZOS) sobre el
+        logo decodificado, salvo en los JPEG, que se decodifican en modo
+        borrador (escala DCT) antes del LANCZOS: difieren de eso en menos de
+        un nivel por canal de media (hasta ~10 de 255 en algún píxel de una
+        foto), pero siempre igual, esté o no el logo
+        completo en caché (la caché de disco y los ETag del servidor
+        dependen de ello). La imagen se comparte: no modificar.
+        """
+        key = file_key(path)
+        thumb_key = key + (max_size,)
+        thumb = self.thumbnails.get(thumb_key)
+        if thumb is not None:
+            return thumb
+
+        # El camino depende solo del fichero: borrador si el formato lo
+        # admite, aunque el logo completo ya esté decodificado en caché
+        thumb = _draft_thumbnail(path, max_size)
+        if thumb is None:
+            logo = self.load(path)
+            thumb = logo.copy()
+            thumb.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+
+        self.thumbnails.put(thumb_key, thumb)
+        return thumb
+
+    def clear(self):
+        self.decoded.clear()
+        self.thumbnails.clear()
+
+    def stats(self):
+        return {
+            "decoded": self.decoded.stats(),
+            "thumbnails": self.thumbnails.stats(),
+        }
+
+
+# Caché compartida por el proceso (GUI, servidor o cada trabajador del lote)
+LOGO_CACHE = LogoCache()
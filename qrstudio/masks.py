@@ -0,0 +1,282 @@
+"""
+Máscaras de color vectorizadas con NumPy.
+
+Las máscaras de qrcode (colormasks.py) recorren la imagen píxel a píxel en
+Python: a resolución de impresión tardan segundos. Aquí se aplica la misma
+fórmula a todo el lienzo con operaciones de arrays:
+
+1. El drawer pinta los módulos en negro sobre el color de fondo. Para cada
+   píxel se recupera la cobertura (norm, 0..1) entre fondo y negro, igual
+   que QRColorMask.extrap_color().
+2. Se calcula el color de primer plano de cada píxel (sólido, degradado
+   o imagen), igual que get_fg_pixel().
+3. Se mezcla: int(primer_plano * norm + fondo * (1 - norm)).
+
+Las operaciones se hacen en float64 y en el mismo orden que qrcode, así que
+el resultado es idéntico para colores RGB. El lienzo se procesa por franjas
+de filas para que la memoria temporal no crezca con el tamaño.
+"""
+import math
+
+import numpy as np
+
+from qrstudio.cache import LRUCache, image_nbytes
+from qrstudio.logo import LOGO_CACHE, file_key
+# Tipos de relleno de los módulos (reexportados: se definen sin NumPy)
+from qrstudio.params import FILL_MODES, GRADIENT_MODES
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+# Filas por franja al aplicar la máscara
+STRIP_ROWS = 512
+
+# Imágenes de relleno ya reescaladas, por fichero y tamaño
+_fill_images = LRUCache(64 * 1024 * 1024, image_nbytes)
+# Capas de primer plano ya calculadas (degradados radial/cuadrado e imagen),
+# por tamaño y colores: al escribir solo cambian los módulos, no la capa
+_fill_layers = LRUCache(64 * 1024 * 1024, lambda layer: layer.nbytes)
+
+
+def coverage(pixels, back_color, paint_color=BLACK):
+    """
+    Cobertura de cada píxel entre back_color (0) y paint_color (1).
+
+    Equivale a QRColorMask.extrap_color(). Devuelve None si fondo y pintura
+    coinciden en todos los canales.
+    """
+    values = pixels[..., :3].astype(np.float64)
+    total = None
+    count = 0
+    for c, (back, paint) in enumerate(zip(back_color, paint_color)):
+        if back == paint:
+            continue
+        channel = (values[..., c] - back) / (paint - back)
+        total = channel if total is None else total + channel
+        count += 1
+    if total is None:
+        return None
+    return total / count
+
+
+def blend(pixels, norm, back_color, fg):
+    """
+    Mezcla fondo y primer plano según la cobertura (in situ sobre pixels).
+
+    fg es un color o un array (..., 3) de colores enteros. Los píxeles que
+    ya son del color de fondo no se tocan.
+    """
+    is_back = np.all(pixels[..., :3] == np.array(back_color, np.uint8), axis=-1)
+    if norm is None:
+        pixels[..., :3] = back_color
+        return pixels
+
+    fg = np.asarray(fg)
+    rest = 1 - norm
+    for c, back in enumerate(back_color):
+        channel = np.trunc(fg[..., c] * norm + back * rest)
+        # El sobreimpulso del antialiasing puede salirse de 0..255: PIL
+        # satura al asignar el píxel, así que aquí también
+        np.clip(channel, 0, 255, out=channel)
+        pixels[..., c] = np.where(is_back, pixels[..., c], channel)
+    return pixels
+
+
+def solid_colorize(pixels, back_color, front_color, paint_color=BLACK):
+    """
+    Colorea píxeles dibujados en negro sobre back_color, como
+    SolidFillColorMask.apply_mask(). Devuelve un array nuevo.
+    """
+    if back_color == WHITE and front_color == BLACK:
+        # Misma optimización que qrcode: ya está dibujado en blanco y negro
+        return pixels
+    norm = coverage(pixels, back_color, paint_color)
+    return blend(pixels.copy(), norm, back_color, front_color)
+
+
+def _interp(color1, color2, norm):
+    """interp_color() de qrcode para un array de coeficientes -> (..., 3)."""
+    return np.stack(
+        [np.trunc(c2 * norm + c1 * (1 - norm)) for c1, c2 in zip(color1, color2)],
+        axis=-1
+    )
+
+
+def foreground(mode, width, x, y, color1, color2, fill_image=None):
+    """
+    Color de primer plano en las coordenadas (x, y) de un lienzo cuadrado
+    de lado width. x e y son arrays de enteros del mismo tamaño.
+
+    Usa las mismas fórmulas que get_fg_pixel() de las máscaras de qrcode:
+    color1 es el centro/izquierda/arriba y color2 el borde/derecha/abajo.
+    Devuelve un array (n, 3) (o el color tal cual para "solid").
+    """
+    if mode == "solid":
+        return np.asarray(color1, dtype=np.float64)
+    if mode == "image":
+        return fill_image[y, x, :3]
+    if mode in ("horizontal", "vertical"):
+        # Solo depende de una coordenada: tabla por columna/fila
+        axis = np.arange(width, dtype=np.float64)
+        table = _interp(color1, color2, axis / width)
+        return table[x if mode == "horizontal" else y]
+
+    half = width / 2
+    x = x - half
+    y = y - half
+    if mode == "radial":
+        norm = np.sqrt(x ** 2 + y ** 2) / (math.sqrt(2) * width / 2)
+    elif mode == "square":
+        norm = np.maximum(np.abs(x), np.abs(y)) / half
+    else:
+        raise ValueError(f"Tipo de relleno desconocido: {mode!r}")
+    return _interp(color1, color2, norm)
+
+
+def load_fill_image(path, size):
+    """
+    Imagen de relleno reescalada al tamaño del lienzo, como hace
+    ImageColorMask (resize con el filtro por defecto). Array (h, w, 4).
+    """
+    key = file_key(path) + (size,)
+    image = _fill_images.get(key)
+    if image is None:
+        image = LOGO_CACHE.load(path).resize(size)
+        _fill_images.put(key, image)
+    return np.asarray(image)
+
+
+def _pack_rgba(color):
+    """Color RGB opaco como un uint32 con la misma disposición que RGBA."""
+    return np.array([(*color[:3], 255)], dtype=np.uint8).view(np.uint32)[0, 0]
+
+
+def _pack_colors(colors):
+    """Array (..., 3) de colores -> array (...) de uint32 RGBA opacos."""
+    packed = np.empty(colors.shape[:-1] + (4,), dtype=np.uint8)
+    packed[..., :3] = colors
+    packed[..., 3] = 255
+    return packed.view(np.uint32)[..., 0]
+
+
+def _fill_strip(mode, width, y0, y1, color1, color2, fill_image):
+    """
+    Primer plano empaquetado de las filas y0..y1, con forma que se puede
+    difundir a (filas, width): los degradados lineales solo calculan una
+    fila o una columna.
+    """
+    if mode == "horizontal":
+        x, y = np.arange(width)[np.newaxis, :], np.zeros((1, 1), dtype=int)
+    elif mode == "vertical":
+        x, y = np.zeros((1, 1), dtype=int), np.arange(y0, y1)[:, np.newaxis]
+    else:
+        x, y = np.arange(width)[np.newaxis, :], np.arange(y0, y1)[:, np.newaxis]
+    return _pack_colors(foreground(mode, width, x, y, color1, color2, fill_image))
+
+
+def _symmetric_layer(mode, width, color1, color2):
+    """
+    Degradado radial o cuadrado calculando solo un cuadrante.
+
+    Ambos dependen de |x - w/2| y |y - w/2|, así que la fila/columna y
+    coincide con w - y: el resto se rellena por espejo con valores exactos.
+    """
+    half = width // 2 + 1
+    x = np.arange(half)[np.newaxis, :]
+    y = np.arange(half)[:, np.newaxis]
+    quadrant = _pack_colors(foreground(mode, width, x, y, color1, color2))
+
+    mirror = width - np.arange(half, width)  # índices espejo, en 1..w-half
+    layer = np.empty((width, width), dtype=np.uint32)
+    layer[:half, :half] = quadrant
+    layer[:half, half:] = quadrant[:, mirror]
+    layer[half:] = layer[mirror]
+    return layer
+
+
+def _fill_layer(mode, width, height, color1, color2, fill_image_path):
+    """
+    Capa de primer plano completa (uint32 h x w), de la caché si ya se
+    calculó para este tamaño y colores. None si no compensa guardarla
+    (degradados lineales, que son baratos) o no cabe en la caché.
+    """
+    if mode in ("solid", "horizontal", "vertical"):
+        return None
+    if width * height * 4 > _fill_layers.max_bytes:
+        return None
+    if mode == "image":
+        key = (mode, width, height) + file_key(fill_image_path)
+    else:
+        key = (mode, width, height, color1, color2)
+    layer = _fill_layers.get(key)
+    if layer is None:
+        fill_image = None
+        if mode == "image":
+            fill_image = load_fill_image(fill_image_path, (width, height))
+        if mode in ("radial", "square") and width == height:
+            layer = _symmetric_layer(mode, width, color1, color2)
+        else:
+            layer = _fill_strip(mode, width, 0, height, color1, color2, fill_image)
+        _fill_layers.put(key, layer)
+    return layer
+
+
+def apply_color_mask(pixels, back_color, mode, color1, color2=None,
+                     fill_image_path=None, paint_color=BLACK, top=0, canvas_height=None):
+    """
+    Colorea in situ un lienzo RGBA (array uint8 h x w x 4, contiguo y
+    opaco) dibujado en negro sobre back_color.
+
+    Para "solid" color1 es el color de los módulos; para los degradados,
+    color1 y color2 son los extremos; para "image", fill_image_path es la
+    imagen que rellena los módulos.
+
+    Con top y canvas_height, pixels es solo la franja de filas que empieza
+    en top de un lienzo de esa altura (exportación por franjas).
+
+    Se trabaja con píxeles empaquetados en uint32: el fondo se conserva y
+    los píxeles negros puros (cobertura 1) toman el primer plano tal cual
+    en una sola pasada; la mezcla completa solo se hace en los bordes con
+    antialiasing, que son pocos.
+    """
+    height, width = pixels.shape[:2]
+    canvas_height = canvas_height or height
+    if mode == "solid" and back_color == WHITE and color1 == BLACK:
+        return pixels
+
+    fill_image = None
+    if mode == "image":
+        fill_image = load_fill_image(fill_image_path, (width, canvas_height))
+    layer = _fill_layer(mode, width, canvas_height, color1, color2, fill_image_path)
+    if mode == "solid":
+        layer = _pack_rgba(color1)
+
+    back32 = _pack_rgba(back_color)
+    paint32 = _pack_rgba(paint_color)
+    for y0 in range(0, height, STRIP_ROWS):
+        y1 = min(y0 + STRIP_ROWS, height)
+        strip = pixels[y0:y1]
+        packed = strip.view(np.uint32)[..., 0]
+
+        if layer is None:
+            fill = _fill_strip(mode, width, top + y0, top + y1, color1, color2, fill_image)
+        elif np.ndim(layer):
+            fill = layer[top + y0:top + y1]
+        else:
+            fill = layer
+
+        is_back = packed == back32
+        edge = np.flatnonzero(~is_back & (packed != paint32))
+        result = np.where(is_back, packed, fill)
+
+        if edge.size:
+            edge_pixels = strip.reshape(-1, 4)[edge]
+            y, x = np.divmod(edge, width)
+            fg = foreground(mode, width, x, top + y + y0, color1, color2, fill_image)
+            fg = np.broadcast_to(fg, (edge.size, 3))
+            norm = coverage(edge_pixels, back_color, paint_color)
+            blended = blend(edge_pixels, norm, back_color, fg)
+            result.reshape(-1)[edge] = blended.view(np.uint32)[:, 0]
+
+        packed[...] = result
+    return pixels
@@ -0,0 +1,84 @@
+"""
+Parámetros de render y opciones que muestra la interfaz.
+
+Solo usa la biblioteca estándar: la interfaz lo importa al arrancar para
+construir los menús y los RenderParams sin cargar el motor (NumPy, qrcode,
+PIL), que se importa en segundo plano con el primer render. qrstudio.render
+y qrstudio.masks lo reexportan.
+"""
+from dataclasses import dataclass
+
+# Niveles de corrección de error (los valores de qrcode.constants, que no
+# se importa aquí para no cargar qrcode)
+ERROR_CORRECT_L = 1
+ERROR_CORRECT_M = 0
+ERROR_CORRECT_Q = 3
+ERROR_CORRECT_H = 2
+
+# Estilos de módulo, en el orden de la interfaz (las claves de
+# render.MODULE_DRAWERS)
+STYLE_NAMES = ("Cuadrado", "Redondeado", "Círculo")
+# Alias en inglés para la línea de comandos
+STYLE_ALIASES = {
+    "square": "Cuadrado",
+    "rounded": "Redondeado",
+    "circle": "Círculo",
+}
+
+# Motores de dibujo de módulos: los drawers de qrcode (PIL) o el
+# vectorizado de qrstudio.fastdraw (mismo resultado, mucho más rápido)
+RENDER_ENGINES = {
+    "PIL (qrcode)": "pil",
+    "NumPy (vectorizado)": "numpy",
+}
+
+ERROR_CORRECTION = {
+    "Baja (L)": ERROR_CORRECT_L,
+    "Media (M)": ERROR_CORRECT_M,
+    "Cuartil (Q)": ERROR_CORRECT_Q,
+    "Alta (H)": ERROR_CORRECT_H
+}
+ERROR_CORRECTION_LETTERS = {
+    "L": ERROR_CORRECT_L,
+    "M": ERROR_CORRECT_M,
+    "Q": ERROR_CORRECT_Q,
+    "H": ERROR_CORRECT_H,
+}
+
+# Tipos de relleno de los módulos (etiqueta de la UI -> clave)
+FILL_MODES = {
+    "Sólido": "solid",
+    "Degradado radial": "radial",
+    "Degradado cuadrado": "square",
+    "Degradado horizontal": "horizontal",
+    "Degradado vertical": "vertical",
+    "Imagen": "image",
+}
+GRADIENT_MODES = ("radial", "square", "horizontal", "vertical")
+
+
+@dataclass(frozen=True)
+class RenderParams:
+    """
+    Todos los parámetros que definen un QR renderizado.
+
+    Es inmutable y serializable (pickle), así que se puede compartir
+    entre procesos y usar como clave de caché.
+    """
+    data: str
+    description: str = ""
+    error_correction: int = ERROR_CORRECT_H
+    style: str = "Cuadrado"
+    box_size: int = 10
+    border: int = 4
+    fill_color: tuple = (0, 0, 0)
+    back_color: tuple = (255, 255, 255)
+    logo_path: str = None
+    logo_ratio: float = 0.25
+    border_radius: int = 0
+    engine: str = "pil"
+    # Relleno de los módulos (ver FILL_MODES): para los degradados
+    # fill_color y fill_color2 son los extremos
+    fill_mode: str = "solid"
+    fill_color2: tuple = (0, 0, 255)
+    fill_image_path: str = None
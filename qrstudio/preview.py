@@ -0,0 +1,156 @@
+"""
+Renderizado de la vista previa fuera del hilo de la interfaz.
+
+PreviewRenderer recibe peticiones de render (RenderParams) y las ejecuta en
+un QThreadPool de un solo hilo:
+
+* Las peticiones se agrupan: mientras el temporizador de espera está activo
+  o hay un render en curso, cada nueva petición sustituye a la pendiente.
+* Solo hay un render en curso a la vez; al terminar, si hay una petición
+  pendiente se lanza enseguida.
+* Cada petición lleva un número de generación; los resultados de renders
+  ya superados se descartan sin llegar a la interfaz.
+
+Los renders pasan por un StagedRenderer, así que los cambios de estilo
+reutilizan la matriz y los módulos ya calculados. Si se indica un tamaño
+máximo, se renderiza a la resolución de la vista previa y no a la final.
+
+El StagedRenderer se crea con el primer render, en el hilo de render: el
+motor (NumPy, qrcode, PIL) se importa allí y no retrasa la ventana.
+"""
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Signal
+
+from qrstudio.qt_image import pil_to_qimage
+from qrstudio.trace import TRACER
+
+# Espera para agrupar peticiones (~1 frame a 60 fps)
+DEFAULT_DEBOUNCE_MS = 16
+
+
+class _RenderSignals(QObject):
+    # (generación, imagen PIL, QImage, parámetros) / (generación, excepción)
+    finished = Signal(int, object, object, object)
+    failed = Signal(int, object)
+
+
+def _default_renderer():
+    from qrstudio.render import StagedRenderer
+    return StagedRenderer()
+
+
+class _RenderTask(QRunnable):
+    def __init__(self, preview, generation, params, max_px, signals):
+        super().__init__()
+        self.preview = preview
+        self.generation = generation
+        self.params = params
+        self.max_px = max_px
+        self.signals = signals
+
+    def run(self):
+        try:
+            renderer = self.preview.renderer
+            with TRACER.frame("render"):
+                if self.max_px:
+                    image = renderer.render_preview(self.params, self.max_px)
+                else:
+                    image = renderer.render(self.params)
+                # La QImage se puede crear fuera del hilo de la interfaz
+                with TRACER.stage("qimage"):
+                    qimage = pil_to_qimage(image)
+        except Exception as e:
+            self.signals.failed.emit(self.generation, e)
+        else:
+            self.signals.finished.emit(self.generation, image, qimage, self.params)
+
+
+class PreviewRenderer(QObject):
+    """
+    Ejecuta los renders de la vista previa en segundo plano.
+
+    Emite rendered(imagen, qimage, params) con el resultado de la última
+    petición (la imagen PIL, su QImage lista para mostrar y los parámetros
+    a tamaño completo que se pidieron) y
+    failed(excepción) si esta falla. renderer es el StagedRenderer que
+    guarda las etapas en caché; si no se indica, renderer_factory (o
+    StagedRenderer()) lo crea la primera vez que se usa.
+    """
+    rendered = Signal(object, object, object)
+    failed = Signal(object)
+
+    def __init__(self, parent=None, debounce_ms=DEFAULT_DEBOUNCE_MS, renderer=None,
+                 renderer_factory=None):
+        super().__init__(parent)
+        self._renderer = renderer
+        self._renderer_factory = renderer_factory or _default_renderer
+        self._renderer_lock = threading.Lock()
+        self._pool = QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+
+        self._signals = _RenderSignals(self)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_ms)
+        self._timer.timeout.connect(self._start_pending)
+
+        self._generation = 0
+        self._pending = None
+        self._running = False
+
+    @property
+    def renderer(self):
+        """El StagedRenderer (se crea aquí la primera vez, en cualquier hilo)."""
+        with self._renderer_lock:
+            if self._renderer is None:
+                self._renderer = self._renderer_factory()
+            return self._renderer
+
+    def request(self, params, max_px=None):
+        """
+        Programa un render; sustituye a cualquier petición pendiente.
+
+        Con max_px se renderiza a la resolución de la vista previa (ver
+        StagedRenderer.render_preview).
+        """
+        self._generation += 1
+        self._pending = (params, max_px)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def cancel(self):
+        """Descarta la petición pendiente y el resultado del render en curso."""
+        self._generation += 1
+        self._pending = None
+        self._timer.stop()
+
+    def shutdown(self):
+        """Cancela todo y espera a que termine el render en curso."""
+        self.cancel()
+        self._pool.waitForDone()
+
+    def _start_pending(self):
+        if self._running or self._pending is None:
+            # Se lanzará al terminar el render en curso
+            return
+        (params, max_px), self._pending = self._pending, None
+        self._running = True
+        self._pool.start(_RenderTask(
+            self, self._generation, params, max_px, self._signals
+        ))
+
+    def _on_finished(self, generation, image, qimage, params):
+        self._running = False
+        if generation == self._generation:
+            self.rendered.emit(image, qimage, params)
+        self._start_pending()
+
+    def _on_failed(self, generation, error):
+        self._running = False
+        if generation == self._generation:
+            self.failed.emit(error)
+        self._start_pending()
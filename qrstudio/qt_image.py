@@ -0,0 +1,32 @@
+"""
+Conversión directa de imágenes PIL a QImage/QPixmap.
+
+Sustituye al viaje de ida y vuelta por PNG (comprimir con zlib en un
+BytesIO y volver a descomprimir con QPixmap.loadFromData): los píxeles
+RGBA de PIL se envuelven tal cual en una QImage.
+"""
+from PySide6.QtGui import QImage, QPixmap
+
+
+def pil_to_qimage(image):
+    """
+    Envuelve los píxeles de una imagen PIL en una QImage sin copiarlos.
+
+    QImage no toma posesión del buffer, así que se guarda una referencia en
+    la propia QImage para que siga vivo mientras ella exista. Se puede
+    llamar desde cualquier hilo (a diferencia de QPixmap).
+    """
+    if image.mode != "RGBA":
+        image = image.convert("RGBA")
+    # tobytes() es la única copia: PIL no expone su memoria interna
+    buffer = image.tobytes()
+    qimage = QImage(buffer, image.width, image.height, image.width * 4,
+                    QImage.Format_RGBA8888)
+    qimage._pil_buffer = buffer
+    return qimage
+
+
+def pil_to_qpixmap(image):
+    """Convierte una imagen PIL (o una QImage ya envuelta) en QPixmap."""
+    qimage = image if isinstance(image, QImage) else pil_to_qimage(image)
+    return QPixmap.fromImage(qimage)
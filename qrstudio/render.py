@@ -0,0 +1,543 @@
+"""
+Motor de renderizado de QR-Studio, independiente de Qt.
+
+Contiene todo el pipeline que antes vivía dentro de MainWindow:
+codificar el QR, dibujar los módulos, incrustar el logo, añadir la
+descripción y redondear los bordes. Lo usan tanto la interfaz gráfica
+como el modo por lotes (qrstudio.batch).
+"""
+import copy
+import threading
+from dataclasses import replace
+from functools import partial
+
+import numpy as np
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles.moduledrawers import (
+    SquareModuleDrawer, RoundedModuleDrawer, CircleModuleDrawer
+)
+from qrcode.image.styles.colormasks import SolidFillColorMask
+
+from PIL import Image, ImageDraw
+
+from qrstudio import encoder
+from qrstudio.cache import LRUCache, image_nbytes
+from qrstudio.fastdraw import StampLayer, draw_modules_numpy
+from qrstudio.masks import apply_color_mask
+from qrstudio.params import (  # reexportados: parte de la API de render
+    ERROR_CORRECTION, ERROR_CORRECTION_LETTERS, RENDER_ENGINES, STYLE_ALIASES, RenderParams
+)
+from qrstudio.logo import LOGO_CACHE, file_key
+from qrstudio.text import text_layout
+from qrstudio.trace import TRACER
+
+# --- Estilos disponibles (claves: params.STYLE_NAMES) ---
+# Se guardan fábricas (no instancias): los drawers de qrcode guardan estado
+# de la imagen que están dibujando y no se pueden compartir entre renders.
+MODULE_DRAWERS = {
+    "Cuadrado": SquareModuleDrawer,
+    "Redondeado": partial(RoundedModuleDrawer, radius_ratio=1.0),
+    "Círculo": CircleModuleDrawer,
+}
+
+# Espaciado de la descripción
+DESCRIPTION_PADDING_TOP = 10     # Espacio entre QR y texto
+DESCRIPTION_PADDING_BOTTOM = 20  # Espacio entre texto y borde inferior
+
+# Presupuesto de memoria por defecto de StagedRenderer (bytes)
+DEFAULT_CACHE_BUDGET = 256 * 1024 * 1024
+
+# Máscaras de las cuatro esquinas redondeadas, por radio
+_corner_masks = LRUCache(4 * 1024 * 1024, lambda masks: sum(map(image_nbytes, masks)))
+
+
+class LogoError(Exception):
+    """No se pudo cargar o incrustar el logo."""
+
+
+def resolve_style(name):
+    """Devuelve la clave de MODULE_DRAWERS para un nombre o alias."""
+    if name in MODULE_DRAWERS:
+        return name
+    try:
+        return STYLE_ALIASES[name.lower()]
+    except KeyError:
+        raise ValueError(f"Estilo de módulo desconocido: {name!r}") from None
+
+
+def resolve_error_correction(value):
+    """Acepta una etiqueta de la UI, una letra (L/M/Q/H) o la constante."""
+    if isinstance(value, int):
+        return value
+    if value in ERROR_CORRECTION:
+        return ERROR_CORRECTION[value]
+    try:
+        return ERROR_CORRECTION_LETTERS[value.upper()]
+    except KeyError:
+        raise ValueError(f"Nivel de corrección desconocido: {value!r}") from None
+
+
+# --- Etapas del pipeline ---
+
+@TRACER.traced("codificar")
+def encode_qr(data, error_correction):
+    """
+    Codifica los datos y devuelve un QRCode ya construido (make).
+
+    La matriz de módulos no depende del tamaño de módulo ni del borde,
+    que se fijan después en draw_modules(). La versión se elige con las
+    tablas de capacidad (qrstudio.encoder); el resultado es el mismo que el
+    de QRCode.make(fit=True).
+    """
+    return encoder.encode(data, error_correction)
+
+
+class _PaintOnlyMask(SolidFillColorMask):
+    """Deja los módulos en negro: el color lo pone qrstudio.masks."""
+
+    def apply_mask(self, image):
+        pass
+
+
+@TRACER.traced("módulos")
+def draw_modules(qr, style, box_size, border, fill_color, back_color, engine="pil",
+                 fill_mode="solid", fill_color2=None, fill_image_path=None):
+    """
+    Dibuja los módulos del QR con el estilo y colores indicados (RGBA).
+
+    engine es "pil" (drawers de qrcode) o "numpy" (qrstudio.fastdraw).
+    Los rellenos que no son sólidos (degradados, imagen) se aplican siempre
+    con las máscaras vectorizadas de qrstudio.masks.
+    """
+    solid = fill_mode == "solid"
+    if engine == "numpy":
+        pixels = draw_modules_numpy(
+            qr.modules, MODULE_DRAWERS[style](), box_size, border,
+            fill_color if solid else None, back_color
+        )
+    elif engine == "pil":
+        # qrcode dibuja en negro y el color (también el sólido) se aplica
+        # con la máscara vectorizada: mismo resultado que SolidFillColorMask
+        # sin recorrer los píxeles desde Python
+        pixels = np.array(_draw_modules_pil(
+            qr, style, box_size, border, _PaintOnlyMask(back_color=back_color)
+        ))
+        solid = False
+    else:
+        raise ValueError(f"Motor de render desconocido: {engine!r}")
+
+    if not solid:
+        apply_color_mask(pixels, back_color, fill_mode, fill_color, fill_color2,
+                         fill_image_path)
+    return Image.fromarray(pixels, "RGBA")
+
+
+def _draw_modules_pil(qr, style, box_size, border, color_mask):
+    """Módulos dibujados por qrcode (StyledPilImage), en RGBA."""
+    # Copia superficial: la matriz se comparte, el tamaño no
+    qr = copy.copy(qr)
+    qr.box_size = box_size
+    qr.border = border
+    return qr.make_image(
+        image_factory=StyledPilImage,
+        module_drawer=MODULE_DRAWERS[style](),
+        color_mask=color_mask
+    ).convert("RGBA")
+
+
+class ModuleLayer:
+    """
+    Los módulos de un QR ya dibujados pero sin colorear, para cambiar de
+    color sin volver a dibujarlos.
+
+    * Motor numpy: los índices de sello (fastdraw.StampLayer). El relleno
+      y el fondo solo cambian la paleta de sellos.
+    * Motor pil: los módulos de qrcode en negro sobre el fondo. El relleno
+      se aplica con la mezcla vectorizada de qrstudio.masks; el fondo forma
+      parte del dibujo (el antialiasing depende de él), así que cambiarlo
+      obliga a crear otra capa.
+
+    colorize() devuelve lo mismo que draw_modules() con esos colores.
+    """
+
+    def __init__(self, qr, style, box_size, border, engine, back_color):
+        self.engine = engine
+        self.back_color = back_color
+        if engine == "numpy":
+            self.stamps = StampLayer(qr.modules, MODULE_DRAWERS[style], box_size, border)
+            self.nbytes = self.stamps.nbytes
+        elif engine == "pil":
+            self.black = np.array(_draw_modules_pil(
+                qr, style, box_size, border, _PaintOnlyMask(back_color=back_color)
+            ))
+            self.nbytes = self.black.nbytes
+        else:
+            raise ValueError(f"Motor de render desconocido: {engine!r}")
+
+    def colorize(self, fill_color, back_color, fill_mode="solid", fill_color2=None,
+                 fill_image_path=None):
+        solid = fill_mode == "solid"
+        if self.engine == "numpy":
+            pixels = self.stamps.colorize(fill_color if solid else None, back_color)
+            if solid:
+                return Image.fromarray(pixels, "RGBA")
+        else:
+            if back_color != self.back_color:
+                raise ValueError("La capa de módulos se dibujó con otro color de fondo")
+            pixels = self.black.copy()
+        apply_color_mask(pixels, back_color, fill_mode, fill_color, fill_color2,
+                         fill_image_path)
+        return Image.fromarray(pixels, "RGBA")
+
+
+def load_logo(path):
+    """Devuelve el logo decodificado en RGBA (de la caché; no modificar)."""
+    return LOGO_CACHE.load(path)
+
+
+def logo_max_size(qr_image, logo_ratio):
+    """Lado máximo del logo en píxeles para una proporción de la altura."""
+    return int(qr_image.height * logo_ratio)
+
+
+def paste_logo(qr_image, logo, qr_size=None):
+    """
+    Pega el logo (ya escalado) centrado sobre qr_image (que se modifica).
+    qr_size es el tamaño de la zona del QR si el lienzo es más grande
+    (con la descripción debajo).
+    """
+    qr_width, qr_height = qr_size or qr_image.size
+
+    box_x = (qr_width - logo.width) // 2
+    box_y = (qr_height - logo.height) // 2
+
+    qr_image.paste(logo, (box_x, box_y), mask=logo)
+    return qr_image
+
+
+def has_description(text):
+    return bool(text) and not text.isspace()
+
+
+def description_layout(width, height, text):
+    """
+    Disposición de una descripción bajo un QR de width x height píxeles:
+    (text.TextLayout, fila en la que empieza el texto, altura total del
+    lienzo). La medida se guarda en caché por texto y ancho.
+    """
+    layout = text_layout(text, width)
+    text_y = height + DESCRIPTION_PADDING_TOP
+    new_height = height + layout.height + DESCRIPTION_PADDING_TOP + DESCRIPTION_PADDING_BOTTOM
+    return layout, text_y, new_height
+
+
+def corner_masks(radius):
+    """
+    Máscaras (radius + 1 de lado) de la parte transparente de cada esquina:
+    arriba izquierda, arriba derecha, abajo izquierda y abajo derecha.
+
+    Salen de ImageDraw.rounded_rectangle() sobre un lienzo pequeño con la
+    misma caja que usa el redondeo completo ((0, 0) + tamaño, que incluye
+    la fila y la columna siguientes al borde), así que los píxeles son los
+    mismos.
+    """
+    masks = _corner_masks.get(radius)
+    if masks is None:
+        size = radius + 1
+        side = 2 * size + 2
+        full = Image.new("L", (side, side), 255)
+        ImageDraw.Draw(full).rounded_rectangle((0, 0, side, side), radius=radius, fill=0)
+        far = side - size
+        masks = tuple(full.crop((x, y, x + size, y + size))
+                      for x, y in ((0, 0), (far, 0), (0, far), (far, far)))
+        _corner_masks.put(radius, masks)
+    return masks
+
+
+def round_corners(image, radius, top=0, canvas_height=None):
+    """
+    Deja transparentes ((0, 0, 0, 0)) las esquinas de image, que se
+    modifica, tocando solo cuatro cuadrados de radius + 1 píxeles.
+
+    image puede ser una franja de un lienzo más alto: top es la fila del
+    lienzo en la que empieza y canvas_height la altura del lienzo.
+    """
+    width = image.width
+    height = canvas_height or image.height
+    size = radius + 1
+    if 2 * size > min(width, height):
+        # Las esquinas se tocan: máscara de toda la imagen
+        mask = Image.new("L", image.size, 255)
+        ImageDraw.Draw(mask).rounded_rectangle(
+            (0, -top, width, height - top), radius=radius, fill=0
+        )
+        image.paste((0, 0, 0, 0), (0, 0), mask)
+        return image
+
+    far_x, far_y = width - size, height - size
+    positions = ((0, 0), (far_x, 0), (0, far_y), (far_x, far_y))
+    for (x, y), mask in zip(positions, corner_masks(radius)):
+        if y < top + image.height and y + size > top:
+            image.paste((0, 0, 0, 0), (x, y - top), mask)
+    return image
+
+
+def _logo_thumbnail(qr_image, params, logo):
+    """Logo escalado para el QR: de la caché de logos o a partir de logo."""
+    max_size = logo_max_size(qr_image, params.logo_ratio)
+    if logo is None:
+        return LOGO_CACHE.thumbnail(params.logo_path, max_size)
+    logo = logo.copy()
+    logo.thumbnail((max_size, max_size), Image.Resampling.LANCZOS)
+    return logo
+
+
+def compose_image(qr_image, params, logo=None):
+    """
+    Aplica la post-producción (logo, descripción y radio) sobre los módulos.
+
+    El tamaño final se calcula antes de pintar: se reserva un único lienzo
+    y el logo, el texto y las esquinas se pintan sobre él. qr_image no se
+    modifica (puede venir de una caché); sin post-producción se devuelve
+    tal cual. Los fallos del logo se elevan como LogoError para que la
+    interfaz pueda desactivarlo.
+    """
+    width, height = qr_image.size
+    text = None
+    if has_description(params.description):
+        with TRACER.stage("descripción"):
+            text, text_y, height = description_layout(width, height, params.description)
+    if not (params.logo_path or text or params.border_radius > 0):
+        return qr_image
+
+    with TRACER.stage("lienzo"):
+        if text:
+            canvas = Image.new("RGBA", (width, height), params.back_color)
+            canvas.paste(qr_image, (0, 0))
+        else:
+            canvas = qr_image.copy()
+
+    if params.logo_path:
+        try:
+            with TRACER.stage("logo"):
+                paste_logo(canvas, _logo_thumbnail(qr_image, params, logo), qr_image.size)
+        except Exception as e:
+            raise LogoError(e) from e
+
+    if text:
+        with TRACER.stage("descripción"):
+            text.paste(canvas, text_y, params.fill_color)
+
+    if params.border_radius > 0:
+        with TRACER.stage("esquinas"):
+            round_corners(canvas, params.border_radius)
+
+    return canvas
+
+
+def render_qr(params, logo=None, qr=None):
+    """
+    Ejecuta el pipeline completo y devuelve la imagen PIL final (RGBA).
+
+    logo es la imagen ya decodificada; si es None y params.logo_path está
+    definido, se usa la caché de logos del proceso. qr es la matriz ya
+    codificada, si se tiene.
+    """
+    qr = qr or encode_qr(params.data, params.error_correction)
+    qr_image = draw_modules(
+        qr, params.style, params.box_size, params.border,
+        params.fill_color, params.back_color, params.engine,
+        params.fill_mode, params.fill_color2, params.fill_image_path
+    )
+    return compose_image(qr_image, params, logo)
+
+
+def preview_box_size(modules_count, border, box_size, max_px):
+    """
+    Tamaño de módulo para que el QR quepa en max_px píxeles de lado, sin
+    pasar nunca del tamaño pedido (box_size).
+    """
+    return max(1, min(box_size, max_px // (modules_count + 2 * border)))
+
+
+def scale_params(params, box_size):
+    """
+    Los mismos parámetros a otro tamaño de módulo. El radio de borde, que
+    va en píxeles, se escala en la misma proporción.
+    """
+    if box_size == params.box_size:
+        return params
+    ratio = box_size / params.box_size
+    return replace(params, box_size=box_size,
+                   border_radius=round(params.border_radius * ratio))
+
+
+def _matrix_nbytes(qr):
+    # Lista de listas de bool: ~8 bytes por referencia más la cabecera
+    return qr.modules_count * (qr.modules_count * 8 + 64)
+
+
+class StagedRenderer:
+    """
+    Pipeline de render con una caché LRU por etapa.
+
+    1. matrices: el QRCode codificado, por (datos, corrección de error).
+    2. layers: los módulos sin colorear (ModuleLayer), por matriz + estilo,
+       tamaño de módulo, borde y motor (y fondo, con el motor pil).
+    3. rasters: los módulos coloreados, por lo anterior más colores y
+       relleno.
+    4. outputs: la imagen final (logo, descripción, radio), por todos los
+       parámetros y la versión del fichero del logo (mtime y tamaño).
+
+    Cada cambio solo repite las etapas que dependen de él: cambiar el radio
+    reutiliza el raster, cambiar el color reutiliza la capa de módulos y
+    solo la vuelve a colorear. El presupuesto de memoria se reparte entre
+    las cuatro etapas.
+
+    Con disk_cache (un qrstudio.diskcache.DiskCache) las matrices y las
+    salidas que no están en memoria se buscan también en disco, y lo que se
+    renderiza se guarda allí para la próxima ejecución. La vista previa
+    (render_preview) no usa el disco: guardar cada fotograma en PNG
+    costaría más que renderizarlo y llenaría la caché de resoluciones
+    reducidas que no se vuelven a pedir.
+
+    Las imágenes devueltas se comparten con la caché: no se deben modificar.
+    """
+
+    def __init__(self, memory_budget=DEFAULT_CACHE_BUDGET, disk_cache=None):
+        self.disk_cache = disk_cache
+        # Segmentación y versión de la edición anterior (al escribir, solo
+        # cambia el final del texto)
+        self.encoder = encoder.QREncoder()
+        self.matrices = LRUCache(memory_budget // 16, _matrix_nbytes)
+        self.layers = LRUCache(memory_budget * 3 // 16, lambda layer: layer.nbytes)
+        self.rasters = LRUCache(memory_budget * 5 // 16, image_nbytes)
+        self.outputs = LRUCache(memory_budget * 7 // 16, image_nbytes)
+        self._lock = threading.Lock()
+
+    def encode_qr(self, data, error_correction, use_disk=True):
+        key = (data, error_correction)
+        qr = self.matrices.get(key)
+        if qr is None:
+            if use_disk and self.disk_cache is not None:
+                qr = self.disk_cache.encode_qr(data, error_correction, self._encode)
+            else:
+                qr = self._encode(data, error_correction)
+            self.matrices.put(key, qr)
+        return qr
+
+    @TRACER.traced("codificar")
+    def _encode(self, data, error_correction):
+        return self.encoder.encode(data, error_correction)
+
+    def draw_modules(self, params):
+        key = (params.data, params.error_correction, params.style, params.box_size,
+               params.border, params.fill_color, params.back_color, params.engine,
+               params.fill_mode, params.fill_color2, params.fill_image_path)
+        if params.fill_mode == "image":
+            key += (file_key(params.fill_image_path),)
+        image = self.rasters.get(key)
+        if image is None:
+            layer = self.module_layer(params)
+            with TRACER.stage("color"):
+                image = layer.colorize(
+                    params.fill_color, params.back_color, params.fill_mode,
+                    params.fill_color2, params.fill_image_path
+                )
+            self.rasters.put(key, image)
+        return image
+
+    def module_layer(self, params):
+        key = (params.data, params.error_correction, params.style, params.box_size,
+               params.border, params.engine)
+        if params.engine != "numpy":
+            key += (params.back_color,)
+        layer = self.layers.get(key)
+        if layer is None:
+            qr = self.encode_qr(params.data, params.error_correction)
+            with TRACER.stage("módulos"):
+                layer = ModuleLayer(qr, params.style, params.box_size, params.border,
+                                    params.engine, params.back_color)
+            self.layers.put(key, layer)
+        return layer
+
+    def render(self, params, logo=None, use_disk=True):
+        """
+        Igual que render_qr(), pero reutilizando las etapas en caché. Con
+        use_disk=False solo se usa la caché en memoria.
+        """
+        with self._lock:
+            # Los ficheros de logo y de relleno pueden cambiar en disco con
+            # la misma ruta: su versión forma parte de la clave
+            versions = ()
+            try:
+                if params.logo_path and logo is None:
+                    versions += (file_key(params.logo_path),)
+                if params.fill_mode == "image" and params.fill_image_path:
+                    versions += (file_key(params.fill_image_path),)
+            except OSError as e:
+                raise LogoError(e) from e
+            key = (params,) + versions if versions else params
+            final_image = self.outputs.get(key)
+            if final_image is not None:
+                return final_image
+
+            # El logo ya decodificado no tiene versión de fichero: sin disco
+            disk_cache = self.disk_cache if logo is None and use_disk else None
+            if disk_cache is not None:
+                final_image = disk_cache.get_output(params)
+                if final_image is not None:
+                    self.outputs.put(key, final_image)
+                    return final_image
+
+            # compose_image() pinta en su propio lienzo: el raster en caché
+            # no se toca
+            qr_image = self.draw_modules(params)
+            final_image = compose_image(qr_image, params, logo)
+
+            # Sin post-producción la salida es el propio raster: ya está en caché
+            if final_image is not qr_image:
+                self.outputs.put(key, final_image)
+            if disk_cache is not None:
+                disk_cache.put_output(params, final_image)
+            return final_image
+
+    def modules_count(self, data, error_correction):
+        """
+        Módulos por lado del QR de data. Se puede llamar desde cualquier
+        hilo: usa el lock del render y solo la caché en memoria (tras la
+        vista previa la matriz ya está allí).
+        """
+        with self._lock:
+            return self.encode_qr(data, error_correction, use_disk=False).modules_count
+
+    def render_preview(self, params, max_px):
+        """
+        Renderiza a la resolución justa para verse en max_px píxeles: el
+        tamaño de módulo se reduce para que el QR quepa, en lugar de
+        renderizar a tamaño completo y luego descartar píxeles al escalar.
+        Solo usa la caché en memoria.
+        """
+        with self._lock:
+            # La matriz queda en memoria para las etapas siguientes
+            qr = self.encode_qr(params.data, params.error_correction, use_disk=False)
+        box_size = preview_box_size(qr.modules_count, params.border, params.box_size, max_px)
+        return self.render(scale_params(params, box_size), use_disk=False)
+
+    def clear(self):
+        self.matrices.clear()
+        self.layers.clear()
+        self.rasters.clear()
+        self.outputs.clear()
+
+    def stats(self):
+        """Aciertos, fallos y ocupación de cada etapa (y del disco, si hay)."""
+        stats = {
+            "matrices": self.matrices.stats(),
+            "layers": self.layers.stats(),
+            "rasters": self.rasters.stats(),
+            "outputs": self.outputs.stats(),
+        }
+        if self.disk_cache is not None:
+            stats["disk"] = self.disk_cache.stats()
+        return stats
@@ -0,0 +1,387 @@
+"""
+Servidor HTTP local de render (asyncio, sin dependencias externas).
+
+Expone el mismo pipeline que la interfaz para que otras aplicaciones pidan
+códigos QR por HTTP:
+
+    GET  /render?data=https://ejemplo.com&style=rounded&format=svg
+    POST /render   {"data": "...", "description": "...", "format": "png"}
+
+Los parámetros son los de la línea de comandos por lotes (style, engine,
+error_correction, box_size, border, fill_color, back_color, fill,
+fill_color2, logo, logo_size, border_radius) más format: png, svg o pdf.
+logo y fill_image son nombres de fichero dentro de --assets.
+
+* El render se hace en un pool de procesos; el bucle de eventos solo
+  atiende conexiones.
+* Cada respuesta se identifica con un hash de los parámetros canónicos y
+  del contenido de los ficheros de logo/relleno (el mismo que usa la caché
+  de disco, qrstudio.diskcache). Ese hash es su ETag y la clave de una
+  caché LRU en memoria: las peticiones repetidas no renderizan y las que
+  traen If-None-Match reciben un 304 sin cuerpo.
+* Varias peticiones iguales simultáneas comparten un único render.
+
+Ejemplo:
+    python -m qrstudio.server --port 8080 --assets logos/ -j 4
+"""
+import argparse
+import asyncio
+import io
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from urllib.parse import parse_qsl, urlsplit
+
+from qrcode.exceptions import DataOverflowError
+
+from qrstudio.batch import parse_color
+from qrstudio.cache import LRUCache
+from qrstudio.diskcache import params_key
+from qrstudio.masks import FILL_MODES
+from qrstudio.render import (
+    LogoError, RENDER_ENGINES, RenderParams, render_qr, resolve_error_correction,
+    resolve_style
+)
+from qrstudio.vector import VectorLayout, write_pdf, write_svg
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+    "pdf": "application/pdf",
+}
+# Límites de la petición
+MAX_BODY_BYTES = 1024 * 1024
+MAX_HEADER_LINES = 100
+MAX_BOX_SIZE = 100
+# Mismo máximo que el borde de la interfaz (módulos)
+MAX_BORDER = 99
+# Radio de borde (px): el slider de la interfaz llega a 100 con módulos de
+# 10 px; aquí se permite lo mismo en proporción con MAX_BOX_SIZE
+MAX_BORDER_RADIUS = 1000
+# Tamaño del logo (% de la altura), el rango del slider de la interfaz
+LOGO_SIZE_RANGE = (10, 50)
+# La descripción alarga el lienzo: cada línea suma una fila de texto
+MAX_DESCRIPTION_CHARS = 500
+MAX_DESCRIPTION_LINES = 10
+# Tiempo sin actividad tras el que se cierra una conexión keep-alive (s)
+KEEP_ALIVE_TIMEOUT = 15
+
+REASONS = {
+    200: "OK", 304: "Not Modified", 400: "Bad Request", 404: "Not Found",
+    405: "Method Not Allowed", 413: "Payload Too Large", 414: "URI Too Long",
+    431: "Request Header Fields Too Large", 500: "Internal Server Error",
+}
+
+
+class RequestError(Exception):
+    """Error de la petición que se devuelve al cliente con su código HTTP."""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _asset_path(assets_dir, name):
+    """Ruta de un fichero de --assets, sin permitir salir de la carpeta."""
+    if not assets_dir:
+        raise RequestError(400, "El servidor no tiene carpeta de recursos (--assets)")
+    root = os.path.realpath(assets_dir)
+    path = os.path.realpath(os.path.join(root, name))
+    if os.path.commonpath([root, path]) != root or not os.path.isfile(path):
+        raise RequestError(400, f"Recurso no encontrado: {name}")
+    return path
+
+
+def _int_param(values, name, default, low, high):
+    """Entero name de values (se quita), o ValueError si no está en [low, high]."""
+    value = int(values.pop(name, default))
+    if not low <= value <= high:
+        raise ValueError(f"{name} debe estar entre {low} y {high}")
+    return value
+
+
+def params_from_mapping(values, assets_dir=None):
+    """
+    Construye (RenderParams, formato) a partir de un dict de parámetros
+    (del JSON o de la query string). Los valores pueden venir como texto.
+    """
+    values = dict(values)
+    fmt = str(values.pop("format", "png")).lower()
+    if fmt not in CONTENT_TYPES:
+        raise RequestError(400, f"Formato no soportado: {fmt}")
+    data = values.pop("data", None)
+    if not data:
+        raise RequestError(400, "Falta el parámetro 'data'")
+
+    try:
+        fill_mode = values.pop("fill", "solid")
+        if fill_mode not in FILL_MODES.values():
+            raise ValueError(f"Relleno desconocido: {fill_mode}")
+        engine = str(values.pop("engine", "numpy"))
+        if engine not in RENDER_ENGINES.values():
+            raise ValueError(f"Motor desconocido: {engine}")
+        # Límites para que una petición no pueda pedir una imagen enorme y
+        # tumbar un proceso del pool
+        box_size = _int_param(values, "box_size", 10, 1, MAX_BOX_SIZE)
+        border = _int_param(values, "border", 4, 0, MAX_BORDER)
+        border_radius = _int_param(values, "border_radius", 0, 0, MAX_BORDER_RADIUS)
+        logo_size = _int_param(values, "logo_size", 25, *LOGO_SIZE_RANGE)
+        description = str(values.pop("description", ""))
+        if len(description) > MAX_DESCRIPTION_CHARS:
+            raise ValueError(f"description admite como mucho {MAX_DESCRIPTION_CHARS} caracteres")
+        if len(description.splitlines()) > MAX_DESCRIPTION_LINES:
+            raise ValueError(f"description admite como mucho {MAX_DESCRIPTION_LINES} líneas")
+        logo = values.pop("logo", None)
+        fill_image = values.pop("fill_image", None)
+        params = RenderParams(
+            data=str(data),
+            description=description,
+            error_correction=resolve_error_correction(str(values.pop("error_correction", "H"))),
+            style=resolve_style(str(values.pop("style", "Cuadrado"))),
+            box_size=box_size,
+            border=border,
+            fill_color=parse_color(str(values.pop("fill_color", "#000000"))),
+            back_color=parse_color(str(values.pop("back_color", "#ffffff"))),
+            logo_path=_asset_path(assets_dir, logo) if logo else None,
+            logo_ratio=logo_size / 100.0,
+            border_radius=border_radius,
+            engine=engine,
+            fill_mode=fill_mode,
+            fill_color2=parse_color(str(values.pop("fill_color2", "#0000ff"))),
+            fill_image_path=_asset_path(assets_dir, fill_image) if fill_image else None,
+        )
+    except (ValueError, TypeError, argparse.ArgumentTypeError) as e:
+        raise RequestError(400, str(e)) from e
+    if values:
+        raise RequestError(400, f"Parámetros desconocidos: {', '.join(sorted(values))}")
+    if params.fill_mode == "image" and not params.fill_image_path:
+        raise RequestError(400, "fill=image necesita fill_image")
+    return params, fmt
+
+
+def render_bytes(params, fmt):
+    """Renderiza params en el formato pedido y devuelve los bytes (en el pool)."""
+    buffer = io.BytesIO()
+    if fmt == "png":
+        render_qr(params).save(buffer, "PNG")
+    else:
+        writer = write_svg if fmt == "svg" else write_pdf
+        writer(VectorLayout(params), buffer)
+    return buffer.getvalue()
+
+
+def _pool_context():
+    """
+    Los procesos del pool se crean a demanda, con conexiones ya abiertas: un
+    fork heredaría sus sockets y el cliente no vería el cierre. forkserver
+    arranca los procesos desde un servidor limpio (donde existe).
+    """
+    if "forkserver" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("forkserver")
+    return multiprocessing.get_context()
+
+
+class RenderServer:
+    """
+    Atiende peticiones HTTP/1.1 (con keep-alive) y reparte los renders en
+    un pool de procesos, con caché de respuestas por hash de parámetros.
+    """
+
+    def __init__(self, jobs=None, cache_bytes=256 * 1024 * 1024, assets_dir=None):
+        self.pool = ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1,
+                                        mp_context=_pool_context())
+        self.cache = LRUCache(cache_bytes, len)
+        self.assets_dir = assets_dir
+        self._in_flight = {}  # clave -> Future de un render en curso
+        self.requests = 0
+        self.renders = 0
+
+    async def get_response(self, key, params, fmt):
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        future = self._in_flight.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self.pool, render_bytes, params, fmt)
+            self._in_flight[key] = future
+            self.renders += 1
+            # Se guarda en caché al terminar, aunque quien lo pidió ya se
+            # haya ido
+            future.add_done_callback(lambda done: self._render_done(key, done))
+        # shield: si se cancela la tarea de un cliente (se desconecta), el
+        # render sigue para los demás que lo esperan
+        return await asyncio.shield(future)
+
+    def _render_done(self, key, future):
+        self._in_flight.pop(key, None)
+        if not future.cancelled() and future.exception() is None:
+            self.cache.put(key, future.result())
+
+    async def handle_request(self, method, target, headers, body):
+        """Devuelve (estado, cabeceras, cuerpo)."""
+        url = urlsplit(target)
+        if url.path != "/render":
+            raise RequestError(404, f"Ruta desconocida: {url.path}")
+        if method == "GET":
+            values = dict(parse_qsl(url.query, keep_blank_values=True))
+        elif method == "POST":
+            try:
+                values = json.loads(body or b"{}")
+            except ValueError as e:
+                raise RequestError(400, f"JSON no válido: {e}") from e
+            if not isinstance(values, dict):
+                raise RequestError(400, "El cuerpo debe ser un objeto JSON")
+        else:
+            raise RequestError(405, f"Método no permitido: {method}")
+
+        params, fmt = params_from_mapping(values, self.assets_dir)
+        try:
+            key = params_key(params, fmt)
+        except OSError as e:
+            raise RequestError(400, str(e)) from e
+        etag = f'"{key}"'
+        response_headers = {"ETag": etag, "Cache-Control": "no-cache"}
+
+        if etag in (tag.strip() for tag in headers.get("if-none-match", "").split(",")):
+            return 304, response_headers, b""
+
+        try:
+            content = await self.get_response(key, params, fmt)
+        except (ValueError, OSError, DataOverflowError, LogoError) as e:
+            # Datos que no caben en un QR, logo ilegible...
+            raise RequestError(400, str(e)) from e
+        response_headers["Content-Type"] = CONTENT_TYPES[fmt]
+        return 200, response_headers, content
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(_read_request(reader), KEEP_ALIVE_TIMEOUT)
+                except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+                    break
+                except RequestError as e:
+                    await _send(writer, e.status, {}, _error_body(e), keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers, body = request
+                self.requests += 1
+                try:
+                    status, response_headers, content = await self.handle_request(
+                        method, target, headers, body
+                    )
+                except RequestError as e:
+                    status, response_headers, content = e.status, {}, _error_body(e)
+                except Exception as e:
+                    status, response_headers, content = 500, {}, _error_body(e)
+
+                keep_alive = (headers.get("connection", "").lower() != "close"
+                              and version == "HTTP/1.1")
+                await _send(writer, status, response_headers, content, keep_alive)
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+
+async def _readline(reader, status, message):
+    """Una línea; si pasa del límite del stream (64 KB), RequestError(status)."""
+    try:
+        return await reader.readline()
+    except (ValueError, asyncio.LimitOverrunError):
+        raise RequestError(status, message)
+
+
+async def _read_request(reader):
+    """Lee una petición: (método, destino, versión, cabeceras, cuerpo) o None."""
+    line = await _readline(reader, 414, "Línea de petición demasiado larga")
+    if not line:
+        return None
+    try:
+        method, target, version = line.decode("latin-1").split()
+    except ValueError:
+        raise RequestError(400, "Línea de petición no válida")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await _readline(reader, 431, "Cabecera demasiado larga")
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise RequestError(400, "Demasiadas cabeceras")
+
+    try:
+        length = int(headers.get("content-length") or 0)
+    except ValueError:
+        raise RequestError(400, "Content-Length no válido")
+    if length < 0:
+        raise RequestError(400, "Content-Length no válido")
+    if length > MAX_BODY_BYTES:
+        raise RequestError(413, "Cuerpo demasiado grande")
+    body = await reader.readexactly(length) if length else b""
+    return method.upper(), target, version, headers, body
+
+
+def _error_body(error):
+    return json.dumps({"error": str(error)}, ensure_ascii=False).encode("utf-8")
+
+
+async def _send(writer, status, headers, body, keep_alive):
+    headers = dict(headers)
+    headers.setdefault("Content-Type", "application/json; charset=utf-8")
+    headers["Content-Length"] = str(len(body))
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    head = f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+    head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+    writer.write(head.encode("latin-1") + b"\r\n" + body)
+    await writer.drain()
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m qrstudio.server",
+        description="Servidor HTTP local que renderiza códigos QR (PNG, SVG o PDF)."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Dirección en la que escuchar")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Procesos de render (por defecto, uno por CPU)")
+    parser.add_argument("--cache-mb", type=int, default=256, help="Memoria para la caché de respuestas (MB)")
+    parser.add_argument("--assets", help="Carpeta con los logos e imágenes de relleno que se pueden usar")
+    return parser
+
+
+async def serve(args):
+    server = RenderServer(args.jobs, args.cache_mb * 1024 * 1024, args.assets)
+    listener = await asyncio.start_server(server.handle_connection, args.host, args.port)
+    print(f"Sirviendo en http://{args.host}:{args.port}/render (Ctrl+C para salir)")
+    start = time.perf_counter()
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        server.close()
+        elapsed = time.perf_counter() - start
+        print(f"{server.requests} peticiones, {server.renders} renders en {elapsed:.0f} s.")
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
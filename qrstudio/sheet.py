@@ -0,0 +1,389 @@
+"""
+Hojas de etiquetas: muchos códigos QR por página en un PDF (N-up).
+
+Coloca las filas de un manifiesto (el mismo de qrstudio.batch) en una
+rejilla de columnas x filas sobre A4, Carta u otro papel, con márgenes,
+separación entre etiquetas y sangrado. Cada etiqueta se escala para
+caber en su celda y se centra en ella.
+
+* Las páginas se generan en paralelo en un pool de procesos y llegan ya
+  comprimidas; el proceso principal solo las escribe, en orden, con
+  vector.PdfWriter. Nunca hay más de unas pocas páginas en vuelo, así que
+  la memoria no crece con el número de etiquetas.
+* Con relleno sólido las etiquetas son vectoriales (la misma geometría que
+  la exportación PDF); con degradados o imagen de relleno se incrusta el
+  raster de render_qr, a la resolución que da --box-size. El logo, el
+  círculo de los módulos y la fuente se escriben una sola vez y los
+  comparten todas las páginas.
+* El sangrado extiende el color de fondo de cada celda más allá de la
+  línea de corte, para que el troquel no deje filos blancos.
+
+Ejemplo:
+    python -m qrstudio.sheet campaña.csv -o etiquetas.pdf --paper a4 --columns 3 --rows 8 --bleed 2
+"""
+import argparse
+import dataclasses
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from itertools import chain, repeat
+
+from qrstudio.batch import (
+    add_style_arguments, check_row, check_style, chunked, read_manifest, style_from_args
+)
+from qrstudio.diskcache import DEFAULT_MAX_BYTES, DiskCache, default_cache_dir
+from qrstudio.logo import LOGO_CACHE
+from qrstudio.render import encode_qr, load_logo, render_qr
+from qrstudio.vector import (
+    LOGO_MAX_PIXELS, PDF_FONT, PdfWriter, VectorLayout, pdf_circle, pdf_content,
+    pdf_image, pdf_stream
+)
+
+# Puntos PDF por milímetro
+MM = 72 / 25.4
+
+# Tamaños de papel (ancho, alto) en mm, en vertical
+PAPER_SIZES = {
+    "a3": (297, 420),
+    "a4": (210, 297),
+    "a5": (148, 210),
+    "letter": (215.9, 279.4),
+    "legal": (215.9, 355.6),
+}
+
+# Objetos comunes a todas las páginas; los de cada página van detrás
+CATALOG, PAGES, FONT, LOGO, LOGO_MASK, CIRCLE = range(1, 7)
+SHARED_OBJECTS = 6
+
+# Estilo, hoja, modo y caché de disco de cada proceso trabajador (se
+# rellenan en _init_worker)
+_worker_style = None
+_worker_sheet = None
+_worker_raster = False
+_worker_cache = None
+
+
+def _pt(value):
+    """Coordenada en puntos, compacta (hasta milésimas)."""
+    text = f"{value:.3f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _rgb(color):
+    return " ".join(_pt(c / 255) for c in color[:3])
+
+
+@dataclass(frozen=True)
+class SheetLayout:
+    """
+    Rejilla de etiquetas de una página. Todas las medidas van en mm.
+
+    margin es el margen en los cuatro lados de la página, gap la separación
+    entre etiquetas y bleed cuánto se extiende el fondo fuera de cada celda.
+    """
+    width: float = 210
+    height: float = 297
+    columns: int = 3
+    rows: int = 8
+    margin: float = 10
+    gap: float = 0
+    bleed: float = 0
+
+    def __post_init__(self):
+        if self.columns < 1 or self.rows < 1:
+            raise ValueError("La rejilla necesita al menos una columna y una fila")
+        if min(self.margin, self.gap, self.bleed) < 0:
+            raise ValueError("Los márgenes, la separación y el sangrado no pueden ser negativos")
+        cell_width, cell_height = self.cell_size
+        if cell_width <= 0 or cell_height <= 0:
+            raise ValueError(f"Las etiquetas no caben en la página: {self.columns}x{self.rows} "
+                             f"en {self.width:g}x{self.height:g} mm con margen {self.margin:g} mm")
+
+    @property
+    def per_page(self):
+        return self.columns * self.rows
+
+    @property
+    def cell_size(self):
+        """(ancho, alto) de cada celda en mm."""
+        return ((self.width - 2 * self.margin - (self.columns - 1) * self.gap) / self.columns,
+                (self.height - 2 * self.margin - (self.rows - 1) * self.gap) / self.rows)
+
+    def cells(self):
+        """(x, y, ancho, alto) de cada celda en puntos, por filas y con y desde arriba."""
+        cell_width, cell_height = self.cell_size
+        return [((self.margin + column * (cell_width + self.gap)) * MM,
+                 (self.margin + row * (cell_height + self.gap)) * MM,
+                 cell_width * MM, cell_height * MM)
+                for row in range(self.rows) for column in range(self.columns)]
+
+
+def paper_size(name, landscape=False):
+    """(ancho, alto) en mm de un nombre de PAPER_SIZES o de "ANCHOxALTO"."""
+    size = PAPER_SIZES.get(name.lower())
+    if size is None:
+        try:
+            size = tuple(float(v) for v in name.lower().split("x"))
+        except ValueError:
+            size = ()
+        if len(size) != 2 or min(size) <= 0:
+            raise ValueError(f"Papel no válido: {name} (usa {', '.join(PAPER_SIZES)} o ANCHOxALTO en mm)")
+    return (max(size), min(size)) if landscape else size
+
+
+def is_raster(style):
+    """Las etiquetas van como imagen si el relleno no se puede exportar en vectorial."""
+    return style.fill_mode != "solid"
+
+
+def _page_resources(style, raster):
+    """XObjects y fuentes comunes que usan las páginas."""
+    if raster:
+        return [], []
+    xobjects = []
+    if style.logo_path:
+        xobjects.append(f"/Im1 {LOGO} 0 R")
+    if style.style == "Círculo":
+        xobjects.append(f"/C {CIRCLE} 0 R")
+    return xobjects, [f"/F1 {FONT} 0 R"]
+
+
+def objects_per_page(sheet, raster):
+    """Números de objeto que se reservan por página (página, contenido e imágenes)."""
+    return 2 + (2 * sheet.per_page if raster else 0)
+
+
+def render_page(rows, first, style, sheet, raster=False, encode=encode_qr):
+    """
+    Objetos PDF de una página de etiquetas: la página es el objeto first,
+    su contenido first + 1 y, con raster, las imágenes los siguientes.
+
+    rows son tuplas (índice, fila de read_manifest), como mucho
+    sheet.per_page. Devuelve ({número: bytes}, [(índice, error)]); la celda
+    de una fila que falla (o que no es válida) se queda vacía.
+    """
+    page_height = sheet.height * MM
+    cells = sheet.cells()[:len(rows)]
+    ops = []
+    if sheet.bleed:
+        bleed = sheet.bleed * MM
+        ops.append(f"{_rgb(style.back_color)} rg")
+        ops.extend(f"{_pt(x - bleed)} {_pt(page_height - y - h - bleed)} "
+                   f"{_pt(w + 2 * bleed)} {_pt(h + 2 * bleed)} re"
+                   for x, y, w, h in cells)
+        ops.append("f")
+    content = ["\n".join(ops).encode("ascii")] if ops else []
+
+    objects = {}
+    errors = []
+    xobjects, fonts = _page_resources(style, raster)
+    for k, ((index, row), (x, y, w, h)) in enumerate(zip(rows, cells)):
+        try:
+            data, description, _ = check_row(row)
+            params = dataclasses.replace(style, data=data, description=description)
+            qr = encode(params.data, params.error_correction)
+            if raster:
+                image = render_qr(params, qr=qr)
+                label_width, label_height = image.size
+                number = first + 2 + 2 * k
+                # La máscara solo hace falta si hay transparencia (radio de borde)
+                if image.getextrema()[3][0] < 255:
+                    objects[number], objects[number + 1] = pdf_image(image, smask=number + 1)
+                else:
+                    objects[number] = pdf_image(image)
+                xobjects.append(f"/R{k} {number} 0 R")
+                label = (f"q {label_width} 0 0 {-label_height} 0 {label_height} cm "
+                         f"/R{k} Do Q").encode("ascii")
+            else:
+                layout = VectorLayout(params, qr)
+                label_width, label_height = layout.width, layout.height
+                label = pdf_content(layout)
+        except Exception as e:
+            errors.append((index, str(e)))
+            continue
+        # Unidades de la etiqueta (píxeles del raster) a puntos, centrada y
+        # con el origen arriba a la izquierda
+        scale = min(w / label_width, h / label_height)
+        left = x + (w - label_width * scale) / 2
+        top = y + (h - label_height * scale) / 2
+        content.append(f"q {scale:.6g} 0 0 {-scale:.6g} {_pt(left)} {_pt(page_height - top)} cm\n"
+                       .encode("ascii") + label + b"\nQ")
+
+    resources = []
+    if xobjects:
+        resources.append(f"/XObject << {' '.join(xobjects)} >>")
+    if fonts:
+        resources.append(f"/Font << {' '.join(fonts)} >>")
+    objects[first] = (f"<< /Type /Page /Parent {PAGES} 0 R "
+                      f"/MediaBox [0 0 {_pt(sheet.width * MM)} {_pt(page_height)}] "
+                      f"/Resources << {' '.join(resources)} >> /Contents {first + 1} 0 R >>"
+                      ).encode("ascii")
+    objects[first + 1] = pdf_stream("", b"\n".join(content))
+    return objects, errors
+
+
+def _init_worker(style, sheet, raster, cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+    """Inicializa el proceso: el logo se decodifica una sola vez."""
+    global _worker_style, _worker_sheet, _worker_raster, _worker_cache
+    _worker_style = style
+    _worker_sheet = sheet
+    _worker_raster = raster
+    _worker_cache = DiskCache(cache_dir, cache_bytes) if cache_dir else None
+    if style.logo_path:
+        load_logo(style.logo_path)
+
+
+def _render_page(rows, first):
+    encode = _worker_cache.encode_qr if _worker_cache is not None else encode_qr
+    return render_page(rows, first, _worker_style, _worker_sheet, _worker_raster, encode)
+
+
+def _write_shared(writer, style, raster):
+    """Catálogo y objetos comunes (logo, círculo y fuente)."""
+    writer.reserve(SHARED_OBJECTS)
+    writer.add(CATALOG, f"<< /Type /Catalog /Pages {PAGES} 0 R >>".encode("ascii"))
+    if raster:
+        return
+    writer.add(FONT, PDF_FONT)
+    if style.logo_path:
+        logo = LOGO_CACHE.thumbnail(style.logo_path, LOGO_MAX_PIXELS)
+        image, mask = pdf_image(logo, smask=LOGO_MASK)
+        writer.add(LOGO, image)
+        writer.add(LOGO_MASK, mask)
+    if style.style == "Círculo":
+        writer.add(CIRCLE, pdf_circle(style.box_size / 2))
+
+
+def run_sheets(rows, file, style, sheet, jobs=None, raster=None,
+               cache_dir=None, cache_bytes=DEFAULT_MAX_BYTES):
+    """
+    Escribe en file (binario) el PDF con las filas en hojas de etiquetas y
+    va devolviendo (página, etiquetas, errores) a medida que se escribe
+    cada página, en orden. errores son tuplas (índice, mensaje).
+
+    Con jobs=1 se renderiza en el proceso actual, sin pool. raster=None
+    elige según el relleno (is_raster). Con cache_dir se reutilizan las
+    codificaciones de la caché de disco.
+    """
+    raster = is_raster(style) if raster is None else raster
+    jobs = jobs or os.cpu_count() or 1
+    pages = chunked(enumerate(rows), sheet.per_page)
+    worker_args = (style, sheet, raster, cache_dir, cache_bytes)
+
+    writer = PdfWriter(file)
+    _write_shared(writer, style, raster)
+    kids = []
+
+    def write_page(rows_in_page, objects, errors):
+        for number in sorted(objects):
+            writer.add(number, objects[number])
+        kids.append(min(objects))
+        return len(kids), len(rows_in_page) - len(errors), errors
+
+    if jobs == 1:
+        _init_worker(*worker_args)
+        for page in pages:
+            first = writer.reserve(objects_per_page(sheet, raster))
+            yield write_page(page, *_render_page(page, first))
+    else:
+        # Como mucho 2 páginas por proceso en vuelo, y se escriben en el
+        # orden en que se pidieron
+        max_pending = jobs * 2
+        with ProcessPoolExecutor(
+            max_workers=jobs, initializer=_init_worker, initargs=worker_args
+        ) as pool:
+            pending = deque()
+            for page in pages:
+                if len(pending) >= max_pending:
+                    done_page, future = pending.popleft()
+                    yield write_page(done_page, *future.result())
+                first = writer.reserve(objects_per_page(sheet, raster))
+                pending.append((page, pool.submit(_render_page, page, first)))
+            while pending:
+                done_page, future = pending.popleft()
+                yield write_page(done_page, *future.result())
+
+    kids_refs = " ".join(f"{number} 0 R" for number in kids)
+    writer.add(PAGES, f"<< /Type /Pages /Kids [{kids_refs}] /Count {len(kids)} >>"
+               .encode("ascii"))
+    writer.close(CATALOG)
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m qrstudio.sheet",
+        description="Compone hojas de etiquetas (varios QR por página) en un PDF a partir de un CSV o JSONL."
+    )
+    parser.add_argument("manifest", help="Fichero CSV o JSONL con las columnas data y description")
+    parser.add_argument("-o", "--output", default="etiquetas.pdf", help="PDF de salida")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="Formato del manifiesto (por defecto, según la extensión)")
+    parser.add_argument("-j", "--jobs", type=int, default=None, help="Número de procesos (por defecto, uno por CPU)")
+    parser.add_argument("--copies", type=int, default=1, help="Etiquetas seguidas de cada fila")
+    parser.add_argument("--raster", action="store_true", help="Incrustar las etiquetas como imagen aunque el relleno sea sólido")
+    parser.add_argument("--cache-dir", default=default_cache_dir(), help="Carpeta de la caché de disco (compartida con la interfaz)")
+    parser.add_argument("--cache-mb", type=int, default=DEFAULT_MAX_BYTES // (1024 * 1024), help="Tamaño máximo de la caché de disco (MB)")
+    parser.add_argument("--no-cache", action="store_true", help="No leer ni guardar en la caché de disco")
+
+    sheet = parser.add_argument_group("hoja (medidas en mm)")
+    sheet.add_argument("--paper", default="a4", help=f"{', '.join(PAPER_SIZES)} o ANCHOxALTO")
+    sheet.add_argument("--landscape", action="store_true", help="Papel en horizontal")
+    sheet.add_argument("--columns", type=int, default=3, help="Etiquetas por fila")
+    sheet.add_argument("--rows", type=int, default=8, help="Filas de etiquetas por página")
+    sheet.add_argument("--margin", type=float, default=10, help="Margen de la página")
+    sheet.add_argument("--gap", type=float, default=0, help="Separación entre etiquetas")
+    sheet.add_argument("--bleed", type=float, default=0, help="Sangrado: el fondo se extiende fuera de cada etiqueta")
+    add_style_arguments(parser)
+    return parser
+
+
+def sheet_from_args(args):
+    width, height = paper_size(args.paper, args.landscape)
+    return SheetLayout(width, height, args.columns, args.rows, args.margin, args.gap, args.bleed)
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    try:
+        style = style_from_args(args)
+        sheet = sheet_from_args(args)
+        check_style(style)
+        if args.copies < 1:
+            raise ValueError("--copies tiene que ser al menos 1")
+    except (OSError, ValueError, argparse.ArgumentTypeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 2
+
+    cache_dir = None if args.no_cache else args.cache_dir
+    if cache_dir:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+        except OSError as e:
+            print(f"Aviso: sin caché de disco ({e})", file=sys.stderr)
+            cache_dir = None
+
+    rows = read_manifest(args.manifest, args.format)
+    if args.copies > 1:
+        rows = chain.from_iterable(repeat(row, args.copies) for row in rows)
+
+    start = time.perf_counter()
+    pages = labels = failed = 0
+    with open(args.output, "wb") as f:
+        for pages, done, errors in run_sheets(rows, f, style, sheet, args.jobs,
+                                              args.raster or None, cache_dir,
+                                              args.cache_mb * 1024 * 1024):
+            labels += done
+            failed += len(errors)
+            for index, error in errors:
+                print(f"Etiqueta {index}: {error}", file=sys.stderr)
+
+    elapsed = time.perf_counter() - start
+    rate = labels / elapsed if elapsed > 0 else 0.0
+    print(f"{labels} etiquetas en {pages} páginas ({args.output}) en {elapsed:.1f} s ({rate:.0f} etiquetas/s).")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
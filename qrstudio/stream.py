@@ -0,0 +1,257 @@
+"""
+Exportación por franjas para impresión en gran formato.
+
+Con tamaños de módulo de 100 o más, el pipeline en memoria reserva varios
+lienzos RGBA completos (módulos, lienzo de la descripción, máscara "L" y
+salida del radio) más el buffer del fichero: gigabytes para un póster.
+Aquí la imagen se genera y se escribe por franjas horizontales:
+
+* Los módulos salen directamente de los sellos de qrstudio.fastdraw, fila
+  a fila, y la máscara de color se aplica a la franja con sus coordenadas
+  en el lienzo completo.
+* El logo, el texto y la máscara del radio se dibujan desplazados sobre
+  la franja; PIL recorta lo que queda fuera.
+* Cada franja se escribe enseguida en un PNG o TIFF que se va componiendo
+  en streaming.
+
+La memoria depende del ancho y de STRIP_ROWS, no del alto. Los píxeles son
+idénticos a los de render_qr() (los bytes del fichero no, porque la
+compresión es distinta a la de PIL).
+"""
+import os
+import struct
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from qrstudio.fastdraw import draw_module_rows, module_stamp_indices, packed_stamps
+from qrstudio.logo import LOGO_CACHE
+from qrstudio.masks import apply_color_mask
+from qrstudio.render import (
+    MODULE_DRAWERS, LogoError, description_layout, encode_qr, has_description,
+    round_corners
+)
+
+# Filas por franja
+STRIP_ROWS = 256
+# Píxeles a partir de los que la interfaz exporta por franjas (~64 MB en RGBA)
+STREAM_THRESHOLD = 16_000_000
+# Extensiones que se pueden escribir por franjas
+STREAM_FORMATS = {".png": "PNG", ".tif": "TIFF", ".tiff": "TIFF"}
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+
+class StripRenderer:
+    """
+    Genera por franjas la misma imagen que render_qr(params).
+
+    width y height son las dimensiones finales; strip(y0, y1) devuelve las
+    filas y0..y1 como imagen PIL RGBA.
+    """
+
+    def __init__(self, params, qr=None):
+        self.params = params
+        qr = qr or encode_qr(params.data, params.error_correction)
+        drawer = MODULE_DRAWERS[params.style]()
+        self.solid = params.fill_mode == "solid"
+
+        self.indices = module_stamp_indices(qr.modules, drawer.needs_neighbors)
+        self.stamps32 = packed_stamps(
+            drawer, params.box_size, params.fill_color if self.solid else None,
+            params.back_color
+        )
+        self.back32 = np.array([(*params.back_color, 255)], dtype=np.uint8).view(np.uint32)[0]
+
+        self.qr_size = (qr.modules_count + 2 * params.border) * params.box_size
+        self.width = self.height = self.qr_size
+
+        self.text = None
+        if has_description(params.description):
+            self.text, self.text_y, self.height = description_layout(
+                self.qr_size, self.qr_size, params.description
+            )
+            self.text_rows = (self.text_y + self.text.bbox[1], self.text_y + self.text.bbox[3])
+
+        self.logo = None
+        if params.logo_path:
+            try:
+                # Mismo tamaño que logo_max_size() sobre el lienzo de módulos
+                max_size = int(self.qr_size * params.logo_ratio)
+                self.logo = LOGO_CACHE.thumbnail(params.logo_path, max_size)
+            except Exception as e:
+                raise LogoError(e) from e
+            self.logo_xy = ((self.qr_size - self.logo.width) // 2,
+                            (self.qr_size - self.logo.height) // 2)
+
+    def strip(self, y0, y1):
+        params = self.params
+        rows = np.full((y1 - y0, self.width), self.back32, dtype=np.uint32)
+
+        # 1. Módulos (y máscara de color) de las filas que caen en el QR
+        qr_end = min(y1, self.qr_size)
+        if y0 < qr_end:
+            rows[:qr_end - y0] = draw_module_rows(
+                self.indices, self.stamps32, params.box_size, params.border,
+                self.back32, y0, qr_end
+            )
+            if not self.solid:
+                pixels = rows[:qr_end - y0].view(np.uint8).reshape(qr_end - y0, self.width, 4)
+                apply_color_mask(pixels, params.back_color, params.fill_mode,
+                                 params.fill_color, params.fill_color2,
+                                 params.fill_image_path, top=y0, canvas_height=self.qr_size)
+
+        image = Image.fromarray(rows.view(np.uint8).reshape(y1 - y0, self.width, 4), "RGBA")
+
+        # 2. Logo y descripción, desplazados a las coordenadas de la franja
+        if self.logo is not None:
+            logo_x, logo_y = self.logo_xy
+            if logo_y < y1 and logo_y + self.logo.height > y0:
+                image.paste(self.logo, (logo_x, logo_y - y0), mask=self.logo)
+        if self.text is not None and self.text_rows[0] < y1 and self.text_rows[1] > y0:
+            self.text.paste(image, self.text_y - y0, params.fill_color)
+
+        # 3. Radio: solo las franjas que tocan las esquinas
+        radius = params.border_radius
+        if radius > 0 and (y0 <= radius + 1 or y1 >= self.height - radius - 2):
+            round_corners(image, radius, top=y0, canvas_height=self.height)
+        return image
+
+    def strips(self, strip_rows=STRIP_ROWS):
+        """Itera las franjas de arriba abajo como (y0, imagen)."""
+        for y0 in range(0, self.height, strip_rows):
+            yield y0, self.strip(y0, min(y0 + strip_rows, self.height))
+
+
+def _png_chunk(kind, data):
+    return (struct.pack(">I", len(data)) + kind + data
+            + struct.pack(">I", zlib.crc32(kind + data)))
+
+
+class PNGStripWriter:
+    """PNG RGBA de 8 bits escrito por franjas (filtro Up, zlib en streaming)."""
+
+    def __init__(self, file, width, height, compress_level=6):
+        self.file = file
+        self._zlib = zlib.compressobj(compress_level)
+        self._previous = np.zeros(width * 4, dtype=np.uint8)
+        file.write(PNG_SIGNATURE)
+        file.write(_png_chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 6, 0, 0, 0)))
+
+    def write(self, pixels):
+        """Añade filas (array uint8 filas x ancho x 4)."""
+        rows = pixels.reshape(len(pixels), -1)
+        filtered = np.empty((len(rows), rows.shape[1] + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # Up: diferencia con la fila anterior
+        filtered[0, 1:] = rows[0] - self._previous
+        filtered[1:, 1:] = rows[1:] - rows[:-1]
+        self._previous = rows[-1].copy()
+        data = self._zlib.compress(filtered)
+        if data:
+            self.file.write(_png_chunk(b"IDAT", data))
+
+    def close(self):
+        self.file.write(_png_chunk(b"IDAT", self._zlib.flush()))
+        self.file.write(_png_chunk(b"IEND", b""))
+
+
+class TIFFStripWriter:
+    """
+    TIFF RGBA de 8 bits con una tira comprimida (Deflate) por franja.
+
+    Las tiras se escriben según llegan y el directorio (IFD) va al final,
+    cuando ya se conocen sus posiciones. Es TIFF clásico: hasta 4 GB.
+    """
+
+    SHORT, LONG = 3, 4
+
+    def __init__(self, file, width, height, rows_per_strip, compress_level=6):
+        self.file = file
+        self.width = width
+        self.height = height
+        self.rows_per_strip = rows_per_strip
+        self.compress_level = compress_level
+        self.offsets = []
+        self.counts = []
+        self._start = file.tell()
+        # Cabecera little-endian; el offset del IFD se rellena al cerrar
+        file.write(b"II*\x00" + struct.pack("<I", 0))
+
+    def _tell(self):
+        return self.file.tell() - self._start
+
+    def write(self, pixels):
+        data = zlib.compress(np.ascontiguousarray(pixels), self.compress_level)
+        self.offsets.append(self._tell())
+        self.counts.append(len(data))
+        self.file.write(data)
+        if self._tell() > 0xFFFFFFFF:
+            raise ValueError("La imagen es demasiado grande para TIFF (más de 4 GB)")
+
+    def close(self):
+        if self._tell() % 2:
+            self.file.write(b"\x00")  # el IFD empieza en posición par
+        entries = [
+            (256, self.LONG, [self.width]),             # ImageWidth
+            (257, self.LONG, [self.height]),            # ImageLength
+            (258, self.SHORT, [8, 8, 8, 8]),            # BitsPerSample
+            (259, self.SHORT, [8]),                     # Compression: Deflate
+            (262, self.SHORT, [2]),                     # Photometric: RGB
+            (273, self.LONG, self.offsets),             # StripOffsets
+            (277, self.SHORT, [4]),                     # SamplesPerPixel
+            (278, self.LONG, [self.rows_per_strip]),    # RowsPerStrip
+            (279, self.LONG, self.counts),              # StripByteCounts
+            (284, self.SHORT, [1]),                     # PlanarConfig: contiguo
+            (338, self.SHORT, [2]),                     # ExtraSamples: alfa
+        ]
+        ifd_offset = self._tell()
+        extra_offset = ifd_offset + 2 + 12 * len(entries) + 4
+        ifd = struct.pack("<H", len(entries))
+        extra = b""
+        for tag, kind, values in entries:
+            fmt = "<%d%s" % (len(values), "H" if kind == self.SHORT else "I")
+            data = struct.pack(fmt, *values)
+            if len(data) <= 4:
+                ifd += struct.pack("<HHI", tag, kind, len(values)) + data.ljust(4, b"\x00")
+            else:
+                ifd += struct.pack("<HHII", tag, kind, len(values), extra_offset + len(extra))
+                extra += data
+        ifd += struct.pack("<I", 0)  # no hay más IFD
+        self.file.write(ifd + extra)
+        self.file.seek(self._start + 4)
+        self.file.write(struct.pack("<I", ifd_offset))
+        self.file.seek(0, os.SEEK_END)
+
+
+def stream_format(path):
+    """"PNG" o "TIFF" según la extensión, o None si no se puede por franjas."""
+    return STREAM_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def export_streamed(params, path, strip_rows=STRIP_ROWS, qr=None):
+    """
+    Renderiza params y lo escribe en path (PNG o TIFF) franja a franja.
+
+    Devuelve las dimensiones (ancho, alto). Si falla, no deja el fichero a
+    medio escribir.
+    """
+    fmt = stream_format(path)
+    if fmt is None:
+        raise ValueError(f"Formato no soportado para exportar por franjas: {path}")
+
+    renderer = StripRenderer(params, qr)
+    try:
+        with open(path, "wb") as f:
+            if fmt == "PNG":
+                writer = PNGStripWriter(f, renderer.width, renderer.height)
+            else:
+                writer = TIFFStripWriter(f, renderer.width, renderer.height, strip_rows)
+            for _, image in renderer.strips(strip_rows):
+                writer.write(np.asarray(image))
+            writer.close()
+    except BaseException:
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return renderer.width, renderer.height
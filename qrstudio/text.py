@@ -0,0 +1,236 @@
+"""
+Fuentes y disposición del texto de las descripciones.
+
+* La fuente se busca una sola vez por proceso: QRSTUDIO_FONT, una TTF
+  incluida en qrstudio/fonts/ o la primera de FONT_NAMES que haya en las
+  carpetas de fuentes del sistema (Arial en Windows; Liberation Sans,
+  DejaVu Sans... en Linux). Si no hay ninguna se usa la fuente escalable
+  que trae Pillow.
+* Las fuentes se guardan por tamaño y la disposición de cada descripción
+  (líneas, posiciones y máscara de cobertura) por texto y ancho del
+  lienzo: un render que repite la descripción no vuelve a medir ni a
+  rasterizar nada. El color se pinta después a través de la máscara, así
+  que no forma parte de la clave.
+* Las descripciones pueden tener varias líneas (cada una centrada) y la
+  fuente se reduce hasta que la línea más ancha cabe en el lienzo; si ni
+  al tamaño mínimo cabe, las líneas se parten por palabras.
+"""
+import os
+import sys
+import threading
+
+from PIL import Image, ImageDraw, ImageFont
+
+from qrstudio.cache import LRUCache, image_nbytes
+
+# Fuentes candidatas, por orden de preferencia (en minúsculas). Liberation
+# Sans y Arimo tienen las mismas medidas que Arial (y que la Helvetica de
+# la exportación vectorial)
+FONT_NAMES = (
+    "arial.ttf",
+    "liberationsans-regular.ttf",
+    "arimo-regular.ttf",
+    "helvetica.ttc",
+    "dejavusans.ttf",
+    "notosans-regular.ttf",
+    "freesans.ttf",
+)
+FONT_EXTENSIONS = (".ttf", ".otf", ".ttc")
+# Carpeta de fuentes que se distribuyen con la aplicación (opcional)
+BUNDLED_FONTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fonts")
+
+# Tamaño mínimo al que se reduce la fuente para que quepa el texto
+MIN_FONT_SIZE = 8
+# Margen a cada lado del texto (px)
+DESCRIPTION_PADDING_SIDE = 10
+# Espacio entre líneas, en proporción al tamaño de la fuente
+LINE_SPACING = 0.2
+
+_fonts = LRUCache(64, lambda font: 1)
+# Disposiciones de descripciones, por texto y ancho del lienzo
+_layouts = LRUCache(16 * 1024 * 1024, lambda layout: layout.nbytes)
+_font_lock = threading.Lock()
+_font_path = []  # [ruta o None] tras la primera búsqueda
+
+
+def font_dirs():
+    """Carpetas de fuentes del sistema y del usuario."""
+    home = os.path.expanduser("~")
+    if os.name == "nt":
+        windir = os.environ.get("WINDIR", r"C:\Windows")
+        local = os.environ.get("LOCALAPPDATA") or home
+        return [os.path.join(windir, "Fonts"),
+                os.path.join(local, "Microsoft", "Windows", "Fonts")]
+    if sys.platform == "darwin":
+        return ["/Library/Fonts", "/System/Library/Fonts",
+                os.path.join(home, "Library", "Fonts")]
+    data_dirs = os.environ.get("XDG_DATA_DIRS") or "/usr/local/share:/usr/share"
+    data_home = os.environ.get("XDG_DATA_HOME") or os.path.join(home, ".local", "share")
+    return ([os.path.join(d, "fonts") for d in data_dirs.split(":") if d]
+            + [os.path.join(data_home, "fonts"), os.path.join(home, ".fonts")])
+
+
+def _find_font():
+    path = os.environ.get("QRSTUDIO_FONT")
+    if path and os.path.isfile(path):
+        return path
+    try:
+        bundled = sorted(name for name in os.listdir(BUNDLED_FONTS_DIR)
+                         if name.lower().endswith(FONT_EXTENSIONS))
+    except OSError:
+        bundled = []
+    if bundled:
+        return os.path.join(BUNDLED_FONTS_DIR, bundled[0])
+
+    # Un solo recorrido de las carpetas; gana la primera de FONT_NAMES
+    found = {}
+    for folder in font_dirs():
+        for root, _, files in os.walk(folder):
+            for name in files:
+                found.setdefault(name.lower(), os.path.join(root, name))
+    for name in FONT_NAMES:
+        if name in found:
+            return found[name]
+    return None
+
+
+def font_path():
+    """
+    Ruta de la fuente de las descripciones, o None si se usa la de Pillow.
+    Se busca una vez por proceso.
+    """
+    with _font_lock:
+        if not _font_path:
+            _font_path.append(_find_font())
+        return _font_path[0]
+
+
+def load_font(font_size):
+    """La fuente de las descripciones al tamaño pedido (en caché)."""
+    font = _fonts.get(font_size)
+    if font is None:
+        path = font_path()
+        try:
+            font = ImageFont.truetype(path, font_size) if path \
+                else ImageFont.load_default(font_size)
+        except (OSError, TypeError):
+            # Fuente ilegible, o Pillow sin FreeType: la de mapa de bits
+            font = ImageFont.load_default()
+        _fonts.put(font_size, font)
+    return font
+
+
+def description_font_size(width):
+    """Tamaño de partida de la fuente para un lienzo de width píxeles."""
+    return max(15, width // 20)
+
+
+def split_lines(text):
+    return text.strip("\r\n").splitlines() or [""]
+
+
+def _text_width(font, line):
+    left, _, right, _ = font.getbbox(line)
+    return right - left
+
+
+def wrap_line(font, line, available):
+    """Parte una línea por palabras para que cada trozo quepa en available."""
+    pieces = []
+    current = ""
+    for word in line.split(" "):
+        candidate = f"{current} {word}" if current else word
+        if current and _text_width(font, candidate) > available:
+            pieces.append(current)
+            current = word
+        else:
+            current = candidate
+    pieces.append(current)
+    return pieces
+
+
+def fit_lines(lines, width):
+    """
+    Fuente y líneas para que el texto quepa en width píxeles (con los
+    márgenes): se reduce la fuente desde description_font_size() hasta
+    MIN_FONT_SIZE y, si aun así no cabe, se parten las líneas por palabras.
+    """
+    size = description_font_size(width)
+    font = load_font(size)
+    available = width - 2 * DESCRIPTION_PADDING_SIDE
+    widest = max(_text_width(font, line) for line in lines)
+    if widest <= available or size <= MIN_FONT_SIZE:
+        return font, lines
+    # El ancho es casi proporcional al tamaño: se estima y se ajusta
+    size = max(MIN_FONT_SIZE, size * max(available, 0) // widest)
+    font = load_font(size)
+    while size > MIN_FONT_SIZE and max(_text_width(font, line) for line in lines) > available:
+        size -= 1
+        font = load_font(size)
+    if max(_text_width(font, line) for line in lines) > available:
+        lines = [piece for line in lines for piece in wrap_line(font, line, available)]
+    return font, lines
+
+
+class TextLayout:
+    """
+    Una descripción medida para un lienzo de width píxeles de ancho.
+
+    Las coordenadas son relativas al origen del texto: x desde el borde
+    izquierdo del lienzo, y desde la fila en que empieza el texto.
+
+    * font: la fuente, ya reducida si hacía falta.
+    * lines: (texto, x, y) de cada línea (ya partida si no cabía), con el
+      origen de ImageDraw.text().
+    * ascent, line_height: medidas de la fuente para la exportación vectorial.
+    * bbox, height: caja de la tinta de todas las líneas y su altura.
+    * mask: la tinta como máscara de cobertura ("L") del tamaño de bbox.
+      Pegar un color con ella da los mismos píxeles que ImageDraw.text().
+    """
+
+    def __init__(self, text, width):
+        self.font, lines = fit_lines(split_lines(text), width)
+        self.font_size = getattr(self.font, "size", 10)
+        self.ascent, descent = self.font.getmetrics()
+        self.line_height = self.ascent + descent + round(self.font_size * LINE_SPACING)
+
+        self.lines = []
+        boxes = []
+        for i, line in enumerate(lines):
+            left, top, right, bottom = self.font.getbbox(line)
+            x = (width - (right - left)) // 2
+            y = i * self.line_height
+            self.lines.append((line, x, y))
+            if right > left:
+                boxes.append((x + left, y + top, x + right, y + bottom))
+        if not boxes:
+            boxes = [(0, 0, 0, 0)]
+        self.bbox = (min(b[0] for b in boxes), min(b[1] for b in boxes),
+                     max(b[2] for b in boxes), max(b[3] for b in boxes))
+        self.height = self.bbox[3] - self.bbox[1]
+
+        x0, y0, x1, y1 = self.bbox
+        self.mask = Image.new("L", (x1 - x0, y1 - y0), 0)
+        draw = ImageDraw.Draw(self.mask)
+        for line, x, y in self.lines:
+            if line:
+                draw.text((x - x0, y - y0), line, font=self.font, fill=255)
+        self.nbytes = image_nbytes(self.mask)
+
+    def paste(self, image, top, fill_color):
+        """
+        Pinta el texto en image (que se modifica) con el origen del texto
+        en la fila top de image (negativa si image es una franja de debajo).
+        """
+        if self.mask.width and self.mask.height:
+            image.paste(fill_color, (self.bbox[0], top + self.bbox[1]), self.mask)
+
+
+def text_layout(text, width):
+    """TextLayout de text para un lienzo de width píxeles (en caché)."""
+    key = (text, width)
+    layout = _layouts.get(key)
+    if layout is None:
+        layout = TextLayout(text, width)
+        _layouts.put(key, layout)
+    return layout
@@ -0,0 +1,163 @@
+"""
+Medición de tiempos por etapa del render.
+
+TRACER.stage(nombre) mide un bloque y TRACER.traced(nombre) una función.
+Las etapas ejecutadas dentro de TRACER.frame() se suman en un desglose por
+fotograma (last_frame), que la interfaz muestra en la barra de estado, y
+todas se guardan como eventos que se pueden volcar a un JSON en formato
+Chrome trace (chrome://tracing, Perfetto).
+
+Desactivado (lo normal), stage() devuelve un contexto vacío compartido y
+traced() solo comprueba un atributo: el coste es despreciable.
+
+La variable de entorno QRSTUDIO_TRACE activa la medición al arrancar; si
+contiene una ruta, la interfaz vuelca ahí la traza al cerrarse.
+"""
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+
+# Eventos guardados como máximo (los más antiguos se descartan)
+MAX_EVENTS = 200_000
+
+_NULL_STAGE = contextlib.nullcontext()
+
+
+class _Stage:
+    """Contexto que mide una etapa y la anota en el trazador."""
+
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer._record(self.name, self.start, time.perf_counter_ns() - self.start)
+        return False
+
+
+class _Frame(_Stage):
+    """Etapa que además agrupa el desglose de las etapas que contiene."""
+
+    __slots__ = ("timings", "outer")
+
+    def __enter__(self):
+        local = self.tracer._local
+        self.outer = getattr(local, "timings", None)
+        self.timings = local.timings = {}
+        return super().__enter__()
+
+    def __exit__(self, *exc):
+        # Restaurar antes de anotar: el fotograma cuenta en el de fuera
+        self.tracer._local.timings = self.outer
+        super().__exit__(*exc)
+        self.timings["total"] = (time.perf_counter_ns() - self.start) / 1e6
+        self.tracer.last_frame = self.timings
+        return False
+
+
+class Tracer:
+    """
+    Recoge los tiempos de las etapas (en cualquier hilo).
+
+    events guarda (nombre, inicio_ns, duración_ns, id_hilo); last_frame es
+    el desglose en milisegundos del último frame() terminado.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.events = []
+        self.last_frame = {}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def stage(self, name):
+        """Contexto que mide el bloque como la etapa `name`."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Stage(self, name)
+
+    def frame(self, name="render"):
+        """Como stage(), y además deja el desglose en last_frame."""
+        if not self.enabled:
+            return _NULL_STAGE
+        return _Frame(self, name)
+
+    def traced(self, name):
+        """Decorador: mide cada llamada a la función como la etapa `name`."""
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                if not self.enabled:
+                    return func(*args, **kwargs)
+                with _Stage(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def _record(self, name, start, duration):
+        timings = getattr(self._local, "timings", None)
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + duration / 1e6
+        with self._lock:
+            self.events.append((name, start, duration, threading.get_ident()))
+            if len(self.events) > MAX_EVENTS:
+                del self.events[:len(self.events) - MAX_EVENTS]
+
+    def clear(self):
+        with self._lock:
+            self.events.clear()
+        self.last_frame = {}
+
+    def summary(self):
+        """Número de llamadas, total y media (ms) por etapa."""
+        with self._lock:
+            events = list(self.events)
+        summary = {}
+        for name, _, duration, _ in events:
+            entry = summary.setdefault(name, {"count": 0, "total_ms": 0.0})
+            entry["count"] += 1
+            entry["total_ms"] += duration / 1e6
+        for entry in summary.values():
+            entry["mean_ms"] = entry["total_ms"] / entry["count"]
+        return summary
+
+    def dump(self, path):
+        """
+        Escribe los eventos en formato Chrome trace (JSON), con el resumen
+        por etapa en "otherData".
+        """
+        with self._lock:
+            events = list(self.events)
+        pid = os.getpid()
+        trace = {
+            "traceEvents": [
+                {"name": name, "cat": "render", "ph": "X", "pid": pid, "tid": tid,
+                 "ts": start / 1000, "dur": duration / 1000}
+                for name, start, duration, tid in events
+            ],
+            "displayTimeUnit": "ms",
+            "otherData": {"summary": self.summary()},
+        }
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(trace, f, ensure_ascii=False)
+
+
+def format_timings(timings):
+    """Desglose de un fotograma en una línea: "12.3 ms · módulos 8.1 · ..."."""
+    if not timings:
+        return ""
+    parts = [f"{timings.get('total', 0.0):.1f} ms"]
+    parts += [f"{name} {ms:.1f}" for name, ms in timings.items() if name != "total"]
+    return " · ".join(parts)
+
+
+TRACER = Tracer(enabled=bool(os.environ.get("QRSTUDIO_TRACE")))
@@ -0,0 +1,573 @@
+"""
+Exportación vectorial (SVG, PDF y EPS) a partir de la matriz del QR.
+
+En lugar de rasterizar a un box_size enorme para imprenta, la geometría
+sale directamente de la matriz de módulos, en las mismas unidades que el
+raster (1 píxel = 1 unidad; 1 punto en PDF/EPS):
+
+* Cuadrado (y los ojos de todos los estilos): los módulos contiguos se
+  funden en rectángulos, primero por filas y luego uniendo filas iguales.
+* Redondeado: cada tramo horizontal es un rectángulo con sus esquinas
+  exteriores redondeadas o no según los vecinos, igual que
+  RoundedModuleDrawer (los módulos interiores nunca se redondean).
+* Círculo: un círculo por módulo.
+
+La descripción va como texto (Arial/Helvetica), el radio de borde como
+recorte y el logo como imagen incrustada. Solo se admite relleno sólido.
+
+Las piezas del PDF (pdf_content, los recursos y PdfWriter) también las usa
+qrstudio.sheet para componer hojas de etiquetas.
+"""
+import base64
+import html
+import io
+import os
+import zlib
+
+import numpy as np
+from PIL import Image
+
+from qrstudio.logo import LOGO_CACHE
+from qrstudio.render import (
+    LogoError, description_layout, encode_qr, has_description
+)
+
+VECTOR_FORMATS = {".svg": "SVG", ".pdf": "PDF", ".eps": "EPS"}
+
+# Lado máximo del logo incrustado (se guarda a más resolución que el
+# raster para que aguante la ampliación)
+LOGO_MAX_PIXELS = 1024
+
+# Distancia de los puntos de control de una curva Bézier que aproxima un
+# cuarto de círculo de radio 1
+KAPPA = 0.5522847498
+
+
+def _num(value):
+    """Número compacto: 12, 12.5, 0.33 (sin ceros ni punto sobrantes)."""
+    if value == int(value):
+        return str(int(value))
+    text = f"{value:.2f}".rstrip("0").rstrip(".")
+    return "0" if text == "-0" else text
+
+
+def _runs(row):
+    """Tramos (inicio, fin) de valores True en una fila booleana."""
+    padded = np.concatenate(([False], row, [False])).astype(np.int8)
+    edges = np.diff(padded)
+    return list(zip(np.flatnonzero(edges == 1).tolist(), np.flatnonzero(edges == -1).tolist()))
+
+
+def merge_rects(active):
+    """
+    Cubre los módulos activos con rectángulos (x, y, ancho, alto) en
+    módulos: tramos por fila, unidos verticalmente mientras se repiten.
+    """
+    rects = []
+    open_runs = {}  # tramo -> fila en que empezó
+    for y, row in enumerate(active):
+        runs = set(_runs(row))
+        for run in list(open_runs):
+            if run not in runs:
+                start = open_runs.pop(run)
+                rects.append((run[0], start, run[1] - run[0], y - start))
+        for run in runs:
+            open_runs.setdefault(run, y)
+    for run, start in open_runs.items():
+        rects.append((run[0], start, run[1] - run[0], len(active) - start))
+    return rects
+
+
+def eye_mask(n):
+    """Módulos de los tres patrones de posición (mismo criterio que fastdraw)."""
+    eye = np.zeros((n, n), dtype=bool)
+    eye[:7, :7] = eye[:7, n - 7:] = eye[n - 7:, :7] = True
+    return eye
+
+
+class VectorLayout:
+    """
+    Geometría y elementos del QR, en píxeles del raster equivalente.
+
+    shapes es una lista de primitivas:
+    ("rect", x, y, ancho, alto), ("round", x, y, ancho, alto, r,
+    (nw, ne, se, sw)) y ("circle", cx, cy, r).
+    """
+
+    def __init__(self, params, qr=None):
+        if params.fill_mode != "solid":
+            raise ValueError("La exportación vectorial solo admite relleno sólido")
+        self.params = params
+        qr = qr or encode_qr(params.data, params.error_correction)
+        box = params.box_size
+        n = qr.modules_count
+        self.qr_size = (n + 2 * params.border) * box
+        self.width = self.height = self.qr_size
+        self.shapes = self._shapes(np.asarray(qr.modules, dtype=bool), box, params.border * box)
+
+        self.text = None
+        if has_description(params.description):
+            self.text = params.description
+            text, text_y, self.height = description_layout(
+                self.qr_size, self.qr_size, self.text
+            )
+            # Mismo tamaño y posición que el texto del raster: (línea,
+            # ancho, línea base) de cada línea con texto. El ancho es el de
+            # Helvetica, la fuente con la que se escribe en el PDF
+            self.font_size = text.font_size
+            self.text_lines = [(line, helvetica_width(line, text.font_size),
+                                text_y + y + text.ascent)
+                               for line, _, y in text.lines if line]
+
+        self.logo = None
+        if params.logo_path:
+            try:
+                max_size = int(self.qr_size * params.logo_ratio)
+                thumb = LOGO_CACHE.thumbnail(params.logo_path, max_size)
+                # También en caché: en un lote o una hoja de etiquetas es
+                # el mismo para todos los códigos (compartido: no modificar)
+                self.logo = LOGO_CACHE.thumbnail(params.logo_path, LOGO_MAX_PIXELS)
+            except Exception as e:
+                raise LogoError(e) from e
+            self.logo_box = ((self.qr_size - thumb.width) // 2,
+                             (self.qr_size - thumb.height) // 2,
+                             thumb.width, thumb.height)
+
+    def _shapes(self, active, box, offset):
+        n = active.shape[0]
+        eye = eye_mask(n)
+        style = self.params.style
+
+        square = active if style == "Cuadrado" else active & eye
+        shapes = [("rect", offset + x * box, offset + y * box, w * box, h * box)
+                  for x, y, w, h in merge_rects(square)]
+        if style == "Cuadrado":
+            return shapes
+
+        others = active & ~eye
+        padded = np.pad(active, 1)
+        if style == "Redondeado":
+            r = box / 2
+            for y in range(n):
+                for x0, x1 in _runs(others[y]):
+                    # Vecinos norte/sur del primer y el último módulo
+                    north = padded[y, 1 + x0], padded[y, x1]
+                    south = padded[y + 2, 1 + x0], padded[y + 2, x1]
+                    corners = (not north[0], not north[1], not south[1], not south[0])
+                    shapes.append(("round", offset + x0 * box, offset + y * box,
+                                   (x1 - x0) * box, box, r, corners))
+        elif style == "Círculo":
+            r = box / 2
+            for y, x in zip(*np.nonzero(others)):
+                shapes.append(("circle", offset + x * box + r, offset + y * box + r, r))
+        else:
+            raise ValueError(f"Estilo desconocido: {style!r}")
+        return shapes
+
+
+# --- Caminos en la sintaxis de cada formato ---
+
+def _svg_path(shape):
+    kind = shape[0]
+    if kind == "rect":
+        _, x, y, w, h = shape
+        return f"M{_num(x)} {_num(y)}h{_num(w)}v{_num(h)}h{_num(-w)}z"
+    if kind == "circle":
+        _, cx, cy, r = shape
+        return (f"M{_num(cx - r)} {_num(cy)}a{_num(r)} {_num(r)} 0 1 0 {_num(2 * r)} 0"
+                f"a{_num(r)} {_num(r)} 0 1 0 {_num(-2 * r)} 0z")
+    _, x, y, w, h, r, (nw, ne, se, sw) = shape
+    arc = f"a{_num(r)} {_num(r)} 0 0 1 "
+    d = [f"M{_num(x + r * nw)} {_num(y)}h{_num(w - r * nw - r * ne)}"]
+    if ne:
+        d.append(f"{arc}{_num(r)} {_num(r)}")
+    d.append(f"v{_num(h - r * ne - r * se)}")
+    if se:
+        d.append(f"{arc}{_num(-r)} {_num(r)}")
+    d.append(f"h{_num(-(w - r * se - r * sw))}")
+    if sw:
+        d.append(f"{arc}{_num(-r)} {_num(-r)}")
+    d.append(f"v{_num(-(h - r * sw - r * nw))}")
+    if nw:
+        d.append(f"{arc}{_num(r)} {_num(-r)}")
+    return "".join(d) + "z"
+
+
+def _bezier_ops(shape, move, line, curve, close, rect):
+    """
+    Camino de una primitiva con operadores de PDF o PostScript (que solo
+    cambian de nombre). Devuelve una cadena.
+    """
+    kind = shape[0]
+    if kind == "rect":
+        _, x, y, w, h = shape
+        return f"{_num(x)} {_num(y)} {_num(w)} {_num(h)} {rect}"
+
+    def corner(x0, y0, x1, y1, cx, cy):
+        # Cuarto de círculo de (x0, y0) a (x1, y1) alrededor de (cx, cy): la
+        # tangente en cada extremo es paralela al radio del otro
+        c1 = (x0 + (x1 - cx) * KAPPA, y0 + (y1 - cy) * KAPPA)
+        c2 = (x1 + (x0 - cx) * KAPPA, y1 + (y0 - cy) * KAPPA)
+        return (f"{_num(c1[0])} {_num(c1[1])} {_num(c2[0])} {_num(c2[1])} "
+                f"{_num(x1)} {_num(y1)} {curve}")
+
+    if kind == "circle":
+        _, cx, cy, r = shape
+        return " ".join([
+            f"{_num(cx)} {_num(cy - r)} {move}",
+            corner(cx, cy - r, cx + r, cy, cx, cy),
+            corner(cx + r, cy, cx, cy + r, cx, cy),
+            corner(cx, cy + r, cx - r, cy, cx, cy),
+            corner(cx - r, cy, cx, cy - r, cx, cy),
+            close,
+        ])
+
+    _, x, y, w, h, r, (nw, ne, se, sw) = shape
+    right, bottom = x + w, y + h
+    ops = [f"{_num(x + r * nw)} {_num(y)} {move}"]
+    if ne:
+        ops += [f"{_num(right - r)} {_num(y)} {line}",
+                corner(right - r, y, right, y + r, right - r, y + r)]
+    else:
+        ops.append(f"{_num(right)} {_num(y)} {line}")
+    if se:
+        ops += [f"{_num(right)} {_num(bottom - r)} {line}",
+                corner(right, bottom - r, right - r, bottom, right - r, bottom - r)]
+    else:
+        ops.append(f"{_num(right)} {_num(bottom)} {line}")
+    if sw:
+        ops += [f"{_num(x + r)} {_num(bottom)} {line}",
+                corner(x + r, bottom, x, bottom - r, x + r, bottom - r)]
+    else:
+        ops.append(f"{_num(x)} {_num(bottom)} {line}")
+    if nw:
+        ops += [f"{_num(x)} {_num(y + r)} {line}",
+                corner(x, y + r, x + r, y, x + r, y + r)]
+    ops.append(close)
+    return " ".join(ops)
+
+
+def _rounded_canvas(layout):
+    """Primitiva del lienzo completo con el radio de borde (o None)."""
+    radius = min(layout.params.border_radius, layout.width / 2, layout.height / 2)
+    if radius <= 0:
+        return None
+    return ("round", 0, 0, layout.width, layout.height, radius, (True,) * 4)
+
+
+def _rgb(color):
+    return " ".join(_num(c / 255) for c in color[:3])
+
+
+# --- Escritores ---
+
+def write_svg(layout, file):
+    params = layout.params
+    w, h = _num(layout.width), _num(layout.height)
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{w}" height="{h}" '
+           f'viewBox="0 0 {w} {h}">']
+    back = f"#{bytes(params.back_color).hex()}"
+    canvas = _rounded_canvas(layout)
+    if canvas is None:
+        out.append(f'<g><rect width="{w}" height="{h}" fill="{back}"/>')
+    else:
+        # El fondo ya lleva el radio (los visores SVG Tiny ignoran
+        # clipPath); el recorte es para lo que llegue a las esquinas
+        rounded = _svg_path(canvas)
+        out.append(f'<defs><clipPath id="r"><path d="{rounded}"/></clipPath></defs>')
+        out.append(f'<g clip-path="url(#r)"><path d="{rounded}" fill="{back}"/>')
+    out.append(f'<path fill="#{bytes(params.fill_color).hex()}" d="'
+               + "".join(_svg_path(s) for s in layout.shapes) + '"/>')
+    if layout.logo is not None:
+        buffer = io.BytesIO()
+        layout.logo.save(buffer, "PNG")
+        x, y, lw, lh = layout.logo_box
+        out.append(f'<image x="{x}" y="{y}" width="{lw}" height="{lh}" '
+                   f'preserveAspectRatio="none" href="data:image/png;base64,'
+                   f'{base64.b64encode(buffer.getvalue()).decode("ascii")}"/>')
+    if layout.text is not None:
+        for line, _, baseline in layout.text_lines:
+            out.append(f'<text x="{_num(layout.width / 2)}" y="{_num(baseline)}" '
+                       f'font-family="Arial, Helvetica, sans-serif" font-size="{layout.font_size}" '
+                       f'text-anchor="middle" fill="#{bytes(params.fill_color).hex()}">'
+                       f'{html.escape(line)}</text>')
+    out.append("</g></svg>\n")
+    file.write("\n".join(out).encode("utf-8"))
+
+
+def _pdf_string(text):
+    data = text.encode("cp1252", errors="replace")
+    return b"(" + data.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+# Recursos del contenido de pdf_content(): nombres fijos en el diccionario
+# /Resources de la página
+PDF_FONT = (b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica "
+            b"/Encoding /WinAnsiEncoding >>")
+
+# Anchos de Helvetica (métricas AFM estándar, en milésimas del cuerpo) de
+# los códigos 0x20-0xff de WinAnsiEncoding, la codificación de PDF_FONT
+HELVETICA_WIDTHS = (
+    278, 278, 355, 556, 556, 889, 667, 191, 333, 333, 389, 584, 278, 333, 278, 278,  # 0x20
+    556, 556, 556, 556, 556, 556, 556, 556, 556, 556, 278, 278, 584, 584, 584, 556,  # 0x30
+    1015, 667, 667, 722, 722, 667, 611, 778, 722, 278, 500, 667, 556, 833, 722, 778,  # 0x40
+    667, 778, 722, 667, 611, 722, 667, 944, 667, 667, 611, 278, 278, 278, 469, 556,  # 0x50
+    333, 556, 556, 500, 556, 556, 278, 556, 556, 222, 222, 500, 222, 833, 556, 556,  # 0x60
+    556, 556, 333, 500, 278, 556, 500, 722, 500, 500, 500, 334, 260, 334, 584, 278,  # 0x70
+    556, 0, 222, 556, 333, 1000, 556, 556, 333, 1000, 667, 333, 1000, 0, 611, 0,  # 0x80
+    0, 222, 222, 333, 333, 350, 556, 1000, 333, 1000, 500, 333, 944, 0, 500, 667,  # 0x90
+    278, 333, 556, 556, 556, 556, 260, 556, 333, 737, 370, 556, 584, 333, 737, 333,  # 0xa0
+    400, 584, 333, 333, 333, 556, 537, 278, 333, 333, 365, 556, 834, 834, 834, 611,  # 0xb0
+    667, 667, 667, 667, 667, 667, 1000, 722, 667, 667, 667, 667, 278, 278, 278, 278,  # 0xc0
+    722, 722, 778, 778, 778, 778, 778, 584, 778, 722, 722, 722, 722, 667, 667, 611,  # 0xd0
+    556, 556, 556, 556, 556, 556, 889, 500, 556, 556, 556, 556, 278, 278, 278, 278,  # 0xe0
+    556, 556, 556, 556, 556, 556, 556, 584, 611, 556, 556, 556, 556, 500, 556, 500,  # 0xf0
+)
+
+
+def helvetica_width(text, font_size):
+    """Ancho de text escrito con PDF_FONT a font_size (lo que dibuja el visor)."""
+    data = text.encode("cp1252", errors="replace")
+    return sum(HELVETICA_WIDTHS[byte - 32] for byte in data if byte >= 32) * font_size / 1000
+
+
+def pdf_content(layout):
+    """
+    Operadores PDF que dibujan el QR en unidades del raster, con el origen
+    arriba a la izquierda (quien llama pone la transformación). Usa los
+    recursos /C (pdf_circle), /Im1 (pdf_image del logo) y /F1 (PDF_FONT).
+    """
+    params = layout.params
+    ops = []
+    canvas = _rounded_canvas(layout)
+    if canvas is not None:
+        ops.append(_bezier_ops(canvas, "m", "l", "c", "h", "re") + " W n")
+    ops.append(f"{_rgb(params.back_color)} rg 0 0 {_num(layout.width)} {_num(layout.height)} re f")
+    ops.append(f"{_rgb(params.fill_color)} rg")
+    ops.extend(_bezier_ops(s, "m", "l", "c", "h", "re")
+               for s in layout.shapes if s[0] != "circle")
+    ops.append("f")
+    # Los círculos son el mismo Form XObject colocado en cada módulo
+    ops.extend(f"q 1 0 0 1 {_num(cx - r)} {_num(cy - r)} cm /C Do Q"
+               for _, cx, cy, r in (s for s in layout.shapes if s[0] == "circle"))
+    if layout.logo is not None:
+        x, y, lw, lh = layout.logo_box
+        ops.append(f"q {lw} 0 0 {-lh} {x} {y + lh} cm /Im1 Do Q")
+    content = "\n".join(ops).encode("ascii")
+    if layout.text is not None:
+        for line, line_width, baseline in layout.text_lines:
+            x = (layout.width - line_width) / 2
+            content += (f"\nq {_rgb(params.fill_color)} rg 1 0 0 -1 {_num(x)} "
+                        f"{_num(baseline)} cm BT /F1 {layout.font_size} Tf 0 0 Td ").encode("ascii")
+            content += _pdf_string(line) + b" Tj ET Q"
+    return content
+
+
+def pdf_circle(r):
+    """Form XObject /C: un círculo de radio r con la esquina en el origen."""
+    return pdf_stream(
+        f"/Type /XObject /Subtype /Form /BBox [0 0 {_num(2 * r)} {_num(2 * r)}]",
+        (_bezier_ops(("circle", r, r, r), "m", "l", "c", "h", "re") + " f").encode("ascii"))
+
+
+def pdf_image(image, smask=None):
+    """
+    Image XObject RGB de image. Con smask (número de objeto) devuelve
+    también la máscara de transparencia, que va en ese objeto.
+    """
+    pixels = np.asarray(image.convert("RGBA") if smask else image.convert("RGB"))
+    iw, ih = image.size
+    entries = (f"/Type /XObject /Subtype /Image /Width {iw} /Height {ih} /ColorSpace /DeviceRGB "
+               f"/BitsPerComponent 8")
+    if not smask:
+        return pdf_stream(entries, pixels.tobytes())
+    return (pdf_stream(f"{entries} /SMask {smask} 0 R", pixels[..., :3].tobytes()),
+            pdf_stream(f"/Type /XObject /Subtype /Image /Width {iw} /Height {ih} "
+                        f"/ColorSpace /DeviceGray /BitsPerComponent 8", pixels[..., 3].tobytes()))
+
+
+class PdfWriter:
+    """
+    Escribe un PDF objeto a objeto directamente en file: solo se guardan
+    las posiciones de los objetos, para la tabla xref del final, así que la
+    memoria no crece con el número de páginas. Los números que se reservan
+    y no se escriben quedan como entradas libres.
+    """
+
+    def __init__(self, file):
+        self.file = file
+        self.position = 0
+        self.offsets = {}
+        self.count = 0  # mayor número de objeto reservado o escrito
+        self._write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+
+    def _write(self, data):
+        self.file.write(data)
+        self.position += len(data)
+
+    def reserve(self, n=1):
+        """Reserva n números de objeto consecutivos y devuelve el primero."""
+        self.count += n
+        return self.count - n + 1
+
+    def add(self, number, data):
+        self.offsets[number] = self.position
+        self.count = max(self.count, number)
+        self._write(f"{number} 0 obj\n".encode("ascii") + data + b"\nendobj\n")
+
+    def close(self, root=1):
+        """Escribe la tabla xref y el trailer (root: número del catálogo)."""
+        xref = self.position
+        count = max(self.offsets) + 1
+        out = [f"xref\n0 {count}\n0000000000 65535 f \n".encode("ascii")]
+        for number in range(1, count):
+            if number in self.offsets:
+                out.append(f"{self.offsets[number]:010d} 00000 n \n".encode("ascii"))
+            else:
+                out.append(b"0000000000 65535 f \n")
+        out.append(f"trailer\n<< /Size {count} /Root {root} 0 R >>\nstartxref\n{xref}\n%%EOF\n"
+                   .encode("ascii"))
+        self._write(b"".join(out))
+
+
+def write_pdf(layout, file):
+    width, height = layout.width, layout.height
+    # Origen arriba a la izquierda, como el raster
+    content = f"1 0 0 -1 0 {_num(height)} cm\n".encode("ascii") + pdf_content(layout)
+
+    objects = {}  # número -> contenido (bytes)
+    resources = []
+    xobjects = []
+    circles = [s for s in layout.shapes if s[0] == "circle"]
+    if circles:
+        objects[8] = pdf_circle(circles[0][3])
+        xobjects.append("/C 8 0 R")
+    if layout.logo is not None:
+        objects[6], objects[7] = pdf_image(layout.logo, smask=7)
+        xobjects.append("/Im1 6 0 R")
+    if xobjects:
+        resources.append(f"/XObject << {' '.join(xobjects)} >>")
+    if layout.text is not None:
+        objects[5] = PDF_FONT
+        resources.append("/Font << /F1 5 0 R >>")
+
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    objects[2] = b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>"
+    objects[3] = (f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 {_num(width)} {_num(height)}] "
+                  f"/Resources << {' '.join(resources)} >> /Contents 4 0 R >>").encode("ascii")
+    objects[4] = pdf_stream("", content)
+
+    # Se escribe en memoria y de una vez, como los demás formatos
+    out = io.BytesIO()
+    writer = PdfWriter(out)
+    for number in sorted(objects):
+        writer.add(number, objects[number])
+    writer.close()
+    file.write(out.getvalue())
+
+
+def pdf_stream(entries, data):
+    """Objeto stream comprimido con Flate; entries es el resto del diccionario."""
+    data = zlib.compress(data)
+    return (f"<< {entries} /Length {len(data)} /Filter /FlateDecode >>\nstream\n"
+            .encode("ascii") + data + b"\nendstream")
+
+
+def _ps_string(text):
+    data = text.encode("latin-1", errors="replace")
+    out = []
+    for byte in data:
+        char = chr(byte)
+        if char in "()\\":
+            out.append("\\" + char)
+        elif 32 <= byte < 127:
+            out.append(char)
+        else:
+            out.append(f"\\{byte:03o}")
+    return "(" + "".join(out) + ")"
+
+
+def write_eps(layout, file):
+    """EPS de nivel 3 (Flate). El logo se aplana sobre el color de fondo (sin alfa)."""
+    params = layout.params
+    width, height = layout.width, layout.height
+    out = [
+        "%!PS-Adobe-3.0 EPSF-3.0",
+        f"%%BoundingBox: 0 0 {int(np.ceil(width))} {int(np.ceil(height))}",
+        f"%%HiResBoundingBox: 0 0 {_num(width)} {_num(height)}",
+        "%%Creator: QR-Studio",
+        "%%LanguageLevel: 3",
+        "%%EndComments",
+        "/m {moveto} bind def /l {lineto} bind def /c {curveto} bind def",
+        "/z {closepath} bind def /r {rectfill} bind def",
+        "/o {newpath 0 360 arc fill} bind def",
+        "gsave",
+        f"0 {_num(height)} translate 1 -1 scale",
+    ]
+    canvas = _rounded_canvas(layout)
+    if canvas is not None:
+        out.append("newpath " + _bezier_ops(canvas, "m", "l", "c", "z", "r") + " clip newpath")
+    out.append(f"{_rgb(params.back_color)} setrgbcolor 0 0 {_num(width)} {_num(height)} rectfill")
+    out.append(f"{_rgb(params.fill_color)} setrgbcolor")
+    paths = []
+    for shape in layout.shapes:
+        if shape[0] == "rect":
+            out.append(_bezier_ops(shape, "m", "l", "c", "z", "r"))
+        elif shape[0] == "circle":
+            _, cx, cy, r = shape
+            out.append(f"{_num(cx)} {_num(cy)} {_num(r)} o")
+        else:
+            paths.append(_bezier_ops(shape, "m", "l", "c", "z", "r"))
+    if paths:
+        out.append("newpath")
+        out.extend(paths)
+        out.append("fill")
+
+    if layout.logo is not None:
+        x, y, lw, lh = layout.logo_box
+        logo = Image.new("RGB", layout.logo.size, params.back_color)
+        logo.paste(layout.logo, (0, 0), layout.logo)
+        iw, ih = logo.size
+        data = base64.a85encode(zlib.compress(logo.tobytes())).decode("ascii")
+        out.append(f"gsave {x} {y} translate {lw} {lh} scale")
+        out.append(f"{iw} {ih} 8 [{iw} 0 0 {ih} 0 0] currentfile /ASCII85Decode filter "
+                   f"/FlateDecode filter false 3 colorimage")
+        out.extend(data[i:i + 78] for i in range(0, len(data), 78))
+        out.append("~> grestore")
+
+    if layout.text is not None:
+        out += [
+            "/Helvetica findfont dup length dict begin",
+            "{1 index /FID ne {def} {pop pop} ifelse} forall",
+            "/Encoding ISOLatin1Encoding def currentdict end",
+            "/Helvetica-Latin1 exch definefont pop",
+        ]
+        # Centrado con stringwidth: el intérprete mide con su Helvetica
+        for line, _, baseline in layout.text_lines:
+            out += [
+                f"gsave {_rgb(params.fill_color)} setrgbcolor {_num(width / 2)} {_num(baseline)} "
+                f"translate 1 -1 scale",
+                f"/Helvetica-Latin1 findfont {layout.font_size} scalefont setfont",
+                f"{_ps_string(line)} dup stringwidth pop 2 div neg 0 moveto show grestore",
+            ]
+    out += ["grestore", "showpage", "%%EOF", ""]
+    file.write("\n".join(out).encode("latin-1"))
+
+
+WRITERS = {"SVG": write_svg, "PDF": write_pdf, "EPS": write_eps}
+
+
+def vector_format(path):
+    """"SVG", "PDF" o "EPS" según la extensión, o None si no es vectorial."""
+    return VECTOR_FORMATS.get(os.path.splitext(path)[1].lower())
+
+
+def export_vector(params, path, qr=None):
+    """Escribe params como SVG, PDF o EPS (según la extensión de path)."""
+    fmt = vector_format(path)
+    if fmt is None:
+        raise ValueError(f"Formato vectorial no soportado: {path}")
+    layout = VectorLayout(params, qr)
+    with open(path, "wb") as f:
+        WRITERS[fmt](layout, f)
+    return layout
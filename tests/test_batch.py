@@ -0,0 +1,56 @@
+"""
+Una fila mala del manifiesto se informa en su resultado y no corta el lote.
+"""
+import json
+
+import pytest
+from PIL import Image
+
+from qrstudio import batch
+from qrstudio.render import RenderParams
+
+
+def _run(tmp_path, lines):
+    manifest = tmp_path / "m.jsonl"
+    manifest.write_text("\n".join(lines) + "\n", encoding="utf-8")
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    rows = batch.read_manifest(str(manifest))
+    results = batch.run_batch(rows, str(out_dir), RenderParams(data="", border_radius=30), jobs=1)
+    return {index: (path, error) for index, path, error in results}
+
+
+def test_bad_rows_are_reported(tmp_path):
+    results = _run(tmp_path, [
+        json.dumps({"data": "uno"}),
+        json.dumps({"data": ""}),
+        "{no es json",
+        "[1, 2]",
+        json.dumps({"data": "dos", "filename": "dos.svg"}),
+    ])
+    assert results[0][1] is None
+    assert "data" in results[1][1]
+    assert "JSON" in results[2][1]
+    assert "objeto" in results[3][1]
+    assert results[4][1] is None
+    assert results[1][0] is None
+
+
+@pytest.mark.parametrize("filename", [
+    "../fuera.png", "sub/../../fuera.png", "..\\fuera.png", "/tmp/fuera.png", "x.desconocido",
+])
+def test_unsafe_or_unknown_filename_is_rejected(tmp_path, filename):
+    results = _run(tmp_path, [json.dumps({"data": "x", "filename": filename})])
+    path, error = results[0]
+    assert path is None and error
+    assert not (tmp_path / "fuera.png").exists()
+
+
+def test_jpeg_is_flattened_on_white(tmp_path):
+    results = _run(tmp_path, [json.dumps({"data": "x", "filename": "x.jpg"})])
+    path, error = results[0]
+    assert error is None
+    with Image.open(path) as image:
+        assert image.mode == "RGB"
+        # Esquina recortada por el radio de borde
+        assert image.getpixel((0, 0)) == (255, 255, 255)
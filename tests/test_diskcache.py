@@ -0,0 +1,30 @@
+"""
+Clave de la caché de disco: depende del contenido de los ficheros que
+intervienen en el render, incluida la fuente de la descripción.
+"""
+from qrstudio import diskcache
+from qrstudio.render import RenderParams
+
+
+def test_font_content_changes_key(tmp_path, monkeypatch):
+    fonts = []
+    for name, content in (("a.ttf", b"fuente a"), ("b.ttf", b"fuente b")):
+        path = tmp_path / name
+        path.write_bytes(content)
+        fonts.append(str(path))
+    params = RenderParams("https://ejemplo.com", description="Hola")
+
+    keys = []
+    for path in fonts:
+        monkeypatch.setattr(diskcache, "font_path", lambda path=path: path)
+        keys.append(diskcache.params_key(params, "png"))
+    assert keys[0] != keys[1]
+
+
+def test_font_ignored_without_description(tmp_path, monkeypatch):
+    path = tmp_path / "a.ttf"
+    path.write_bytes(b"fuente a")
+    params = RenderParams("https://ejemplo.com")
+    before = diskcache.params_key(params, "png")
+    monkeypatch.setattr(diskcache, "font_path", lambda: str(path))
+    assert diskcache.params_key(params, "png") == before
@@ -0,0 +1,114 @@
+"""
+El codificador propio (qrstudio.encoder) da la misma matriz que
+qrcode.QRCode(fit=True), también mientras se edita el texto.
+"""
+import random
+
+import pytest
+import qrcode
+from qrcode import exceptions, util
+
+from qrstudio import encoder
+from qrstudio.encoder import DataOverflowError, QREncoder, fit_version
+
+ERROR_CORRECTIONS = (
+    qrcode.ERROR_CORRECT_L, qrcode.ERROR_CORRECT_M,
+    qrcode.ERROR_CORRECT_Q, qrcode.ERROR_CORRECT_H,
+)
+ALPHABETS = {
+    "numérico": "0123456789",
+    "alfanumérico": "ABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789 $%*+-./:",
+    "mixto": "abcxyzñ€ 0123456789ABC",
+}
+
+
+def reference(data, error_correction):
+    qr = qrcode.QRCode(error_correction=error_correction)
+    qr.add_data(data)
+    qr.make(fit=True)
+    return qr
+
+
+def edits(seed, steps):
+    """Textos sucesivos de una edición: escribir, borrar y pegar en medio."""
+    rng = random.Random(seed)
+    text = ""
+    for _ in range(steps):
+        alphabet = rng.choice(list(ALPHABETS.values()))
+        typed = "".join(rng.choice(alphabet) for _ in range(rng.randint(1, 30)))
+        action = rng.random()
+        if action < 0.6 or not text:
+            text += typed
+        elif action < 0.8:
+            text = text[:-rng.randint(1, 10)]
+        else:
+            i = rng.randint(0, len(text))
+            text = text[:i] + typed + text[i + rng.randint(0, 5):]
+        yield text[:600]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_editing_sequence_matches_qrcode(seed):
+    editor = QREncoder()
+    for step, text in enumerate(edits(seed, 80)):
+        error_correction = ERROR_CORRECTIONS[step % 4]
+        # Segmentos y versión en cada paso; la matriz completa, de vez en cuando
+        chunks = util.optimal_data_chunks(util.to_bytestring(text), minimum=encoder.OPTIMIZE)
+        segments = editor.segments(text)
+        assert [(s.mode, s.data) for s in segments] == [(c.mode, c.data) for c in chunks], text
+        qr = qrcode.QRCode(error_correction=error_correction)
+        qr.add_data(text)
+        assert fit_version(segments, error_correction) == qr.best_fit(), text
+        if step % 10 == 0:
+            expected = reference(text, error_correction)
+            for qr in (editor.encode(text, error_correction),
+                       encoder.encode(text, error_correction)):
+                assert qr.version == expected.version, text
+                assert qr.modules == expected.modules, text
+
+
+def _longest(char, error_correction, version):
+    """Repeticiones de char que caben, según qrcode, en la versión dada."""
+    low, high = 1, 8000
+    while low < high:
+        middle = (low + high + 1) // 2
+        qr = qrcode.QRCode(error_correction=error_correction)
+        qr.add_data(char * middle)
+        try:
+            fits = qr.best_fit() <= version
+        except (ValueError, exceptions.DataOverflowError):
+            fits = False
+        if fits:
+            low = middle
+        else:
+            high = middle - 1
+    return low
+
+
+# Al pasar de la versión 9 a la 10 y de la 26 a la 27 crecen los campos de
+# longitud de los segmentos
+@pytest.mark.parametrize("version", [9, 26])
+@pytest.mark.parametrize("char", ["7", "A", "a"])
+@pytest.mark.parametrize("error_correction", ERROR_CORRECTIONS)
+def test_fit_version_at_range_boundaries(version, char, error_correction):
+    length = _longest(char, error_correction, version)
+    editor = QREncoder()
+    for data, expected in ((char * length, version), (char * (length + 1), version + 1)):
+        segments = editor.segments(data)
+        assert fit_version(segments, error_correction) == expected
+        assert reference(data, error_correction).version == expected
+        # Con la versión anterior como pista, igual
+        for hint in (version - 1, version, version + 1, version + 2):
+            assert fit_version(segments, error_correction, hint) == expected
+
+
+@pytest.mark.parametrize("error_correction", ERROR_CORRECTIONS)
+def test_overflow_is_a_value_error(error_correction):
+    data = "a" * 3000
+    with pytest.raises(ValueError) as info:
+        encoder.encode(data, error_correction)
+    assert isinstance(info.value, DataOverflowError)
+    assert isinstance(info.value, exceptions.DataOverflowError)
+    letter = {qrcode.ERROR_CORRECT_L: "L", qrcode.ERROR_CORRECT_M: "M",
+              qrcode.ERROR_CORRECT_Q: "Q", qrcode.ERROR_CORRECT_H: "H"}[error_correction]
+    assert f"corrección {letter}" in str(info.value)
@@ -0,0 +1,45 @@
+"""
+La miniatura del logo no depende de lo que haya en la caché de logos: la
+caché de disco y los ETag del servidor se calculan solo con los
+parámetros y el contenido de los ficheros.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from qrstudio.logo import LOGO_CACHE, LogoCache
+from qrstudio.render import RenderParams, render_qr
+
+
+@pytest.fixture(params=["logo.jpg", "logo.png"])
+def logo_path(request, tmp_path):
+    rng = np.random.default_rng(0)
+    pixels = rng.integers(0, 256, (900, 700, 3), dtype=np.uint8)
+    path = tmp_path / request.param
+    Image.fromarray(pixels).save(path)
+    return str(path)
+
+
+def test_thumbnail_same_cold_and_warm(logo_path):
+    cold = LogoCache().thumbnail(logo_path, 120)
+
+    warm_cache = LogoCache()
+    warm_cache.load(logo_path)  # logo completo ya decodificado
+    warm = warm_cache.thumbnail(logo_path, 120)
+
+    assert cold.size == warm.size
+    assert cold.tobytes() == warm.tobytes()
+
+
+def test_render_same_cold_and_warm(logo_path):
+    params = RenderParams("https://ejemplo.com", logo_path=logo_path, box_size=8)
+
+    LOGO_CACHE.clear()
+    cold = render_qr(params)
+
+    LOGO_CACHE.clear()
+    LOGO_CACHE.load(logo_path)
+    warm = render_qr(params)
+    LOGO_CACHE.clear()
+
+    assert cold.tobytes() == warm.tobytes()
@@ -0,0 +1,60 @@
+"""
+Los módulos dibujados por qrstudio (motores "pil" y "numpy", con las
+máscaras de color vectorizadas) son idénticos píxel a píxel a los de
+qrcode con StyledPilImage y sus ColorMask.
+"""
+import copy
+
+import numpy as np
+import pytest
+from PIL import Image
+from qrcode.image.styledpil import StyledPilImage
+from qrcode.image.styles import colormasks
+
+from qrstudio.render import MODULE_DRAWERS, draw_modules, encode_qr
+
+FILL = (200, 30, 90)
+FILL2 = (10, 200, 40)
+
+
+@pytest.fixture(scope="module")
+def fill_image(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    path = tmp_path_factory.mktemp("relleno") / "relleno.png"
+    Image.fromarray(rng.integers(0, 256, (50, 80, 3), dtype=np.uint8)).save(path)
+    return str(path)
+
+
+def color_mask(fill_mode, back_color, fill_image):
+    if fill_mode == "solid":
+        return colormasks.SolidFillColorMask(back_color, FILL)
+    if fill_mode == "image":
+        with Image.open(fill_image) as image:
+            return colormasks.ImageColorMask(back_color, color_mask_image=image.convert("RGBA"))
+    mask_class = {
+        "radial": colormasks.RadialGradiantColorMask,
+        "square": colormasks.SquareGradiantColorMask,
+        "horizontal": colormasks.HorizontalGradiantColorMask,
+        "vertical": colormasks.VerticalGradiantColorMask,
+    }[fill_mode]
+    return mask_class(back_color, FILL, FILL2)
+
+
+@pytest.mark.parametrize("engine", ["pil", "numpy"])
+@pytest.mark.parametrize("fill_mode", ["solid", "radial", "square", "horizontal", "vertical", "image"])
+@pytest.mark.parametrize("back_color", [(255, 255, 255), (250, 240, 10)])
+@pytest.mark.parametrize("style", list(MODULE_DRAWERS))
+def test_same_as_styled_pil_image(style, back_color, fill_mode, engine, fill_image):
+    qr = encode_qr("https://ejemplo.com/máscaras", 2)
+    box_size, border = 5, 2
+    reference = copy.copy(qr)
+    reference.box_size, reference.border = box_size, border
+    expected = reference.make_image(
+        image_factory=StyledPilImage, module_drawer=MODULE_DRAWERS[style](),
+        color_mask=color_mask(fill_mode, back_color, fill_image),
+    ).convert("RGBA")
+
+    image = draw_modules(qr, style, box_size, border, FILL, back_color, engine,
+                         fill_mode, FILL2, fill_image)
+    assert image.size == expected.size
+    assert image.tobytes() == expected.tobytes()
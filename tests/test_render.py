@@ -0,0 +1,32 @@
+"""
+Caché por etapas de StagedRenderer: un fichero que cambia en disco con la
+misma ruta no devuelve la imagen anterior.
+"""
+import os
+
+import pytest
+from PIL import Image
+
+from qrstudio.render import RenderParams, StagedRenderer
+
+
+def _touch(path, image):
+    image.save(path)
+    # Otra mtime aunque el sistema de ficheros tenga poca resolución
+    stat = os.stat(path)
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+@pytest.mark.parametrize("border_radius", [0, 20])
+def test_fill_image_change_invalidates_output(tmp_path, border_radius):
+    path = str(tmp_path / "relleno.png")
+    Image.new("RGB", (40, 40), (255, 0, 0)).save(path)
+    params = RenderParams("https://ejemplo.com", fill_mode="image", fill_image_path=path,
+                          border_radius=border_radius, description="Relleno")
+    renderer = StagedRenderer()
+    first = renderer.render(params, use_disk=False).tobytes()
+
+    _touch(path, Image.new("RGB", (40, 40), (0, 0, 255)))
+    second = renderer.render(params, use_disk=False).tobytes()
+
+    assert first != second
@@ -0,0 +1,45 @@
+"""
+La exportación por franjas (PNG y TIFF) da los mismos píxeles que
+render_qr() en memoria, sea cual sea la altura de la franja.
+"""
+import numpy as np
+import pytest
+from PIL import Image
+
+from qrstudio.render import RenderParams, render_qr
+from qrstudio.stream import export_streamed
+
+
+@pytest.fixture(scope="module")
+def logo_path(tmp_path_factory):
+    rng = np.random.default_rng(0)
+    path = tmp_path_factory.mktemp("logo") / "logo.png"
+    Image.fromarray(rng.integers(0, 256, (60, 90, 4), dtype=np.uint8), "RGBA").save(path)
+    return str(path)
+
+
+@pytest.mark.parametrize("extension", ["png", "tif"])
+@pytest.mark.parametrize("strip_rows", [1, 37, 4096])
+@pytest.mark.parametrize("style, fill_mode, description, border_radius, with_logo", [
+    ("Cuadrado", "solid", "", 0, False),
+    ("Redondeado", "radial", "Hola QR", 7, True),
+    ("Círculo", "horizontal", "Dos\nlíneas", 60, False),
+    ("Cuadrado", "image", "Relleno", 30, True),
+])
+def test_streamed_same_as_in_memory(tmp_path, logo_path, extension, strip_rows,
+                                    style, fill_mode, description, border_radius, with_logo):
+    params = RenderParams(
+        "https://ejemplo.com/franjas", description=description, style=style, box_size=4,
+        fill_color=(200, 0, 60), back_color=(250, 240, 200), fill_mode=fill_mode,
+        fill_color2=(0, 60, 200), fill_image_path=logo_path,
+        logo_path=logo_path if with_logo else None, border_radius=border_radius,
+        engine="numpy",
+    )
+    expected = render_qr(params)
+    path = str(tmp_path / f"qr.{extension}")
+    export_streamed(params, path, strip_rows=strip_rows)
+    with Image.open(path) as image:
+        image.load()
+        assert image.mode == "RGBA"
+        assert image.size == expected.size
+        assert image.tobytes() == expected.tobytes()
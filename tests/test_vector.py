@@ -0,0 +1,29 @@
+"""
+La descripción de PDF y EPS se escribe en Helvetica: se centra con las
+métricas de Helvetica, no con las de la fuente del raster.
+"""
+import io
+
+from qrstudio.render import RenderParams
+from qrstudio.vector import VectorLayout, _num, helvetica_width, pdf_content, write_eps
+
+
+def test_helvetica_width():
+    # H, o, l, a en Helvetica.afm
+    assert helvetica_width("Hola", 1000) == 722 + 556 + 222 + 556
+    assert helvetica_width("ñ€", 10) == (556 + 556) * 10 / 1000
+
+
+def test_pdf_text_centered_with_helvetica():
+    layout = VectorLayout(RenderParams("https://ejemplo.com", description="WWW iii"))
+    line, width, _ = layout.text_lines[0]
+    assert width == helvetica_width(line, layout.font_size)
+    x = (layout.width - width) / 2
+    assert f"1 0 0 -1 {_num(x)} ".encode("ascii") in pdf_content(layout)
+
+
+def test_eps_text_centered_with_stringwidth():
+    layout = VectorLayout(RenderParams("https://ejemplo.com", description="WWW iii"))
+    buffer = io.BytesIO()
+    write_eps(layout, buffer)
+    assert b"stringwidth pop 2 div neg 0 moveto show" in buffer.getvalue()